@@ -6,25 +6,80 @@ Roboflow veri setleri ile model eğitimi ve canlı kamera ile tespit
 
 Gerekli paketler:
 pip install ultralytics roboflow opencv-python pillow numpy requests pyyaml
+İsteğe bağlı CPU arka uçları: pip install onnx onnxruntime openvino
 """
 
 import cv2
 import numpy as np
-from ultralytics import YOLO
+import collections
+import math
+try:
+    from ultralytics import YOLO
+except ImportError:
+    # Model gerektirmeyen sınıflar (kuyruklar, takip, birim testleri) ultralytics olmadan da kullanılabilir
+    YOLO = None
 import datetime
 import json
 import sqlite3
 import threading
 import time
 import os
+import queue
+import signal
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Optional
+import http.server
+import urllib.parse
+import html
 import yaml
-from roboflow import Roboflow
+try:
+    from roboflow import Roboflow
+except ImportError:
+    Roboflow = None
 import requests
 from PIL import Image
 import shutil
 import sqlite3
 
 
+# Durum makinesi ihlal türleri -> veritabanı kayıt adı
+VIOLATION_LABELS = {
+    'no_helmet': 'Baret Yok',
+    'no_vest': 'Yelek Yok',
+    'no_goggles': 'Gözlük Yok'
+}
+
+# safety_rules.required_ppe / bölge ayarındaki KKD adı -> ihlal türü
+PPE_VIOLATION_TYPES = {
+    'baret': 'no_helmet',
+    'kask': 'no_helmet',
+    'helmet': 'no_helmet',
+    'hardhat': 'no_helmet',
+    'yelek': 'no_vest',
+    'vest': 'no_vest',
+    'gözlük': 'no_goggles',
+    'goggles': 'no_goggles'
+}
+
+# Kanıt dosyası yolu tutan safety_violations sütunları
+EVIDENCE_PATH_COLUMNS = ('image_path', 'clip_path')
+
+
+def _safe_path_component(name):
+    """Kamera adını klasör/dosya adı olarak kullanılabilir hale getir"""
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in str(name))
+
+# Çıkarım arka ucu -> Ultralytics dışa aktarma formatı (bkz. export_model)
+INFERENCE_BACKENDS = {
+    'pytorch': None,
+    'onnx': 'onnx',
+    'openvino': 'openvino'
+}
+
+
 class HelmetDetectionTrainer:
     """Baret tespit modeli eğitim sınıfı """
     
@@ -37,6 +92,9 @@ class HelmetDetectionTrainer:
         
     def download_roboflow_dataset(self, api_key, workspace, project, version=1):
         """Roboflow'dan veri seti indir"""
+        if Roboflow is None:
+            print(" roboflow kurulu değil: pip install roboflow")
+            return None
         try:
             print("Roboflow veri seti indiriliyor...")
             rf = Roboflow(api_key=api_key)
@@ -238,344 +296,2513 @@ class HelmetDetectionTrainer:
             print(f" Model değerlendirme hatası: {e}")
             return None
 
-class HelmetDetectionSystem:
-    """Gelişmiş baret tespit sistemi - Düzeltilmiş"""
+class ModelRegistry:
+    """
+    Süreç genelinde paylaşılan, açılışta ısıtılan model deposu
+    (kayıt başına bir kilit: tahmin nesnesi thread güvenli değil)
+    """
     
-    def __init__(self, model_path=None, database_path="safety_logs.db"):
-        """
-        İş güvenliği baret tespit sistemi
-        """
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def get(self, model_path, backend='pytorch', int8=False, data_yaml_path=None,
+            warmup_runs=2, warmup_shape=(720, 1280)):
+        """Kayıtlı modeli döner, yoksa yükleyip ısıtır"""
+        key = (os.path.abspath(model_path) if os.path.exists(model_path) else model_path,
+               backend, bool(int8))
         
-        # Model yükleme
-        if model_path and os.path.exists(model_path):
-            try:
-                self.model = YOLO(model_path)
-                print(f" Özel model yüklendi: {model_path}")
-            except Exception as e:
-                print(f" Özel model yüklenemedi ({e}), varsayılan model kullanılıyor...")
-                self.model = YOLO('yolov8n.pt')
-        else:
-            print("Varsayılan YOLOv8 modeli kullanılıyor...")
-            self.model = YOLO('yolov8n.pt')
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load(model_path, backend, int8, data_yaml_path,
+                                   warmup_runs, warmup_shape)
+                self._entries[key] = entry
+            entry['users'] += 1
+        return entry
+    
+    def _load(self, model_path, backend, int8, data_yaml_path, warmup_runs, warmup_shape):
+        started = time.perf_counter()
+        model = load_detection_model(model_path, backend, int8, data_yaml_path)
+        load_time = time.perf_counter() - started
         
-        self.database_path = database_path
-        self.setup_database()
+        # Isınma: ağırlıkların belleğe alınması ve ilk çağrı maliyetleri burada ödenir
+        started = time.perf_counter()
+        dummy_frame = np.zeros((warmup_shape[0], warmup_shape[1], 3), dtype=np.uint8)
+        try:
+            for _ in range(warmup_runs):
+                model(dummy_frame, verbose=False)
+        except Exception as e:
+            print(f" Model ısınma hatası: {e}")
+        warmup_time = time.perf_counter() - started
         
-        # Tespit eşikleri
-        self.confidence_threshold = 0.3  # Daha düşük eşik
+        print(f" Model hazır: {model_path} ({backend}{' INT8' if int8 else ''}) - "
+              f"yükleme {load_time:.2f} s, ısınma {warmup_time:.2f} s")
         
-        # Sınıf isimleri (modelinize göre güncelleyin)
-        self.helmet_classes = ['helmet', 'hardhat', 'safety helmet', 'safety_helmet', 'hard hat', 'hat']
-        self.person_classes = ['person', 'worker', 'human']
-        self.no_helmet_classes = ['no-helmet', 'no_helmet', 'without_helmet', 'head']
-        # YENİ: Yelek sınıfları
-        self.vest_classes = ['vest', 'safety vest', 'safety_vest', 'hi-vis', 'high-vis', 'reflective vest', 'hi_vis']
-        self.no_vest_classes = ['no-vest', 'no_vest', 'without_vest']
-        # YENİ: Gözlük sınıfları
-        self.goggles_classes = ['goggles', 'safety goggles', 'safety_goggles', 'glasses', 'eye protection', 'eye_protection']
-        self.no_goggles_classes = ['no-goggles', 'no_goggles', 'without_goggles']
-                
-        # Performans takibi
-        self.frame_count = 0
-        self.detection_stats = {
-            'total_persons': 0,
-            'helmeted_persons': 0,
-            'violations': 0
+        return {
+            'model': model,
+            'lock': threading.Lock(),
+            'model_path': model_path,
+            'backend': backend,
+            'int8': bool(int8),
+            'load_time': load_time,
+            'warmup_time': warmup_time,
+            'users': 0
         }
-    def get_test_results_report(self, days=7):
-        """Test sonuçları raporu"""
-        try:
-            conn = sqlite3.connect(self.database_path)
-            cursor = conn.cursor()
-            
-            # Test kayıtlarını al
-            cursor.execute('''
-                SELECT violation_type, COUNT(*) as count,
-                    AVG(confidence) as avg_confidence,
-                    MIN(timestamp) as first_test,
-                    MAX(timestamp) as last_test
-                FROM safety_violations 
-                WHERE timestamp >= datetime('now', '-{} days')
-                AND (violation_type LIKE 'Test%' OR worker_id = 'test_session')
-                GROUP BY violation_type
-                ORDER BY count DESC
-            '''.format(days))
-            
-            results = cursor.fetchall()
-            conn.close()
-            
-            print(f"🧪 Son {days} Gün Test Sonuçları:")
-            print("=" * 60)
-            
-            if results:
-                for row in results:
-                    test_type, count, avg_conf, first, last = row
-                    print(f" {test_type}")
-                    print(f"   Toplam: {count} tespit")
-                    print(f"   Ortalama Güven: {avg_conf:.2f}")
-                    print(f"    İlk: {first}")
-                    print(f"    Son: {last}")
-                    print("-" * 40)
-            else:
-                print("Test kaydı bulunamadı!")
-                
-            return results
-            
-        except Exception as e:
-            print(f" Test raporu hatası: {e}")
-            return []
+    
+    def report(self):
+        """Yüklü modelleri yazdır"""
+        print(" Yüklü Modeller:")
+        print("-" * 40)
+        for entry in self._entries.values():
+            print(f"   {entry['model_path']} ({entry['backend']}{' INT8' if entry['int8'] else ''})"
+                  f" - {entry['users']} kullanıcı, yükleme {entry['load_time']:.2f} s,"
+                  f" ısınma {entry['warmup_time']:.2f} s")
+    
+    def clear(self):
+        """Tüm modelleri bırak (yeni ağırlıklar yüklemek için)"""
+        with self._lock:
+            self._entries.clear()
 
-    def setup_database(self):
-        """Veritabanı kurulumu"""
-        try:
-            conn = sqlite3.connect(self.database_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS safety_violations (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT,
-                    violation_type TEXT,
-                    location TEXT,
-                    confidence REAL,
-                    image_path TEXT,
-                    worker_id TEXT,
-                    status TEXT DEFAULT 'active',
-                    resolved_at TEXT,
-                    notes TEXT
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS detection_stats (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT,
-                    location TEXT,
-                    total_persons INTEGER,
-                    helmeted_persons INTEGER,
-                    violations INTEGER,
-                    compliance_rate REAL
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
-            print(" Veritabanı hazır")
-        except Exception as e:
-            print(f" Veritabanı kurulum hatası: {e}")
+# Süreç genelinde tek model deposu
+MODEL_REGISTRY = ModelRegistry()
+
+class LatestFrameQueue:
+    """Sınırlı frame kuyruğu - dolunca en eski öğeyi atar, üretici hiç beklemez"""
     
-    def detect_objects(self, frame):
-        """Nesne tespiti yap"""
-        try:
-            results = self.model(frame, conf=self.confidence_threshold, verbose=False)
-            
-            detections = {
-                'helmets': [],
-                'persons': [],
-                'no_helmets': [],
-                'vests' : [],
-                'no_vests' : [],
-                'goggles' : [],
-                'no_goggles' : []
-            }
-            
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        class_id = int(box.cls)
-                        class_name = self.model.names[class_id].lower()
-                        confidence = float(box.conf)
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        
-                        detection_info = {
-                            'bbox': [int(x1), int(y1), int(x2), int(y2)],
-                            'confidence': confidence,
-                            'center': [(x1 + x2) / 2, (y1 + y2) / 2],
-                            'class_name': class_name,
-                            'class_id': class_id
-                        }
-                        
-                        # Sınıf kategorilerine ayır
-                        if any(helmet_class in class_name for helmet_class in self.helmet_classes):
-                            detections['helmets'].append(detection_info)
-                        elif any(person_class in class_name for person_class in self.person_classes):
-                            detections['persons'].append(detection_info)
-                        elif any(no_helmet_class in class_name for no_helmet_class in self.no_helmet_classes):
-                            detections['no_helmets'].append(detection_info)
-                        elif any(vest_class in class_name for vest_class in self.vest_classes):
-                            detections['vests'].append(detection_info)
-                        elif any(no_vest_class in class_name for no_vest_class in self.no_vest_classes):
-                            detections['no_vests'].append(detection_info)
-                        elif any(goggles_class in class_name for goggles_class in self.goggles_classes):
-                            detections['goggles'].append(detection_info)
-                        elif any(no_goggles_class in class_name for no_goggles_class in self.no_goggles_classes):
-                            detections['no_goggles'].append(detection_info)
-                                                            
-            return detections
-            
-        except Exception as e:
-            print(f" Tespit hatası: {e}")
-            return {'helmets': [], 'persons': [], 'no_helmets': []}
+    def __init__(self, maxsize=1, on_drop=None):
+        self.items = collections.deque(maxlen=maxsize)
+        self.condition = threading.Condition()
+        self.dropped = 0
+        self.on_drop = on_drop  # Atılan öğe için çağrılır (ör. frame tamponunu bırak)
     
-    def check_safety_compliance(self, detections):
-        """Baret uyumunu kontrol et"""
-        persons = detections['persons']
-        helmets = detections['helmets']
+    def put(self, item):
+        """Öğe ekle, kuyruk doluysa en eskisini at"""
+        dropped_item = None
+        with self.condition:
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+                dropped_item = self.items[0]
+            self.items.append(item)
+            self.condition.notify()
+        if dropped_item is not None and self.on_drop is not None:
+            self.on_drop(dropped_item)
+    
+    def get(self, timeout=None):
+        """En eski öğeyi al, süre dolarsa None döner"""
+        with self.condition:
+            if not self.items:
+                self.condition.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+    
+    def __len__(self):
+        return len(self.items)
+
+class RealtimePacer:
+    """Video dosyasını gerçek zamanlı hızda okuma takvimi (interval=0 -> beklemez)"""
+    
+    def __init__(self, interval):
+        self.interval = interval
+        self.reset()
+    
+    def reset(self):
+        """Takvimi şimdiden başlat (ör. duraklatmadan sonra)"""
+        self.next_due = time.perf_counter()
+    
+    def wait(self):
+        """Sıradaki frame zamanına kadar bekle"""
+        if not self.interval:
+            return
+        self.next_due += self.interval
+        delay = self.next_due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            self.next_due = time.perf_counter()
+
+class FrameBufferRing:
+    """
+    Kamera başına yeniden kullanılan frame tamponları
+    (okuma turundan sonra frame'i tutan aşama retain()/release() çağırır)
+    """
+    
+    def __init__(self, size=4):
+        self.size = size
+        self.buffers = [None] * size
+        self.refcounts = [0] * size
+        self._next = 0
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.allocated = 0
+        self.overruns = 0
+    
+    def _slot(self, frame):
+        for slot, buffer in enumerate(self.buffers):
+            if buffer is frame:
+                return slot
+        return None
+    
+    def read(self, read_function):
+        """
+        read_function: cap.read veya cap.retrieve
+        Dönen frame bir kez ödünç alınmış sayılır, işi bitince release() edilmeli
+        """
+        with self._lock:
+            slot = None
+            for offset in range(self.size):
+                candidate = (self._next + offset) % self.size
+                if self.refcounts[candidate] == 0:
+                    slot = candidate
+                    break
+            if slot is None:
+                self.overruns += 1
+            else:
+                self._next = (slot + 1) % self.size
+                self.refcounts[slot] = 1
         
-        violations = []
-        safe_persons = []
+        if slot is None:
+            return read_function()
         
-        for i, person in enumerate(persons):
-            person_center = person['center']
-            person_bbox = person['bbox']
-            helmet_found = False
-            
-            # Kişinin baş bölgesi
-            head_region_height = (person_bbox[3] - person_bbox[1]) * 0.4
-            head_region = [
-                person_bbox[0] - 20, person_bbox[1], 
-                person_bbox[2] + 20, person_bbox[1] + head_region_height
-            ]
-            
-            # En yakın bareti bul
-            min_distance = float('inf')
-            best_helmet = None
-            
-            for helmet in helmets:
-                helmet_center = helmet['center']
-                
-                # Mesafe hesapla
-                distance = np.sqrt((person_center[0] - helmet_center[0])**2 + 
-                                 (person_center[1] - helmet_center[1])**2)
-                
-                # Baret kişinin üstünde mi?
-                helmet_above_person = helmet_center[1] < person_center[1]
-                
-                # Baret baş bölgesinde mi?
-                helmet_in_head_region = (
-                    helmet_center[0] >= head_region[0] and
-                    helmet_center[0] <= head_region[2] and
-                    helmet_center[1] >= head_region[1] and
-                    helmet_center[1] <= head_region[3]
-                )
-                
-                if (distance < min_distance and 
-                    helmet_above_person and 
-                    helmet_in_head_region and
-                    distance < 100):  # Maksimum mesafe
-                    min_distance = distance
-                    best_helmet = helmet
-                    helmet_found = True
-            
-            if helmet_found:
-                safe_persons.append({
-                    'person': person,
-                    'helmet': best_helmet,
-                    'person_id': i
-                })
+        buffer = self.buffers[slot]
+        ret, frame = read_function(buffer) if buffer is not None else read_function()
+        
+        with self._lock:
+            if not ret or frame is None:
+                self.refcounts[slot] = 0
+            elif frame is buffer:
+                self.reused += 1
             else:
-                violations.append({
-                    'person_id': i,
-                    'person': person
+                # İlk frame ya da boyut değişti: tampon bir kez ayrılır
+                self.buffers[slot] = frame
+                self.allocated += 1
+        return ret, frame
+    
+    def retain(self, frame):
+        with self._lock:
+            slot = self._slot(frame)
+            if slot is not None:
+                self.refcounts[slot] += 1
+    
+    def release(self, frame):
+        with self._lock:
+            slot = self._slot(frame)
+            if slot is not None and self.refcounts[slot] > 0:
+                self.refcounts[slot] -= 1
+    
+    @property
+    def in_use(self):
+        return sum(1 for count in self.refcounts if count)
+
+class SharedFrameRing:
+    """
+    Süreçler arası paylaşılan bellekte frame halkası
+    
+    Yazılan slotun sıra no'su -1 yapılır, okuyucu kopyadan sonra tekrar kontrol eder.
+    Bellek düzeni: [son sıra no, kapandı, slot sıra no'ları..., slot zamanları..., frame'ler]
+    """
+    
+    def __init__(self, shm, shape, slots):
+        self.shm = shm
+        self.shape = tuple(shape)
+        self.slots = slots
+        header_size = (2 + 2 * slots) * 8
+        self._header = np.ndarray((2 + slots,), dtype=np.int64, buffer=shm.buf)
+        self._timestamps = np.ndarray((slots,), dtype=np.float64, buffer=shm.buf,
+                                      offset=(2 + slots) * 8)
+        self._frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=shm.buf,
+                                  offset=header_size)
+    
+    @classmethod
+    def create(cls, shape, slots=4):
+        size = (2 + 2 * slots) * 8 + slots * int(np.prod(shape))
+        ring = cls(shared_memory.SharedMemory(create=True, size=size), shape, slots)
+        ring._header[:] = 0
+        return ring
+    
+    @classmethod
+    def attach(cls, name, shape, slots):
+        return cls(shared_memory.SharedMemory(name=name), shape, slots)
+    
+    def descriptor(self):
+        """Diğer süreçlerin attach() için ihtiyaç duyduğu bilgiler"""
+        return {'name': self.shm.name, 'shape': self.shape, 'slots': self.slots}
+    
+    @property
+    def last_seq(self):
+        return int(self._header[0])
+    
+    @property
+    def closed(self):
+        return bool(self._header[1])
+    
+    def write(self, frame, timestamp):
+        """Frame'i sıradaki slota yaz, sıra numarasını döner"""
+        seq = int(self._header[0]) + 1
+        slot = seq % self.slots
+        if frame.shape != self.shape:
+            frame = cv2.resize(frame, (self.shape[1], self.shape[0]))
+        
+        self._header[2 + slot] = -1
+        np.copyto(self._frames[slot], frame)
+        self._timestamps[slot] = timestamp
+        self._header[2 + slot] = seq
+        self._header[0] = seq
+        return seq
+    
+    def read_latest(self, last_seq, out=None):
+        """last_seq'ten yeni frame varsa (seq, zaman, frame kopyası), yoksa None"""
+        seq = int(self._header[0])
+        if seq <= last_seq:
+            return None
+        slot = seq % self.slots
+        if out is None:
+            out = np.empty(self.shape, dtype=np.uint8)
+        np.copyto(out, self._frames[slot])
+        timestamp = float(self._timestamps[slot])
+        if self._header[2 + slot] != seq:
+            return None  # Kopyalanırken üzerine yazıldı, sonraki turda tekrar denenir
+        return seq, timestamp, out
+    
+    def read_seq(self, seq, out=None):
+        """Belirli sıra numaralı frame halkada hâlâ duruyorsa kopyası, yoksa None"""
+        slot = seq % self.slots
+        if self._header[2 + slot] != seq:
+            return None
+        if out is None:
+            out = np.empty(self.shape, dtype=np.uint8)
+        np.copyto(out, self._frames[slot])
+        if self._header[2 + slot] != seq:
+            return None
+        return out
+    
+    def mark_closed(self):
+        """Kaynak bitti (okuyucular kalan frame'den sonra durur)"""
+        self._header[1] = 1
+    
+    def close(self):
+        del self._header, self._timestamps, self._frames
+        self.shm.close()
+    
+    def unlink(self):
+        self.shm.unlink()
+
+class DetectionSet:
+    """
+    Dizi tabanlı tespit kabı
+    (detections['persons'] gibi erişim eski liste/sözlük görünümünü üretir)
+    """
+    
+    CATEGORIES = ('helmets', 'persons', 'no_helmets', 'vests', 'no_vests', 'goggles', 'no_goggles')
+    
+    def __init__(self, xyxy, confidences, class_ids, category_ids, class_names):
+        self.xyxy = xyxy                  # (N, 4) float32
+        self.confidences = confidences    # (N,) float32
+        self.class_ids = class_ids        # (N,) int
+        self.category_ids = category_ids  # (N,) int, -1 = kategorisiz
+        self.class_names = class_names
+        self._indices = {}
+        self._views = {}
+    
+    @classmethod
+    def empty(cls, class_names=()):
+        """Boş tespit kabı"""
+        return cls(np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32),
+                   np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), class_names)
+    
+    def __len__(self):
+        return len(self.xyxy)
+    
+    def indices(self, category):
+        """Kategoriye ait satır indeksleri"""
+        if category not in self._indices:
+            category_id = self.CATEGORIES.index(category)
+            self._indices[category] = np.flatnonzero(self.category_ids == category_id)
+        return self._indices[category]
+    
+    def count(self, category):
+        """Kategorideki tespit sayısı (sözlük görünümü oluşturmadan)"""
+        return len(self.indices(category))
+    
+    def boxes(self, category):
+        """Kategorinin (k, 4) xyxy kutuları"""
+        return self.xyxy[self.indices(category)]
+    
+    def int_boxes(self, category):
+        """Kategorinin tam sayıya kesilmiş kutuları ('bbox' alanı ile aynı)"""
+        return self.boxes(category).astype(np.int64)
+    
+    def centers(self, category):
+        """Kategorinin (k, 2) kutu merkezleri"""
+        boxes = self.boxes(category)
+        return np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2], axis=1)
+    
+    def __getitem__(self, category):
+        if category not in self.CATEGORIES:
+            raise KeyError(category)
+        view = self._views.get(category)
+        if view is None:
+            view = []
+            for i in self.indices(category):
+                x1, y1, x2, y2 = self.xyxy[i]
+                class_id = int(self.class_ids[i])
+                view.append({
+                    'bbox': [int(x1), int(y1), int(x2), int(y2)],
+                    'confidence': float(self.confidences[i]),
+                    'center': [(x1 + x2) / 2, (y1 + y2) / 2],
+                    'class_name': self.class_names[class_id],
+                    'class_id': class_id
                 })
-                
-        for i, person in enumerate(persons):
-            person_center = person['center']
-            person_bbox = person['bbox']
-            vest_found = False
-            
-            # Kişinin gövde bölgesi (yelek için)
-            torso_region_height = (person_bbox[3] - person_bbox[1]) * 0.6
-            torso_region = [
-                person_bbox[0] - 10, person_bbox[1] + torso_region_height * 0.2,
-                person_bbox[2] + 10, person_bbox[3] - torso_region_height * 0.2
-            ]
+            self._views[category] = view
+        return view
+    
+    def get(self, category, default=None):
+        if category not in self.CATEGORIES:
+            return default
+        return self[category]
+    
+    def __contains__(self, category):
+        return category in self.CATEGORIES
+    
+    def __iter__(self):
+        return iter(self.CATEGORIES)
+    
+    def keys(self):
+        return list(self.CATEGORIES)
+    
+    def values(self):
+        return [self[category] for category in self.CATEGORIES]
+    
+    def items(self):
+        return [(category, self[category]) for category in self.CATEGORIES]
+    
+    def to_dict(self):
+        """Eski sözlük yapısına tam dönüşüm"""
+        return dict(self.items())
+    
+    def all_centers(self):
+        """Tüm kutuların (N, 2) merkezleri"""
+        return np.stack([(self.xyxy[:, 0] + self.xyxy[:, 2]) / 2,
+                         (self.xyxy[:, 1] + self.xyxy[:, 3]) / 2], axis=1)
+    
+    def select(self, selection):
+        """Maske veya indeks dizisine göre alt küme"""
+        return DetectionSet(self.xyxy[selection], self.confidences[selection],
+                            self.class_ids[selection], self.category_ids[selection],
+                            self.class_names)
+    
+    def offset(self, dx, dy):
+        """Kutuları kaydır (kırpılmış bölge -> tam frame koordinatları)"""
+        shift = np.array([dx, dy, dx, dy], dtype=self.xyxy.dtype)
+        return DetectionSet(self.xyxy + shift, self.confidences, self.class_ids,
+                            self.category_ids, self.class_names)
+    
+    @classmethod
+    def concatenate(cls, detection_sets, class_names=()):
+        """Birden fazla tespit kabını birleştir"""
+        detection_sets = [detections for detections in detection_sets if len(detections)]
+        if not detection_sets:
+            return cls.empty(class_names)
+        return cls(np.concatenate([d.xyxy for d in detection_sets]),
+                   np.concatenate([d.confidences for d in detection_sets]),
+                   np.concatenate([d.class_ids for d in detection_sets]),
+                   np.concatenate([d.category_ids for d in detection_sets]),
+                   detection_sets[0].class_names)
+    
+    def non_max_suppression(self, iou_threshold=0.5, metric='iou', priority=None):
+        """
+        Sınıf bazında NMS - örtüşen bölgelerden gelen kopyaları temizler
+        
+        metric='ios': kesişim / küçük kutu alanı (parça kutuları da yakalar)
+        priority: True olan kutular güvenden bağımsız olarak en son değerlendirilir
+        """
+        if len(self) < 2:
+            return self
+        
+        x1, y1, x2, y2 = (self.xyxy[:, k] for k in range(4))
+        areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+        if priority is None:
+            order = np.argsort(-self.confidences, kind='stable')
+        else:
+            order = np.lexsort((-self.confidences, priority))
+        suppressed = np.zeros(len(self), dtype=bool)
+        keep = []
+        
+        for i in order:
+            if suppressed[i]:
+                continue
+            keep.append(i)
+            inter_w = np.maximum(np.minimum(x2[i], x2) - np.maximum(x1[i], x1), 0)
+            inter_h = np.maximum(np.minimum(y2[i], y2) - np.maximum(y1[i], y1), 0)
+            intersection = inter_w * inter_h
+            if metric == 'ios':
+                overlap = intersection / np.maximum(np.minimum(areas[i], areas), 1e-6)
+            else:
+                overlap = intersection / np.maximum(areas[i] + areas - intersection, 1e-6)
+            suppressed |= (self.class_ids == self.class_ids[i]) & (overlap > iou_threshold)
+        
+        return self.select(np.array(keep, dtype=np.int64))
+
+class TileLayout:
+    """Uzakta kişi görülen yüksek çözünürlüklü frame için örtüşen karo düzeni"""
+    
+    def __init__(self, tile_size=1280, overlap=0.2, far_person_ratio=0.12, hold_frames=15):
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.far_person_ratio = far_person_ratio  # Kişi boyu / frame yüksekliği eşiği
+        self.hold_frames = hold_frames
+        self._hold = 0
+        self._tiles = {}
+        self.tiled_frames = 0
+    
+    @classmethod
+    def from_config(cls, config):
+        """{'tile_size': 1280, 'overlap': 0.2, 'far_person_ratio': 0.12, 'hold_frames': 15}"""
+        return cls(**(config or {}))
+    
+    def tiles(self, frame_shape):
+        """Frame'i kaplayan (x1, y1, x2, y2) karoları (boyut başına önbellekli)"""
+        height, width = frame_shape[:2]
+        if (height, width) not in self._tiles:
+            size = self.tile_size
+            step = max(1, int(size * (1 - self.overlap)))
             
-            # En yakın yeleki bul
-            for vest in detections['vests']:
-                vest_center = vest['center']
-                
-                # Yelek gövde bölgesinde mi?
-                vest_in_torso = (
-                    vest_center[0] >= torso_region[0] and
-                    vest_center[0] <= torso_region[2] and
-                    vest_center[1] >= torso_region[1] and
-                    vest_center[1] <= torso_region[3]
-                )
-                
-                if vest_in_torso:
-                    vest_found = True
-                    break
+            def starts(length):
+                if length <= size:
+                    return [0]
+                positions = list(range(0, length - size, step))
+                positions.append(length - size)  # Son karo kenara hizalı
+                return positions
             
-            if not vest_found:
-                # Mevcut violations listesindeki bu kişiyi bul ve yelek ihlali ekle
-                existing_violation = next((v for v in violations if v['person_id'] == i), None)
-                if existing_violation:
-                    existing_violation['violations'] = existing_violation.get('violations', ['no_helmet']) + ['no_vest']
-                else:
-                    violations.append({
-                        'person_id': i,
-                        'person': person,
-                        'violations': ['no_vest']
-                    })
-        # Gözlük kontrolü
-        for i, person in enumerate(persons):
-            person_center = person['center']
-            person_bbox = person['bbox']
-            goggles_found = False
-            
-            # Kişinin göz bölgesi (gözlük için)
-            eye_region_height = (person_bbox[3] - person_bbox[1]) * 0.3
-            eye_region = [
-                person_bbox[0] - 15, person_bbox[1] + eye_region_height * 0.1,
-                person_bbox[2] + 15, person_bbox[1] + eye_region_height * 0.8
+            self._tiles[(height, width)] = [
+                (x, y, min(x + size, width), min(y + size, height))
+                for y in starts(height) for x in starts(width)
             ]
-            
-            # En yakın gözlüğü bul
-            for goggles in detections['goggles']:
-                goggles_center = goggles['center']
-                
-                # Gözlük göz bölgesinde mi?
-                goggles_in_eye_region = (
-                    goggles_center[0] >= eye_region[0] and
-                    goggles_center[0] <= eye_region[2] and
-                    goggles_center[1] >= eye_region[1] and
-                    goggles_center[1] <= eye_region[3]
-                )
-                
-                if goggles_in_eye_region:
-                    goggles_found = True
-                    break
-            
-            if not goggles_found:
-                # Mevcut violations listesindeki bu kişiyi bul ve gözlük ihlali ekle
-                existing_violation = next((v for v in violations if v['person_id'] == i), None)
-                if existing_violation:
-                    existing_violation['violations'] = existing_violation.get('violations', []) + ['no_goggles']
-                else:
-                    violations.append({
-                        'person_id': i,
-                        'person': person,
-                        'violations': ['no_goggles']
-                    })
+        return self._tiles[(height, width)]
+    
+    def should_tile(self, detections, frame_shape):
+        """Uzakta kişi varsa (veya bekleme süresi dolmadıysa) karo modu"""
+        if len(self.tiles(frame_shape)) < 2:
+            return False
         
-        return violations, safe_persons
+        person_boxes = detections.boxes('persons')
+        heights = person_boxes[:, 3] - person_boxes[:, 1]
+        if np.any(heights < self.far_person_ratio * frame_shape[0]):
+            self._hold = self.hold_frames
+        elif self._hold > 0:
+            self._hold -= 1
+        else:
+            return False
+        
+        self.tiled_frames += 1
+        return True
+
+class CameraZone:
+    """
+    KKD kontrolü yapılacak kamera bölgesi (dikdörtgen veya çokgen)
+    (required_ppe boşsa tüm KKD'ler gereklidir)
+    """
     
-    def draw_detections(self, frame, detections, violations, safe_persons):
-        """Tespitleri çiz"""
-        try:
-            # Baretleri çiz (yeşil)
-            for helmet in detections['helmets']:
-                x1, y1, x2, y2 = helmet['bbox']
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(frame, f"Baret {helmet['confidence']:.2f}", 
-                           (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-            
-            # Güvenli kişileri çiz (mavi)
-            for safe in safe_persons:
-                person = safe['person']
-                x1, y1, x2, y2 = person['bbox']
+    def __init__(self, name, points, required_ppe=None):
+        self.name = name
+        self.points = np.asarray(points, dtype=np.int32).reshape(-1, 2)
+        if isinstance(required_ppe, str):
+            required_ppe = required_ppe.strip('{}').split(',')  # PostgreSQL dizi metni
+        self.required_ppe = [str(item).strip().strip('"').lower() for item in required_ppe or []
+                             if str(item).strip()]
+        
+        # Gerekli KKD'ler -> sayılacak ihlal türleri (None = hepsi; hiçbiri tanınmazsa da hepsi)
+        self.required_violations = None
+        if self.required_ppe:
+            self.required_violations = frozenset(
+                PPE_VIOLATION_TYPES[item] for item in self.required_ppe if item in PPE_VIOLATION_TYPES
+            ) or None
+            unknown = [item for item in self.required_ppe if item not in PPE_VIOLATION_TYPES]
+            if unknown:
+                print(f" Bilinmeyen KKD ({name}): {', '.join(unknown)}")
+        self._masks = {}
+    
+    @classmethod
+    def from_config(cls, name, config, required_ppe=None):
+        """{'rect': [x1, y1, x2, y2]} veya {'polygon': [[x, y], ...]} tanımından oluştur"""
+        if 'rect' in config:
+            x1, y1, x2, y2 = config['rect']
+            points = [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+        else:
+            points = config['polygon']
+        return cls(name, points, required_ppe or config.get('required_ppe'))
+    
+    def bounding_box(self, frame_shape, padding=0.0):
+        """
+        Frame sınırlarına kırpılmış (x1, y1, x2, y2), bölge dışarıdaysa None
+        
+        padding: bölge yüksekliğine oranla üste eklenecek pay (yanlara yarısı);
+        bölgenin üst kenarındaki kişilerin başı kesilmesin diye
+        """
+        height, width = frame_shape[:2]
+        x1, y1 = self.points.min(axis=0)
+        x2, y2 = self.points.max(axis=0) + 1
+        pad_top = int((y2 - y1) * padding)
+        pad_side = pad_top // 2
+        x1, y1 = max(int(x1) - pad_side, 0), max(int(y1) - pad_top, 0)
+        x2, y2 = min(int(x2) + pad_side, width), min(int(y2), height)
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return int(x1), int(y1), x2, y2
+    
+    def _mask(self, frame_shape):
+        key = tuple(frame_shape[:2])
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = np.zeros(key, dtype=np.uint8)
+            cv2.fillPoly(mask, [self.points], 1)
+            self._masks[key] = mask
+        return mask
+    
+    def contains(self, points, frame_shape):
+        """Noktalar (N, 2) bölgenin içinde mi?"""
+        if len(points) == 0:
+            return np.zeros(0, dtype=bool)
+        mask = self._mask(frame_shape)
+        height, width = mask.shape
+        xs = points[:, 0].astype(np.int64)
+        ys = points[:, 1].astype(np.int64)
+        inside_frame = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        result = np.zeros(len(points), dtype=bool)
+        result[inside_frame] = mask[ys[inside_frame], xs[inside_frame]] > 0
+        return result
+
+class AdaptiveFrameScheduler:
+    """
+    Çıkarım adımını ölçülen çıkarım süresine göre ayarlar
+    (target_fps üst sınır, latency_budget kaynak frame başına süre)
+    """
+    
+    def __init__(self, source_fps=30, target_fps=None, latency_budget=None,
+                 min_stride=1, max_stride=15, smoothing=0.2, headroom=0.85,
+                 relax_after=10):
+        self.source_fps = source_fps if source_fps and source_fps > 0 else 30
+        self.target_fps = target_fps
+        self.latency_budget = latency_budget or headroom / self.source_fps
+        self.min_stride = min_stride
+        self.max_stride = max_stride
+        self.smoothing = smoothing
+        self.relax_after = relax_after
+        
+        # FPS üst sınırı en küçük adımı belirler
+        self.floor_stride = min_stride
+        if target_fps:
+            self.floor_stride = max(min_stride, math.ceil(self.source_fps / target_fps))
+        
+        self.stride = self.floor_stride
+        self.avg_inference_time = None
+        self.frames_since_inference = 0
+        self._relax_votes = 0
+    
+    def should_process(self):
+        """Bu frame analiz edilmeli mi? (her gelen frame için bir kez çağrılır)"""
+        self.frames_since_inference += 1
+        if self.frames_since_inference >= self.stride:
+            self.frames_since_inference = 0
+            return True
+        return False
+    
+    def record(self, inference_time):
+        """Ölçülen çıkarım süresini (sn) bildir ve adımı güncelle"""
+        if self.avg_inference_time is None:
+            self.avg_inference_time = inference_time
+        else:
+            self.avg_inference_time += self.smoothing * (inference_time - self.avg_inference_time)
+        
+        needed = math.ceil(self.avg_inference_time / self.latency_budget)
+        needed = min(self.max_stride, max(self.floor_stride, needed))
+        
+        if needed > self.stride:
+            # CPU baskısı: hemen geri çekil
+            self.stride = needed
+            self._relax_votes = 0
+        elif needed < self.stride:
+            # Yük azaldı: birkaç ölçüm sonra bir adım yaklaş
+            self._relax_votes += 1
+            if self._relax_votes >= self.relax_after:
+                self.stride -= 1
+                self._relax_votes = 0
+        else:
+            self._relax_votes = 0
+        
+        return self.stride
+
+class MotionGate:
+    """Sahne değişmediyse çıkarımı atlatan ucuz değişim dedektörü"""
+    
+    def __init__(self, downscale_width=160, pixel_threshold=25, min_changed_ratio=0.002,
+                 max_stale_frames=30):
+        self.downscale_width = downscale_width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_ratio = min_changed_ratio
+        self.max_stale_frames = max_stale_frames
+        
+        self.reference = None
+        self.last_analysis = None
+        self.stale_frames = 0
+        self.inferred_frames = 0
+        self.skipped_frames = 0
+    
+    def _thumbnail(self, frame):
+        height, width = frame.shape[:2]
+        scale = self.downscale_width / float(width)
+        small = cv2.resize(frame, (self.downscale_width, max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+    
+    def needs_inference(self, frame):
+        """Çıkarım gerekiyorsa True döner ve referans frame'i günceller"""
+        thumbnail = self._thumbnail(frame)
+        
+        changed = (
+            self.reference is None or
+            self.last_analysis is None or
+            self.reference.shape != thumbnail.shape or
+            self.stale_frames >= self.max_stale_frames
+        )
+        if not changed:
+            diff = cv2.absdiff(thumbnail, self.reference)
+            changed_ratio = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+            changed = changed_ratio >= self.min_changed_ratio
+        
+        if changed:
+            self.reference = thumbnail
+            self.stale_frames = 0
+            self.inferred_frames += 1
+        else:
+            self.stale_frames += 1
+            self.skipped_frames += 1
+        return changed
+
+class DetectionCache:
+    """
+    Kamera + küçük resim anahtarlı LRU tespit önbelleği
+    
+    Küçük resimde kaybolan değişiklikler aynı frame sayılır, yani sonuçlar
+    önbelleksiz çalışmayla birebir aynı olmayabilir. tolerance=0 tam eşleşmedir.
+    """
+    
+    def __init__(self, max_size=64, tolerance=0, thumbnail_size=(64, 36)):
+        self.max_size = max_size
+        self.tolerance = tolerance
+        self.thumbnail_size = thumbnail_size
+        self.entries = collections.OrderedDict()  # anahtar -> (küçük resim, tespitler)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def _thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+    
+    def get(self, frame, context=None):
+        """
+        (tespitler, anahtar) döner; kayıt yoksa tespitler None olur ve
+        anahtar sonucu put() ile eklemek için kullanılır
+        """
+        thumbnail = self._thumbnail(frame)
+        key = (frame.shape, context, thumbnail.tobytes())
+        
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None and self.tolerance > 0:
+                # En yeni kayıtlardan başlayarak benzer küçük resim ara
+                for candidate_key, candidate in reversed(self.entries.items()):
+                    if candidate_key[:2] == key[:2] and \
+                            int(cv2.absdiff(candidate[0], thumbnail).max()) <= self.tolerance:
+                        key, entry = candidate_key, candidate
+                        break
+            
+            if entry is None:
+                self.misses += 1
+                return None, (key, thumbnail)
+            
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[1], None
+    
+    def put(self, cache_key, detections):
+        key, thumbnail = cache_key
+        with self._lock:
+            self.entries[key] = (thumbnail, detections)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+    
+    def clear(self):
+        """Kayıtları ve sayaçları sıfırla (her çalıştırma başında)"""
+        with self._lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+class PersonTracker:
+    """Hafif IoU tabanlı kişi takipçisi (takip başına oylanmış ihlal durumu)"""
+    
+    VIOLATION_ORDER = ('no_helmet', 'no_vest', 'no_goggles')
+    
+    def __init__(self, iou_threshold=0.3, max_missed=15, min_hits=3, vote_window=7,
+                 recheck_interval=15, velocity_smoothing=0.5):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.min_hits = min_hits
+        self.vote_window = vote_window
+        self.recheck_interval = recheck_interval
+        self.velocity_smoothing = velocity_smoothing
+        
+        self.tracks = {}
+        self.next_id = 1
+        self.frame_index = 0
+        
+        # Kişi bazlı sayaçlar (kişi-frame değil)
+        self.confirmed_people = 0
+        self.people_with_helmet = set()
+        self.people_with_violation = set()
+    
+    @staticmethod
+    def _iou_matrix(boxes_a, boxes_b):
+        """(A, 4) x (B, 4) IoU matrisi"""
+        if len(boxes_a) == 0 or len(boxes_b) == 0:
+            return np.zeros((len(boxes_a), len(boxes_b)))
+        a = boxes_a[:, None, :]
+        b = boxes_b[None, :, :]
+        inter_w = np.maximum(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0)
+        inter_h = np.maximum(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0)
+        intersection = inter_w * inter_h
+        area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+        area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+        return intersection / np.maximum(area_a + area_b - intersection, 1e-6)
+    
+    def update(self, person_boxes):
+        """Kişi kutularını (P, 4) takiplerle eşle, her kutu için takip numarası döner"""
+        self.frame_index += 1
+        person_boxes = np.asarray(person_boxes, dtype=np.float64).reshape(-1, 4)
+        
+        track_ids = list(self.tracks)
+        predicted = np.array([self.tracks[t]['box'] + self.tracks[t]['velocity'] for t in track_ids])
+        iou = self._iou_matrix(predicted.reshape(-1, 4), person_boxes)
+        
+        # Açgözlü eşleme: en yüksek IoU önce
+        assignments = [None] * len(person_boxes)
+        matched_tracks = set()
+        candidates = np.argwhere(iou >= self.iou_threshold)
+        order = np.argsort(-iou[candidates[:, 0], candidates[:, 1]], kind='stable') if len(candidates) else []
+        for k in order:
+            t, p = candidates[k]
+            if t in matched_tracks or assignments[p] is not None:
+                continue
+            matched_tracks.add(t)
+            assignments[p] = track_ids[t]
+        
+        for p, track_id in enumerate(assignments):
+            box = person_boxes[p]
+            if track_id is None:
+                track_id = self.next_id
+                self.next_id += 1
+                self.tracks[track_id] = {
+                    'box': box,
+                    'velocity': np.zeros(4),
+                    'hits': 0,
+                    'missed': 0,
+                    'votes': collections.deque(maxlen=self.vote_window),
+                    'state': frozenset(),
+                    'helmet': None,
+                    'last_evaluated': None
+                }
+                assignments[p] = track_id
+            else:
+                track = self.tracks[track_id]
+                track['velocity'] += self.velocity_smoothing * ((box - track['box']) - track['velocity'])
+                track['box'] = box
+                track['missed'] = 0
+            
+            track = self.tracks[track_id]
+            track['hits'] += 1
+            if track['hits'] == self.min_hits:
+                self.confirmed_people += 1
+        
+        # Eşleşmeyen takipler tahmini konumda bekler, süre dolunca silinir
+        for t, track_id in enumerate(track_ids):
+            if t in matched_tracks:
+                continue
+            track = self.tracks[track_id]
+            track['missed'] += 1
+            track['box'] = track['box'] + track['velocity']
+            if track['missed'] > self.max_missed:
+                del self.tracks[track_id]
+        
+        return assignments
+    
+    def is_settled(self, track_id):
+        """Takibin durumu kesinleşti mi? (tam ve oybirliğiyle dolu oy penceresi)"""
+        track = self.tracks[track_id]
+        votes = track['votes']
+        return (
+            len(votes) == self.vote_window and
+            len(set(votes)) == 1 and
+            track['last_evaluated'] is not None and
+            self.frame_index - track['last_evaluated'] < self.recheck_interval
+        )
+    
+    def record(self, track_id, violation_types, helmet=None):
+        """Bir değerlendirme sonucunu oyla ve takip durumunu güncelle"""
+        track = self.tracks[track_id]
+        track['votes'].append(frozenset(violation_types))
+        track['last_evaluated'] = self.frame_index
+        if helmet is not None:
+            track['helmet'] = helmet
+        
+        # Çoğunluk oyu
+        counts = collections.Counter(v for vote in track['votes'] for v in vote)
+        track['state'] = frozenset(v for v, count in counts.items() if count * 2 > len(track['votes']))
+        
+        if track['hits'] >= self.min_hits:
+            if 'no_helmet' not in track['state']:
+                self.people_with_helmet.add(track_id)
+            if track['state']:
+                self.people_with_violation.add(track_id)
+    
+    def state(self, track_id):
+        """Oylanmış ihlal türleri (sıralı liste)"""
+        state = self.tracks[track_id]['state']
+        return [v for v in self.VIOLATION_ORDER if v in state] + sorted(state - set(self.VIOLATION_ORDER))
+    
+    def counts(self):
+        """Benzersiz kişi sayaçları (süreçler arası gönderim için kümeler yerine sayılar)"""
+        return {
+            'confirmed_people': self.confirmed_people,
+            'people_with_helmet': len(self.people_with_helmet),
+            'people_with_violation': len(self.people_with_violation)
+        }
+
+class ViolationDebouncer:
+    """
+    Kişi + ihlal türü bazında ihlal durum makinesi
+    (ihlal başına bir 'start' ve bir 'end' olayı)
+    """
+    
+    def __init__(self, min_duration=2.0, resolve_after=2.0, cooldown=10.0):
+        self.min_duration = min_duration
+        self.resolve_after = resolve_after
+        self.cooldown = cooldown
+        self.entries = {}
+    
+    def update(self, observations, now):
+        """
+        observations: {(kişi_anahtarı, ihlal_türü): güven}
+        now: saniye cinsinden zaman (video için video zamanı)
+        Dönüş: 'start' / 'end' olay listesi
+        """
+        events = []
+        
+        for key, confidence in observations.items():
+            entry = self.entries.get(key)
+            if entry is not None and entry['state'] == 'resolved':
+                if now - entry['resolved_at'] < self.cooldown:
+                    continue  # Soğuma süresi
+                entry = None
+            if entry is None:
+                entry = {
+                    'state': 'pending',
+                    'since': now,
+                    'last_seen': now,
+                    'confidence': confidence,
+                    'row_id': None
+                }
+                self.entries[key] = entry
+            
+            entry['last_seen'] = now
+            entry['confidence'] = max(entry['confidence'], confidence)
+            
+            if entry['state'] == 'pending' and now - entry['since'] >= self.min_duration:
+                entry['state'] = 'active'
+                events.append({'event': 'start', 'key': key, 'entry': entry})
+        
+        for key, entry in list(self.entries.items()):
+            if key in observations:
+                continue
+            if entry['state'] == 'pending' and now - entry['last_seen'] >= self.resolve_after:
+                del self.entries[key]  # Kısa süreli, kayda değmez
+            elif entry['state'] == 'active' and now - entry['last_seen'] >= self.resolve_after:
+                entry['state'] = 'resolved'
+                entry['resolved_at'] = now
+                events.append({'event': 'end', 'key': key, 'entry': entry})
+            elif entry['state'] == 'resolved' and now - entry['resolved_at'] >= self.cooldown:
+                del self.entries[key]
+        
+        return events
+    
+    def flush(self, now):
+        """Çalışma sonunda aktif ihlalleri kapat"""
+        events = []
+        for key, entry in self.entries.items():
+            if entry['state'] == 'active':
+                entry['state'] = 'resolved'
+                entry['resolved_at'] = now
+                events.append({'event': 'end', 'key': key, 'entry': entry})
+        return events
+
+class EvidenceStore:
+    """
+    İhlal kanıtı kaydedici (tam frame + kişi kesiti, arka planda)
+    
+    Dosyalar yazılınca on_saved(image_path, row_ids), kota aşılıp
+    silinince on_evict(image_path) çağrılır.
+    """
+    
+    def __init__(self, directory="evidence", max_bytes=500 * 1024 * 1024, workers=2,
+                 jpeg_quality=85, max_pending=16, crop_margin=0.15, on_saved=None, on_evict=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.jpeg_quality = jpeg_quality
+        self.max_pending = max_pending
+        self.crop_margin = crop_margin
+        self.on_saved = on_saved
+        self.on_evict = on_evict
+        self.total_bytes = 0
+        self.saved = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.failed = 0
+        self._entries = collections.OrderedDict()  # image_path -> (dosyalar, bayt), eskiden yeniye
+        self._pending = 0
+        self._counter = 0
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="evidence")
+        self._scan()
+    
+    @staticmethod
+    def crop_path(image_path):
+        return os.path.splitext(image_path)[0] + "_crop.jpg"
+    
+    def _scan(self):
+        """Önceki çalışmalardan kalan kanıtları kotaya dahil et"""
+        groups = {}
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".jpg"):
+                    continue
+                path = os.path.join(root, name)
+                image_path = path[:-len("_crop.jpg")] + ".jpg" if name.endswith("_crop.jpg") else path
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                mtime, paths, size = groups.get(image_path, (0, [], 0))
+                groups[image_path] = (max(mtime, stat.st_mtime), paths + [path], size + stat.st_size)
+        
+        for image_path, (_, paths, size) in sorted(groups.items(), key=lambda item: item[1][0]):
+            self._entries[image_path] = (paths, size)
+            self.total_bytes += size
+        self._enforce_quota()
+    
+    def submit(self, frame, bbox, camera_name, label, row_ids=()):
+        """
+        Kanıtı kuyruğa al
+        
+        row_ids: dosyalar yazılınca on_saved'e iletilen ihlal kayıtları
+        Dönüş: kanıtın yazılacağı image_path (kuyruk doluysa None)
+        """
+        with self._condition:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return None
+            self._pending += 1
+            self._counter += 1
+            counter = self._counter
+        
+        camera_dir = _safe_path_component(camera_name)
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        image_path = os.path.join(self.directory, camera_dir, f"{timestamp}_{counter}_{label}.jpg")
+        
+        # Çizimler frame üzerinde yerinde yapıldığından ham görüntünün kopyası alınır
+        self._executor.submit(self._write, frame.copy(), bbox, image_path, tuple(row_ids))
+        return image_path
+    
+    def _write(self, frame, bbox, image_path, row_ids=()):
+        """Arka plan: kesit + işaretli tam frame'i JPEG olarak yaz"""
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        written = []
+        try:
+            os.makedirs(os.path.dirname(image_path), exist_ok=True)
+            images = []
+            if bbox is not None:
+                height, width = frame.shape[:2]
+                x1, y1, x2, y2 = (int(v) for v in bbox)
+                margin_x = int((x2 - x1) * self.crop_margin)
+                margin_y = int((y2 - y1) * self.crop_margin)
+                crop = frame[max(0, y1 - margin_y):min(height, y2 + margin_y),
+                             max(0, x1 - margin_x):min(width, x2 + margin_x)]
+                if crop.size:
+                    images.append((self.crop_path(image_path), crop.copy()))
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
+            images.insert(0, (image_path, frame))
+            
+            size = 0
+            for path, image in images:
+                ok, encoded = cv2.imencode(".jpg", image, params)
+                if not ok:
+                    raise RuntimeError(f"JPEG kodlanamadı: {path}")
+                with open(path, "wb") as f:
+                    f.write(encoded)
+                written.append(path)
+                size += len(encoded)
+            
+            # Kayıtlara yol yalnızca dosyalar diskteyken eklenir; kotadan silinmesi
+            # ancak kanıt listeye girdikten sonra, yani bu güncellemeden sonra olabilir
+            if self.on_saved is not None:
+                self.on_saved(image_path, row_ids)
+            
+            with self._condition:
+                self._entries[image_path] = (written, size)
+                self.total_bytes += size
+                self.saved += 1
+            self._enforce_quota()
+        
+        except Exception as e:
+            print(f" Kanıt kayıt hatası: {e}")
+            for path in written:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            with self._condition:
+                self.failed += 1
+        
+        finally:
+            with self._condition:
+                self._pending -= 1
+                self._condition.notify_all()
+    
+    def _enforce_quota(self):
+        """Kota aşıldıysa en eski kanıtları sil"""
+        evicted = []
+        with self._condition:
+            while self.total_bytes > self.max_bytes and self._entries:
+                image_path, (paths, size) = self._entries.popitem(last=False)
+                self.total_bytes -= size
+                self.evicted += 1
+                evicted.append((image_path, paths))
+        
+        for image_path, paths in evicted:
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            if self.on_evict is not None:
+                self.on_evict(image_path)
+    
+    def wait(self, timeout=None):
+        """Bekleyen tüm kanıtlar yazılana kadar bekle"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending == 0, timeout)
+    
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+class ClipRecorder:
+    """
+    Olay öncesi / sonrası klip kaydedici (kamera başına bir tane)
+    
+    Bellekte JPEG halkası tutar; MP4 yazılınca on_saved(klip_yolu, row_ids) çağrılır.
+    """
+    
+    def __init__(self, camera_name, directory="clips", pre_seconds=5.0, post_seconds=5.0,
+                 clip_fps=10, max_width=960, jpeg_quality=70, max_bytes=32 * 1024 * 1024,
+                 max_clip_seconds=60.0, on_saved=None):
+        self.camera_name = camera_name
+        self.directory = directory
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.clip_fps = clip_fps
+        self.max_width = max_width
+        self.jpeg_quality = jpeg_quality
+        self.max_bytes = max_bytes
+        self.max_clip_seconds = max_clip_seconds
+        self.on_saved = on_saved
+        self.ring_bytes = 0
+        self.clips_written = 0
+        self.failed = 0
+        self._ring = collections.deque()  # (zaman, jpeg baytları)
+        self._active = None
+        self._next_due = None
+        self._counter = 0
+        self._lock = threading.Lock()
+        self._queue = LatestFrameQueue(maxsize=4)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="clip-writer")
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._encode_loop, name=f"{camera_name}-clip",
+                                        daemon=True)
+        self._thread.start()
+    
+    @property
+    def dropped(self):
+        return self._queue.dropped
+    
+    def add(self, frame, timestamp):
+        """Frame'i halkaya ekle (clip_fps'e göre seyreltilir, kodlama arka planda)"""
+        interval = 1.0 / self.clip_fps
+        if self._next_due is not None:
+            if timestamp < self._next_due - 1e-6:
+                return
+            # Kaynak zamanı sıçradıysa (duraklatma vb.) takvimi yeniden başlat
+            if timestamp - self._next_due < interval:
+                self._next_due += interval
+            else:
+                self._next_due = timestamp + interval
+        else:
+            self._next_due = timestamp + interval
+        # Frame tamponu yeniden kullanıldığı ve çizim yerinde yapıldığı için kopya
+        self._queue.put((timestamp, frame.copy()))
+    
+    def trigger(self, timestamp, label="ihlal", row_ids=()):
+        """
+        Klip başlat ya da açık klibi uzat - MP4 yolunu döner
+        
+        row_ids: klip yazılınca on_saved'e iletilen ihlal kayıtları
+        """
+        with self._lock:
+            active = self._active
+            if active is not None:
+                active['end'] = min(max(active['end'], timestamp + self.post_seconds),
+                                    active['start'] + self.max_clip_seconds)
+                active['row_ids'].extend(row_ids)
+                return active['path']
+            
+            self._counter += 1
+            camera_dir = _safe_path_component(self.camera_name)
+            name = datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+            path = os.path.join(self.directory, camera_dir, f"{name}_{self._counter}_{label}.mp4")
+            start = timestamp - self.pre_seconds
+            self._active = {
+                'path': path,
+                'start': start,
+                'end': timestamp + self.post_seconds,
+                'frames': [item for item in self._ring if item[0] >= start],
+                'row_ids': list(row_ids)
+            }
+            return path
+    
+    def _encode_loop(self):
+        """Arka plan: frame'leri küçült, JPEG kodla, halkaya / açık klibe ekle"""
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        while True:
+            item = self._queue.get(timeout=0.2)
+            if item is None:
+                if self._closed.is_set():
+                    break
+                continue
+            timestamp, frame = item
+            
+            height, width = frame.shape[:2]
+            if width > self.max_width:
+                scale = self.max_width / width
+                frame = cv2.resize(frame, (self.max_width, int(height * scale)),
+                                   interpolation=cv2.INTER_AREA)
+            ok, encoded = cv2.imencode(".jpg", frame, params)
+            if not ok:
+                continue
+            entry = (timestamp, encoded)
+            
+            with self._lock:
+                self._ring.append(entry)
+                self.ring_bytes += len(encoded)
+                while self._ring and (self._ring[0][0] < timestamp - self.pre_seconds
+                                      or self.ring_bytes > self.max_bytes):
+                    self.ring_bytes -= len(self._ring.popleft()[1])
+                
+                active = self._active
+                if active is not None:
+                    if timestamp <= active['end']:
+                        active['frames'].append(entry)
+                    else:
+                        self._finish_clip()
+    
+    def _finish_clip(self):
+        """Açık klibi yazıcıya ver (kilit altında çağrılır)"""
+        active, self._active = self._active, None
+        if active['frames']:
+            self._writer.submit(self._write_clip, active['path'], active['frames'],
+                                active['row_ids'])
+    
+    def _write_clip(self, path, frames, row_ids):
+        """Arka plan: JPEG frame'leri çözüp MP4 olarak yaz"""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            first = cv2.imdecode(frames[0][1], cv2.IMREAD_COLOR)
+            height, width = first.shape[:2]
+            
+            # Kayıt hızı frame zamanlarından ölçülür
+            span = frames[-1][0] - frames[0][0]
+            fps = (len(frames) - 1) / span if span > 0 else self.clip_fps
+            
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+            if not writer.isOpened():
+                raise RuntimeError(f"Video yazıcı açılamadı: {path}")
+            try:
+                for _, encoded in frames:
+                    frame = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+                    if frame.shape[:2] != (height, width):
+                        frame = cv2.resize(frame, (width, height))
+                    writer.write(frame)
+            finally:
+                writer.release()
+            self.clips_written += 1
+        
+        except Exception as e:
+            print(f" Klip kayıt hatası: {e}")
+            self.failed += 1
+            return
+        
+        # Yol yalnızca yazılmış klip için kayda bağlanır
+        if self.on_saved is not None:
+            self.on_saved(path, row_ids)
+    
+    def close(self):
+        """Kuyruğu boşalt, açık klibi eldeki frame'lerle bitir ve yazılmasını bekle"""
+        self._closed.set()
+        self._thread.join()
+        with self._lock:
+            if self._active is not None:
+                self._finish_clip()
+        self._writer.shutdown(wait=True)
+
+class BatchedViolationWriter:
+    """safety_violations için arka planda toplu kayıt yazıcı"""
+    
+    def __init__(self, database_path="safety_logs.db", flush_interval=1.0, max_batch=500):
+        self.database_path = database_path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.counts = collections.Counter()
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self._rows = []
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="violation-writer", daemon=True)
+        self._thread.start()
+    
+    def add(self, violation_type, location, confidence, worker_id=None):
+        """Satırı sıraya ekle (veritabanına beklemeden döner)"""
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._condition:
+            self._rows.append((timestamp, violation_type, location, confidence, worker_id))
+            if len(self._rows) >= self.max_batch:
+                self._condition.notify()
+    
+    def _run(self):
+        """Arka plan: süre ya da boyut sınırına göre toplu yaz"""
+        conn = sqlite3.connect(self.database_path)
+        try:
+            while True:
+                with self._condition:
+                    if not self._closed and len(self._rows) < self.max_batch:
+                        self._condition.wait(self.flush_interval)
+                    rows, self._rows = self._rows, []
+                    closed = self._closed
+                if rows:
+                    self._write(conn, rows)
+                if closed:
+                    break
+        finally:
+            conn.close()
+    
+    def _write(self, conn, rows):
+        try:
+            with conn:
+                conn.executemany('''
+                    INSERT INTO safety_violations 
+                    (timestamp, violation_type, location, confidence, worker_id)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', rows)
+            self.written += len(rows)
+            self.batches += 1
+            self.counts.update(row[1] for row in rows)
+        except Exception as e:
+            self.failed += len(rows)
+            print(f" Toplu kayıt hatası: {e}")
+    
+    def close(self):
+        """Kalan satırları yaz ve thread'i durdur"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+class BackgroundVideoWriter:
+    """
+    Arka plan thread'inde video kaydı
+    (kayıt hızı ölçülür, atılan frame'lerin yeri tekrarla doldurulur)
+    """
+    
+    def __init__(self, path, render=None, fourcc='mp4v', queue_size=32, warmup_frames=15,
+                 default_fps=20.0):
+        self.path = path
+        self.render = render
+        self.fourcc = fourcc
+        self.warmup_frames = warmup_frames
+        self.default_fps = default_fps
+        self.fps = None
+        self.frame_size = None
+        self.frames_written = 0
+        self._arrivals = 0
+        self._queue = LatestFrameQueue(maxsize=queue_size)
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="video-writer", daemon=True)
+        self._thread.start()
+    
+    @property
+    def dropped(self):
+        return self._queue.dropped
+    
+    def write(self, item):
+        """Öğeyi kayıt kuyruğuna ekle (kodlamayı beklemez)"""
+        self._arrivals += 1
+        self._queue.put((time.monotonic(), self._arrivals, item))
+    
+    def _run(self):
+        pending = []  # Hız ölçülene kadar bekleyen frame'ler
+        writer = None
+        last_index = None
+        try:
+            while True:
+                entry = self._queue.get(timeout=0.2)
+                if entry is None:
+                    if self._closed.is_set():
+                        break
+                    continue
+                timestamp, index, item = entry
+                frame = self.render(item) if self.render is not None else item
+                
+                if writer is None:
+                    pending.append((timestamp, index, frame))
+                    if len(pending) >= self.warmup_frames:
+                        writer = self._open(pending)
+                        last_index = pending[-1][1]
+                        pending = []
+                    continue
+                self._write_frame(writer, frame, index - last_index)
+                last_index = index
+            
+            if writer is None and pending:
+                writer = self._open(pending)
+        
+        except Exception as e:
+            print(f" Video kayıt hatası: {e}")
+        
+        finally:
+            if writer is not None:
+                writer.release()
+    
+    def _open(self, pending):
+        """Ölçülen hızla yazıcıyı aç ve bekleyen frame'leri yaz"""
+        # Hız geliş sırasından ölçülür: aradaki atılan frame'ler de sayılır
+        span = pending[-1][0] - pending[0][0]
+        arrivals = pending[-1][1] - pending[0][1]
+        self.fps = arrivals / span if arrivals > 0 and span > 0 else self.default_fps
+        height, width = pending[0][2].shape[:2]
+        self.frame_size = (width, height)
+        
+        writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*self.fourcc), self.fps,
+                                 self.frame_size)
+        if not writer.isOpened():
+            raise RuntimeError(f"Video yazıcı açılamadı: {self.path}")
+        print(f" Video kaydedici başlatıldı: {width}x{height}, {self.fps:.1f} FPS "
+              f"(ölçülen, atlanan: {arrivals + 1 - len(pending)})")
+        
+        previous = pending[0][1] - 1
+        for _, index, frame in pending:
+            self._write_frame(writer, frame, index - previous)
+            previous = index
+        return writer
+    
+    def _write_frame(self, writer, frame, repeat=1):
+        """Frame'i yaz; repeat > 1 ise atılan frame'lerin yerini doldur"""
+        if (frame.shape[1], frame.shape[0]) != self.frame_size:
+            frame = cv2.resize(frame, self.frame_size)
+        for _ in range(repeat):
+            writer.write(frame)
+        self.frames_written += repeat
+    
+    def close(self):
+        """Kuyruktaki frame'leri yaz ve dosyayı kapat"""
+        self._closed.set()
+        self._thread.join()
+        return self.frames_written
+
+class DisplaySink:
+    """OpenCV pencere çıktısı ve klavye kontrolü ('q', 's', 'p')"""
+    
+    needs_annotation = True
+    
+    def __init__(self, detector, camera_name, is_video_file, frame_delay=1):
+        self.detector = detector
+        self.camera_name = camera_name
+        self.window_name = f" İş Güvenliği - {camera_name}"
+        self.is_video_file = is_video_file
+        self.frame_delay = frame_delay
+        self.last_frame = None
+    
+    def write(self, frame, frame_count, analysis):
+        """Frame'i göster ve klavyeyi kontrol et"""
+        cv2.imshow(self.window_name, frame)
+        # Frame tamponu write() dönünce halkaya geri verilir, ekran görüntüsü için kopya
+        self.last_frame = frame.copy()
+        self.poll(self.frame_delay)
+    
+    def poll(self, delay=1):
+        """Klavye kontrolü"""
+        key = cv2.waitKey(delay) & 0xFF
+        if key == ord('q'):
+            print(" Çıkılıyor...")
+            self.detector.stop()
+        elif key == ord('s') and self.last_frame is not None:
+            # Ekran görüntüsü kaydet
+            os.makedirs("screenshots", exist_ok=True)
+            timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+            screenshot_path = f"screenshots/{self.camera_name}_{timestamp}.jpg"
+            cv2.imwrite(screenshot_path, self.last_frame)
+            print(f" Kaydedildi: {screenshot_path}")
+        elif key == ord('p'):
+            # Duraklat/Devam et (sadece video için)
+            if self.is_video_file:
+                if self.detector.is_paused():
+                    self.detector.resume()
+                else:
+                    self.detector.pause()
+    
+    def close(self):
+        cv2.destroyAllWindows()
+
+class SnapshotSink:
+    """İstek üzerine çizilmiş frame'i kaydeden çıktı (bkz. request_snapshot)"""
+    
+    def __init__(self, camera_name, directory="screenshots"):
+        self.camera_name = camera_name
+        self.directory = directory
+        self._requested = threading.Event()
+    
+    @property
+    def needs_annotation(self):
+        return self._requested.is_set()
+    
+    def request(self):
+        self._requested.set()
+    
+    def write(self, frame, frame_count, analysis):
+        if not self._requested.is_set():
+            return
+        self._requested.clear()
+        os.makedirs(self.directory, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        snapshot_path = os.path.join(self.directory, f"{self.camera_name}_{timestamp}.jpg")
+        cv2.imwrite(snapshot_path, frame)
+        print(f" Kaydedildi: {snapshot_path}")
+    
+    def close(self):
+        pass
+
+class StreamChannel:
+    """Tek kameranın canlı yayın kanalı (JPEG izleyici thread'lerinde, bir kez kodlanır)"""
+    
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.encode_lock = threading.Lock()
+        self.frame_buffers = None  # Frame bir FrameBufferRing'den geliyorsa
+        self.frame = None
+        self.seq = 0
+        self.encoded = {}
+        self.viewers = 0
+        self.encode_count = 0
+    
+    def publish(self, frame):
+        """Yeni frame'i yayınla (beklemeden döner)"""
+        with self.condition:
+            # Yayındaki frame'in tamponu kanal bırakana kadar ödünçte kalır
+            if self.frame_buffers is not None:
+                self.frame_buffers.retain(frame)
+                if self.frame is not None:
+                    self.frame_buffers.release(self.frame)
+            self.frame = frame
+            self.seq += 1
+            self.encoded = {}
+            self.condition.notify_all()
+    
+    def wait_for_frame(self, last_seq, timeout=5.0):
+        """last_seq'ten yeni bir frame gelene kadar bekle, yeni seq'i döner"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.seq != last_seq and self.frame is not None, timeout)
+            return self.seq
+    
+    def get_jpeg(self, quality):
+        """Son frame'in JPEG hâli - (seq, bytes)"""
+        with self.condition:
+            seq, frame, encoded = self.seq, self.frame, self.encoded
+            frame_buffers = self.frame_buffers
+            if frame_buffers is not None:
+                frame_buffers.retain(frame)
+        
+        try:
+            data = encoded.get(quality)
+            if data is None:
+                with self.encode_lock:
+                    data = encoded.get(quality)
+                    if data is None:
+                        ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+                        data = buffer.tobytes() if ok else b''
+                        encoded[quality] = data
+                        self.encode_count += 1
+        finally:
+            if frame_buffers is not None:
+                frame_buffers.release(frame)
+        return seq, data
+
+class MJPEGStreamSink:
+    """process_camera_feed çıktısı: çizilmiş frame'leri yayın kanalına verir"""
+    
+    def __init__(self, channel):
+        self.channel = channel
+    
+    @property
+    def needs_annotation(self):
+        # İzleyici yoksa çizim de kodlama da yapılmaz
+        return self.channel.viewers > 0
+    
+    def write(self, frame, frame_count, analysis):
+        if self.channel.viewers > 0 and analysis is not None:
+            self.channel.publish(frame)
+    
+    def close(self):
+        pass
+
+class MJPEGStreamServer:
+    """
+    Kameraları tarayıcıdan izlemek için MJPEG/HTTP sunucusu
+    
+    http://<sunucu>:<port>/camera/<ad>?fps=10&quality=80
+    Kimlik doğrulama yok: varsayılan olarak yalnızca 127.0.0.1'den erişilir.
+    """
+    
+    QUALITY_LEVELS = (85, 70, 55, 40)
+    MAX_FPS = 30
+    
+    def __init__(self, host="127.0.0.1", port=8080, default_fps=10):
+        self.host = host
+        self.port = port
+        self.default_fps = default_fps
+        self.channels = {}
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+    
+    def channel(self, camera_name):
+        with self._lock:
+            if camera_name not in self.channels:
+                self.channels[camera_name] = StreamChannel()
+            return self.channels[camera_name]
+    
+    def sink(self, camera_name, frame_buffers=None):
+        """Kamera için process_camera_feed çıktısı oluştur"""
+        channel = self.channel(camera_name)
+        with channel.condition:
+            channel.frame_buffers = frame_buffers
+        return MJPEGStreamSink(channel)
+    
+    def start(self):
+        """Sunucuyu arka plan thread'inde başlat"""
+        if self._httpd is not None:
+            return self
+        
+        server = self
+        
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+            
+            def do_GET(self):
+                url = urllib.parse.urlparse(self.path)
+                if url.path in ('/', '/index.html'):
+                    server._serve_index(self)
+                elif url.path.startswith('/camera/'):
+                    camera_name = urllib.parse.unquote(url.path[len('/camera/'):])
+                    params = urllib.parse.parse_qs(url.query)
+                    server._serve_stream(self, camera_name, params)
+                else:
+                    self.send_error(404)
+        
+        self._httpd = http.server.ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        name="mjpeg-server", daemon=True)
+        self._thread.start()
+        print(f" Canlı yayın: http://{self.host}:{self.port}/")
+        if self.host not in ('127.0.0.1', 'localhost', '::1'):
+            print(" Uyarı: yayında kimlik doğrulama yok, ağdaki herkes kameraları izleyebilir")
+        return self
+    
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+    
+    def _serve_index(self, handler):
+        links = "".join(
+            f'<h3>{html.escape(name)}</h3>'
+            f'<img src="/camera/{urllib.parse.quote(name, safe="")}" width="640"><br>'
+            for name in sorted(self.channels)
+        )
+        body = f"<html><head><meta charset='utf-8'><title>İş Güvenliği</title></head><body>{links}</body></html>"
+        data = body.encode('utf-8')
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/html; charset=utf-8')
+        handler.send_header('Content-Length', str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+    
+    def _serve_stream(self, handler, camera_name, params):
+        if camera_name not in self.channels:
+            handler.send_error(404, explain="Kamera bulunamadı")
+            return
+        channel = self.channels[camera_name]
+        
+        # Sorgu parametreleri: geçersizse 400, geçerliyse izin verilen aralığa çek
+        try:
+            max_fps = float(params.get('fps', [self.default_fps])[0])
+            requested_quality = int(params.get('quality', [self.QUALITY_LEVELS[0]])[0])
+            if math.isnan(max_fps):
+                raise ValueError(max_fps)
+        except ValueError:
+            handler.send_error(400, explain="fps ve quality sayı olmalıdır")
+            return
+        max_fps = min(max(max_fps, 1.0), float(self.MAX_FPS))
+        requested_quality = min(max(requested_quality, min(self.QUALITY_LEVELS)), max(self.QUALITY_LEVELS))
+        # İstenen kaliteye en yakın seviyeden başla
+        quality_index = min(range(len(self.QUALITY_LEVELS)),
+                            key=lambda i: abs(self.QUALITY_LEVELS[i] - requested_quality))
+        best_quality_index = quality_index
+        fps = max_fps
+        fast_sends = 0
+        
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
+        handler.send_header('Cache-Control', 'no-cache')
+        handler.end_headers()
+        
+        with channel.condition:
+            channel.viewers += 1
+        last_seq = 0
+        try:
+            while self._httpd is not None:
+                seq = channel.wait_for_frame(last_seq)
+                if seq == last_seq:
+                    continue
+                
+                started = time.perf_counter()
+                last_seq, data = channel.get_jpeg(self.QUALITY_LEVELS[quality_index])
+                handler.wfile.write(b'--frame\r\nContent-Type: image/jpeg\r\n')
+                handler.wfile.write(f'Content-Length: {len(data)}\r\n\r\n'.encode('ascii'))
+                handler.wfile.write(data)
+                handler.wfile.write(b'\r\n')
+                handler.wfile.flush()
+                send_time = time.perf_counter() - started
+                
+                # İzleyiciye göre uyarla
+                interval = 1.0 / fps
+                if send_time > interval * 0.8:
+                    fast_sends = 0
+                    if quality_index < len(self.QUALITY_LEVELS) - 1:
+                        quality_index += 1
+                    else:
+                        fps = max(1.0, fps * 0.7)
+                elif send_time < interval * 0.3:
+                    fast_sends += 1
+                    if fast_sends >= 20:
+                        fast_sends = 0
+                        if fps < max_fps:
+                            fps = min(max_fps, fps * 1.3)
+                        elif quality_index > best_quality_index:
+                            quality_index -= 1
+                
+                remaining = 1.0 / fps - (time.perf_counter() - started)
+                if remaining > 0:
+                    time.sleep(remaining)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with channel.condition:
+                channel.viewers -= 1
+
+@dataclass
+class FeedOptions:
+    """process_camera_feed seçenekleri"""
+    
+    # Akış ve zamanlama
+    pipelined: bool = False  # Yakalama, tespit ve gösterim ayrı aşamalarda (bkz. _run_pipeline)
+    target_fps: Optional[float] = None  # Çıkarım adımı hedef hıza / gecikme bütçesine göre
+    latency_budget: Optional[float] = None  # ayarlanır (bkz. AdaptiveFrameScheduler)
+    motion_gating: bool = False  # Sahne değişmediyse önceki tespitler kullanılır (bkz. MotionGate)
+    max_stale_frames: int = 30
+    analysis_fps: Optional[float] = None  # Videoda saniyede çözülen frame (bkz. _sampled_frames)
+    
+    # Tespit
+    zone_config: Optional[str] = None  # Bölge / karo ayarları dosyası (bkz. load_zone_config)
+    detection_cache_size: Optional[int] = None  # Tekrarlanan frame önbelleği (bkz. DetectionCache)
+    cache_tolerance: int = 0  # Küçük resim hücresi başına izin verilen gri ton farkı
+    frame_buffer_count: Optional[int] = None  # None = otomatik, 0 = kapalı (bkz. FrameBufferRing)
+    
+    # İhlal kaydı (log_violations kişi takibini de açar; kanıt ve klip yalnızca onunla çalışır)
+    track_persons: bool = False  # Benzersiz kişi sayımı ve oylanmış uyum (bkz. PersonTracker)
+    log_violations: bool = False  # Yalnızca başlangıç / bitiş kaydı (bkz. ViolationDebouncer)
+    min_violation_duration: float = 2.0
+    violation_cooldown: float = 10.0
+    evidence_dir: Optional[str] = None  # Tam frame + kişi kesiti (bkz. EvidenceStore)
+    evidence_quota_mb: float = 500
+    clip_dir: Optional[str] = None  # İhlal öncesi / sonrası MP4 klip (bkz. ClipRecorder)
+    clip_pre_seconds: float = 5.0
+    clip_post_seconds: float = 5.0
+    clip_fps: int = 10
+    
+    # Çıktılar
+    headless: bool = False  # Pencere / klavye yok; stop(), pause() veya sinyallerle kontrol
+    # write() / close() / needs_annotation olan ek çıktılar; frame'i write() sonrası
+    # tutan çıktı kopyalamalıdır (tamponlar yeniden kullanılır)
+    output_sinks: Optional[list] = None
+    stream_port: Optional[int] = None  # MJPEG yayını (bkz. MJPEGStreamServer)
+    stream_host: str = "127.0.0.1"  # Ağa açmak için ör. "0.0.0.0"
+
+class CameraRunState:
+    """Tek bir kamera çalışmasının yardımcı nesneleri ve istatistikleri"""
+    
+    def __init__(self, camera_name, stats, scheduler, motion_gate=None, tracker=None,
+                 is_video_file=False, fps=0, total_frames=-1, debouncer=None, sample_step=None,
+                 frame_buffers=None, clip_recorder=None):
+        self.camera_name = camera_name
+        self.stats = stats
+        self.scheduler = scheduler
+        self.motion_gate = motion_gate
+        self.tracker = tracker
+        self.is_video_file = is_video_file
+        self.fps = fps
+        self.total_frames = total_frames
+        self.debouncer = debouncer
+        self.sample_step = sample_step  # Video örnekleme adımı (None = tüm frame'ler)
+        self.frame_buffers = frame_buffers
+        self.clip_recorder = clip_recorder
+        self.started_at = time.monotonic()
+    
+    def timestamp(self, frame_count):
+        """Saniye cinsinden çalışma zamanı (video dosyasında video zamanı)"""
+        if self.is_video_file and self.fps > 0:
+            return frame_count / self.fps
+        return time.monotonic() - self.started_at
+
+class HelmetDetectionSystem:
+    """Gelişmiş baret tespit sistemi - Düzeltilmiş"""
+    
+    def __init__(self, model_path=None, database_path="safety_logs.db", backend='pytorch', int8=False,
+                 data_yaml_path=None):
+        """
+        İş güvenliği baret tespit sistemi
+        
+        backend: 'pytorch', 'onnx' veya 'openvino' (CPU için ONNX/OpenVINO önerilir)
+        int8: dışa aktarılan modeli INT8 nicemle (bkz. export_model)
+        data_yaml_path: OpenVINO INT8 kalibrasyonu için veri seti data.yaml dosyası
+        """
+        
+        # Model yükleme (aynı model tüm örnekler arasında paylaşılır)
+        self.backend = backend
+        self.data_yaml_path = data_yaml_path
+        if model_path and os.path.exists(model_path):
+            try:
+                model_entry = MODEL_REGISTRY.get(model_path, backend, int8, data_yaml_path)
+                print(f" Özel model yüklendi: {model_path} ({backend}{' INT8' if int8 else ''})")
+            except Exception as e:
+                print(f" Özel model yüklenemedi ({e}), varsayılan model kullanılıyor...")
+                model_entry = MODEL_REGISTRY.get('yolov8n.pt')
+                self.backend = 'pytorch'
+        else:
+            print("Varsayılan YOLOv8 modeli kullanılıyor...")
+            model_entry = MODEL_REGISTRY.get('yolov8n.pt')
+            self.backend = 'pytorch'
+        self.model = model_entry['model']
+        self._model_lock = model_entry['lock']
+        self._single_frame_model = False  # Model toplu girdiyi desteklemiyorsa True (bkz. _predict_chunk)
+        self.model_path = model_entry['model_path']
+        self.int8 = model_entry['int8']
+        
+        self.database_path = database_path
+        self._db_conn = None
+        self._db_lock = threading.Lock()
+        
+        # Bilgi paneli için önceden ayrılmış tamponlar (bölge boyutuna göre)
+        self._panel_buffers = {}
+        self._snapshot_sink = None
+        self.stream_server = None
+        
+        # Durdurma / duraklatma kontrolü (klavye, API veya sinyal)
+        self._stop_event = threading.Event()
+        self._pause_event = threading.Event()
+        self.setup_database()
+        
+        # Tespit eşikleri
+        self.confidence_threshold = 0.3  # Daha düşük eşik
+        
+        # Sınıf isimleri (modelinize göre güncelleyin)
+        self.helmet_classes = ['helmet', 'hardhat', 'safety helmet', 'safety_helmet', 'hard hat', 'hat']
+        self.person_classes = ['person', 'worker', 'human']
+        self.no_helmet_classes = ['no-helmet', 'no_helmet', 'without_helmet', 'head']
+        # YENİ: Yelek sınıfları
+        self.vest_classes = ['vest', 'safety vest', 'safety_vest', 'hi-vis', 'high-vis', 'reflective vest', 'hi_vis']
+        self.no_vest_classes = ['no-vest', 'no_vest', 'without_vest']
+        # YENİ: Gözlük sınıfları
+        self.goggles_classes = ['goggles', 'safety goggles', 'safety_goggles', 'glasses', 'eye protection', 'eye_protection']
+        self.no_goggles_classes = ['no-goggles', 'no_goggles', 'without_goggles']
+        
+        # Sınıf id -> kategori tablosu (model yüklenirken bir kez çözülür)
+        self.build_class_category_table()
+        
+        # Kamera adı -> CameraZone listesi (bkz. load_zone_config)
+        self.camera_zones = {}
+        # Bölge kesitinin üst payı (bölge yüksekliğine oranla, yaklaşık bir baş boyu)
+        self.zone_crop_padding = 0.15
+        # Kamera adı -> TileLayout (uzak kişiler için karo modu)
+        self.camera_tiling = {}
+        # Tekrarlanan frame'ler için tespit önbelleği (bkz. enable_detection_cache)
+        self.detection_cache = None
+        # İhlal kanıtı kaydedici (bkz. enable_evidence_capture)
+        self.evidence_store = None
+                
+        # Performans takibi
+        self.frame_count = 0
+        self.detection_stats = {
+            'total_persons': 0,
+            'helmeted_persons': 0,
+            'violations': 0
+        }
+    def get_test_results_report(self, days=7):
+        """Test sonuçları raporu"""
+        try:
+            conn = sqlite3.connect(self.database_path)
+            cursor = conn.cursor()
+            
+            # Test kayıtlarını al
+            cursor.execute('''
+                SELECT violation_type, COUNT(*) as count,
+                    AVG(confidence) as avg_confidence,
+                    MIN(timestamp) as first_test,
+                    MAX(timestamp) as last_test
+                FROM safety_violations 
+                WHERE timestamp >= datetime('now', '-{} days')
+                AND (violation_type LIKE 'Test%' OR worker_id = 'test_session')
+                GROUP BY violation_type
+                ORDER BY count DESC
+            '''.format(days))
+            
+            results = cursor.fetchall()
+            conn.close()
+            
+            print(f"🧪 Son {days} Gün Test Sonuçları:")
+            print("=" * 60)
+            
+            if results:
+                for row in results:
+                    test_type, count, avg_conf, first, last = row
+                    print(f" {test_type}")
+                    print(f"   Toplam: {count} tespit")
+                    print(f"   Ortalama Güven: {avg_conf:.2f}")
+                    print(f"    İlk: {first}")
+                    print(f"    Son: {last}")
+                    print("-" * 40)
+            else:
+                print("Test kaydı bulunamadı!")
+                
+            return results
+            
+        except Exception as e:
+            print(f" Test raporu hatası: {e}")
+            return []
+
+    def setup_database(self):
+        """Veritabanı kurulumu"""
+        try:
+            conn = sqlite3.connect(self.database_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS safety_violations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT,
+                    violation_type TEXT,
+                    location TEXT,
+                    confidence REAL,
+                    image_path TEXT,
+                    worker_id TEXT,
+                    status TEXT DEFAULT 'active',
+                    resolved_at TEXT,
+                    notes TEXT,
+                    clip_path TEXT
+                )
+            ''')
+            
+            # Eski veritabanlarına klip sütununu ekle
+            columns = {row[1] for row in cursor.execute('PRAGMA table_info(safety_violations)')}
+            if 'clip_path' not in columns:
+                cursor.execute('ALTER TABLE safety_violations ADD COLUMN clip_path TEXT')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS detection_stats (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT,
+                    location TEXT,
+                    total_persons INTEGER,
+                    helmeted_persons INTEGER,
+                    violations INTEGER,
+                    compliance_rate REAL
+                )
+            ''')
+            
+            conn.commit()
+            conn.close()
+            print(" Veritabanı hazır")
+        except Exception as e:
+            print(f" Veritabanı kurulum hatası: {e}")
+    
+    def _empty_detections(self):
+        """Boş tespit kabı"""
+        return DetectionSet.empty(self.class_names_lower)
+    
+    def build_class_category_table(self):
+        """
+        Model sınıf id'lerini tespit kategorilerine eşle
+        
+        Her kare için isim taraması yapmak yerine eşleme model yüklenirken bir
+        kez çözülür. Sınıf listeleri (helmet_classes vb.) değiştirilirse bu
+        metot tekrar çağrılmalıdır.
+        """
+        # Sıra önemli: bir isim birden fazla listeye uyuyorsa ilk eşleşen kazanır
+        category_rules = [
+            ('helmets', self.helmet_classes),
+            ('persons', self.person_classes),
+            ('no_helmets', self.no_helmet_classes),
+            ('vests', self.vest_classes),
+            ('no_vests', self.no_vest_classes),
+            ('goggles', self.goggles_classes),
+            ('no_goggles', self.no_goggles_classes)
+        ]
+        
+        names = self.model.names
+        if not isinstance(names, dict):
+            names = dict(enumerate(names))
+        
+        table_size = max(names.keys()) + 1 if names else 0
+        self.class_names_lower = [None] * table_size
+        self.class_category_table = [None] * table_size
+        
+        for class_id, name in names.items():
+            class_name = str(name).lower()
+            self.class_names_lower[class_id] = class_name
+            for category, class_list in category_rules:
+                if any(candidate in class_name for candidate in class_list):
+                    self.class_category_table[class_id] = category
+                    break
+        
+        # Dizi tabanlı arama için kategori indeksleri (-1 = kategorisiz)
+        self.class_category_index = np.array(
+            [DetectionSet.CATEGORIES.index(category) if category else -1
+             for category in self.class_category_table], dtype=np.int64)
+        
+        return self.class_category_table
+    
+    def print_class_category_table(self):
+        """Çözülen sınıf -> kategori tablosunu yazdır (özel model kontrolü için)"""
+        print(" Sınıf -> Kategori Tablosu:")
+        print("-" * 40)
+        for class_id, class_name in enumerate(self.class_names_lower):
+            if class_name is None:
+                continue
+            category = self.class_category_table[class_id] or "(yok sayılıyor)"
+            print(f"   {class_id:>3} {class_name:<20} -> {category}")
+    
+    def _parse_result(self, result):
+        """Tek bir YOLO sonucunu dizi tabanlı tespit kabına çevir"""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return self._empty_detections()
+        
+        # Tüm kutular tek seferde host belleğe: [x1, y1, x2, y2, (track_id), conf, cls]
+        data = boxes.data.cpu().numpy()
+        class_ids = data[:, -1].astype(np.int64)
+        
+        table = self.class_category_index
+        known = (class_ids >= 0) & (class_ids < len(table))
+        category_ids = np.full(len(class_ids), -1, dtype=np.int64)
+        category_ids[known] = table[class_ids[known]]
+        
+        return DetectionSet(data[:, :4], data[:, -2], class_ids, category_ids,
+                            self.class_names_lower)
+    
+    def detect_objects(self, frame, tiling=None, camera_name=None):
+        """
+        Nesne tespiti yap
+        
+        tiling: TileLayout verilirse ve tam frame'de uzakta kişi görülürse
+        frame karolarda da işlenir, sonuçlar karolar arası NMS ile birleşir
+        detection_cache ayarlıysa aynı kameranın aynı küçük resimli frame'i
+        için çıkarım yapılmaz, önceki tespitler döner (bkz. DetectionCache)
+        """
+        cache = self.detection_cache
+        if cache is not None:
+            cached, cache_key = cache.get(frame, camera_name)
+            if cached is not None:
+                return cached
+        
+        try:
+            with self._model_lock:
+                results = self.model(frame, conf=self.confidence_threshold, verbose=False)
+            
+            # Tek frame -> tek sonuç
+            if not results:
+                return self._empty_detections()
+            detections = self._parse_result(results[0])
+            
+        except Exception as e:
+            print(f" Tespit hatası: {e}")
+            return self._empty_detections()
+        
+        if tiling is not None and tiling.should_tile(detections, frame.shape):
+            detections = self._detect_tiles(frame, detections, tiling)
+        if cache is not None:
+            cache.put(cache_key, detections)
+        return detections
+    
+    def _detect_tiles(self, frame, detections, tiling):
+        """Karoları tek batch'te işle, tam frame tespitleriyle birleştir"""
+        tiles = tiling.tiles(frame.shape)
+        height, width = frame.shape[:2]
+        tile_detections = self.detect_objects_batch([frame[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles])
+        
+        parts = [detections]
+        clipped = [np.zeros(len(detections), dtype=bool)]
+        for (x1, y1, x2, y2), tile_detection in zip(tiles, tile_detections):
+            tile_detection = tile_detection.offset(x1, y1)
+            boxes = tile_detection.xyxy
+            # Karonun iç kenarına değen kutular kesik olabilir (frame kenarı hariç)
+            margin = 2
+            clipped.append(((boxes[:, 0] <= x1 + margin) & (x1 > 0)) |
+                           ((boxes[:, 1] <= y1 + margin) & (y1 > 0)) |
+                           ((boxes[:, 2] >= x2 - margin) & (x2 < width)) |
+                           ((boxes[:, 3] >= y2 - margin) & (y2 < height)))
+            parts.append(tile_detection)
+        
+        merged = DetectionSet.concatenate(parts, self.class_names_lower)
+        # Kesik kutular en son değerlendirilir; parça kutu tam kutunun içinde
+        # kaldığı için kesişim / küçük alan ölçütü kullanılır
+        return merged.non_max_suppression(0.6, metric='ios', priority=np.concatenate(clipped))
+    
+    def detect_objects_batch(self, frames, max_batch_size=16):
+        """
+        Birden fazla kameranın frame'lerini tek YOLO çağrısında işle
+        
+        frames: frame listesi veya {kamera_adı: frame} sözlüğü
+        Dönüş: her kamera için detect_objects ile aynı yapıda tespit sözlüğü
+        (liste girilirse liste, sözlük girilirse aynı anahtarlarla sözlük)
+        """
+        if isinstance(frames, dict):
+            names = list(frames.keys())
+            batch_results = self.detect_objects_batch(list(frames.values()), max_batch_size)
+            return dict(zip(names, batch_results))
+        
+        frames = list(frames)
+        all_detections = []
+        
+        # Çok fazla kamera varsa bellek için parçalara böl
+        for start in range(0, len(frames), max_batch_size):
+            chunk = frames[start:start + max_batch_size]
+            try:
+                results = self._predict_chunk(chunk)
+                all_detections.extend(self._parse_result(result) for result in results)
+            except Exception as e:
+                print(f" Toplu tespit hatası: {e}")
+                all_detections.extend(self._empty_detections() for _ in chunk)
+        
+        return all_detections
+    
+    def _predict_chunk(self, frames):
+        """
+        Frame listesini tek model çağrısında işle
+        
+        Sabit batch boyutuyla (batch=1) dışa aktarılmış eski bir ONNX/OpenVINO
+        modeli toplu girdide hata verir; bu durumda bir kez uyarılır ve bu
+        örnekte frame'ler tek tek işlenir.
+        """
+        with self._model_lock:
+            if len(frames) > 1 and not self._single_frame_model:
+                try:
+                    # Ultralytics liste girdisini tek batch olarak işler
+                    return self.model(frames, conf=self.confidence_threshold, verbose=False)
+                except Exception as e:
+                    print(f" Model toplu girdiyi desteklemiyor ({e}); frame'ler tek tek işlenecek. "
+                          f"Dinamik batch için dışa aktarılan dosyayı silip yeniden oluşturun.")
+                    self._single_frame_model = True
+            return [self.model(frame, conf=self.confidence_threshold, verbose=False)[0]
+                    for frame in frames]
+    
+    def load_zone_config(self, config_path):
+        """
+        Kamera bölgelerini YAML dosyasından yükle
+        
+        Örnek:
+            zones:
+              "İnşaat Alanı":
+                polygon: [[100, 200], [900, 200], [900, 700], [100, 700]]
+              "Depo Girişi":
+                rect: [0, 0, 640, 480]
+            cameras:
+              "Ana Kamera": ["İnşaat Alanı"]
+            tiling:
+              "Çevre Kamerası": {tile_size: 1280, overlap: 0.2, far_person_ratio: 0.1}
+        """
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+            
+            zone_definitions = config.get('zones', {})
+            for camera_name, zone_names in (config.get('cameras') or {}).items():
+                self.camera_zones[camera_name] = [
+                    CameraZone.from_config(zone_name, zone_definitions[zone_name])
+                    for zone_name in zone_names
+                ]
+            
+            for camera_name, tiling in (config.get('tiling') or {}).items():
+                self.camera_tiling[camera_name] = TileLayout.from_config(tiling)
+            
+            print(f" Bölge ayarları yüklendi: {config_path} ({len(self.camera_zones)} kamera)")
+        
+        except Exception as e:
+            print(f" Bölge ayarları yükleme hatası: {e}")
+        
+        return self.camera_zones
+    
+    def enable_detection_cache(self, max_size=64, tolerance=0):
+        """detect_objects önüne LRU tespit önbelleği koy (max_size=None -> kapat)"""
+        self.detection_cache = DetectionCache(max_size, tolerance) if max_size else None
+        return self.detection_cache
+    
+    def enable_evidence_capture(self, directory="evidence", max_megabytes=500, workers=2,
+                                jpeg_quality=85):
+        """İhlal başlangıçlarında kanıt görüntüsü kaydet (directory=None -> kapat)"""
+        if self.evidence_store is not None:
+            self.evidence_store.close()
+            self.evidence_store = None
+        if directory:
+            self.evidence_store = EvidenceStore(directory, int(max_megabytes * 1024 * 1024), workers,
+                                                jpeg_quality, on_saved=self._link_evidence_path,
+                                                on_evict=self._clear_evidence_path)
+        return self.evidence_store
+    
+    def set_camera_tiling(self, camera_name, tile_size=1280, overlap=0.2, far_person_ratio=0.12,
+                          hold_frames=15):
+        """Kamera için karo modunu aç (tile_size=None -> kapat)"""
+        if tile_size is None:
+            self.camera_tiling.pop(camera_name, None)
+            return None
+        self.camera_tiling[camera_name] = TileLayout(tile_size, overlap, far_person_ratio, hold_frames)
+        return self.camera_tiling[camera_name]
+    
+    def load_zones_from_database(self, config_path, db_params=None):
+        """
+        Kamera -> bölge eşlemesini PostgreSQL'den (cameras.rule_id ->
+        safety_rules.zone_name) al, bölge geometrisini config dosyasının
+        'zones' bölümünden oku
+        """
+        try:
+            import psycopg2
+        except ImportError:
+            print(" psycopg2 bulunamadı: pip install psycopg2-binary")
+            return self.camera_zones
+        
+        db_params = db_params or {
+            'host': os.getenv("DB_HOST", "localhost"),
+            'port': os.getenv("DB_PORT", "5432"),
+            'database': os.getenv("DB_NAME", "is_guvenligi"),
+            'user': os.getenv("DB_USER", "postgres"),
+            'password': os.getenv("DB_PASS")
+        }
+        
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                zone_definitions = (yaml.safe_load(f) or {}).get('zones', {})
+            
+            conn = psycopg2.connect(**db_params)
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT c.name, r.zone_name, r.required_ppe
+                FROM cameras c
+                JOIN safety_rules r ON c.rule_id = r.id
+            """)
+            rows = cur.fetchall()
+            cur.close()
+            conn.close()
+            
+            for camera_name, zone_name, required_ppe in rows:
+                if zone_name not in zone_definitions:
+                    print(f" Bölge geometrisi tanımsız: {zone_name} ({camera_name})")
+                    continue
+                zone = CameraZone.from_config(zone_name, zone_definitions[zone_name], required_ppe)
+                self.camera_zones.setdefault(camera_name, []).append(zone)
+            
+            print(f" Veritabanından {len(rows)} kamera bölgesi yüklendi")
+        
+        except Exception as e:
+            print(f" Veritabanı bölge yükleme hatası: {e}")
+        
+        return self.camera_zones
+    
+    def detect_objects_in_zones(self, frame, zones):
+        """
+        Yalnızca bölgelerin kırpılmış alanlarında tespit yap
+        
+        Kırpılan alanlar tek batch olarak işlenir ve kutular tam frame
+        koordinatlarına taşınır. Merkezi bölge dışında kalan kişiler atılır;
+        baret/yelek/gözlük kutuları merkezleri bölge dışında olsa da kalır ki
+        bölgedeki bir kişinin KKD'si kenarda kaldı diye ihlal sayılmasın.
+        """
+        person_category = DetectionSet.CATEGORIES.index('persons')
+        regions = []
+        for zone in zones:
+            box = zone.bounding_box(frame.shape, self.zone_crop_padding)
+            if box is not None:
+                regions.append((zone, box))
+        
+        if not regions:
+            return self._empty_detections()
+        
+        crops = [frame[y1:y2, x1:x2] for _, (x1, y1, x2, y2) in regions]
+        crop_detections = self.detect_objects_batch(crops)
+        
+        zone_detections = []
+        for (zone, (x1, y1, _, _)), detections in zip(regions, crop_detections):
+            detections = detections.offset(x1, y1)
+            keep = (detections.category_ids != person_category) | \
+                zone.contains(detections.all_centers(), frame.shape)
+            zone_detections.append(detections.select(keep))
+        
+        detections = DetectionSet.concatenate(zone_detections, self.class_names_lower)
+        
+        # Örtüşen bölgelerden gelen kopyaları temizle
+        if len(regions) > 1:
+            detections = detections.non_max_suppression()
+        return detections
+    
+    def _centers_array(self, detections, category):
+        """Kategorinin tespit merkezlerini (N, 2) dizisi olarak al"""
+        if isinstance(detections, DetectionSet):
+            return detections.centers(category)
+        items = detections.get(category, [])
+        if not items:
+            return np.empty((0, 2))
+        return np.asarray([item['center'] for item in items])
+    
+    def _person_boxes(self, detections):
+        """Kişi kutularını (P, 4) tam sayı dizisi olarak al"""
+        if isinstance(detections, DetectionSet):
+            return detections.int_boxes('persons')
+        return np.asarray([person['bbox'] for person in detections['persons']])
+    
+    def _region_contains(self, centers, x1, y1, x2, y2):
+        """Kişi x KKD matrisi: her KKD merkezi kişinin bölgesinde mi?"""
+        cx = centers[:, 0][None, :]
+        cy = centers[:, 1][None, :]
+        return ((cx >= x1[:, None]) & (cx <= x2[:, None]) &
+                (cy >= y1[:, None]) & (cy <= y2[:, None]))
+    
+    def check_safety_compliance(self, detections):
+        """
+        Baret, yelek ve gözlük uyumunu kontrol et
+        
+        Tüm bölge testleri ve mesafeler kişi x KKD matrisleri olarak tek
+        geçişte hesaplanır.
+        """
+        persons = detections['persons']
+        
+        violations = []
+        safe_persons = []
+        
+        if not persons:
+            return violations, safe_persons
+        
+        person_boxes = self._person_boxes(detections)
+        person_centers = self._centers_array(detections, 'persons')
+        px1, py1, px2, py2 = (person_boxes[:, k] for k in range(4))
+        person_heights = py2 - py1
+        
+        # --- Baret: baş bölgesi + kişinin üstünde + en yakın (< 100 px) ---
+        helmet_centers = self._centers_array(detections, 'helmets')
+        
+        # Kişinin baş bölgesi
+        head_region_height = person_heights * 0.4
+        helmet_in_head_region = self._region_contains(
+            helmet_centers, px1 - 20, py1, px2 + 20, py1 + head_region_height)
+        
+        # Mesafe hesapla
+        dx = person_centers[:, 0][:, None] - helmet_centers[:, 0][None, :]
+        dy = person_centers[:, 1][:, None] - helmet_centers[:, 1][None, :]
+        distances = np.sqrt(dx ** 2 + dy ** 2)
+        
+        # Baret kişinin üstünde mi?
+        helmet_above_person = helmet_centers[:, 1][None, :] < person_centers[:, 1][:, None]
+        
+        helmet_candidates = helmet_in_head_region & helmet_above_person & (distances < 100)
+        helmet_found = helmet_candidates.any(axis=1)
+        if helmet_found.any():
+            helmets = detections['helmets']
+            best_helmet_index = np.where(helmet_candidates, distances, np.inf).argmin(axis=1)
+        
+        # --- Yelek: merkez gövde bölgesinde mi? ---
+        torso_region_height = person_heights * 0.6
+        vest_found = self._region_contains(
+            self._centers_array(detections, 'vests'),
+            px1 - 10, py1 + torso_region_height * 0.2,
+            px2 + 10, py2 - torso_region_height * 0.2).any(axis=1)
+        
+        # --- Gözlük: merkez göz bölgesinde mi? ---
+        eye_region_height = person_heights * 0.3
+        goggles_found = self._region_contains(
+            self._centers_array(detections, 'goggles'),
+            px1 - 15, py1 + eye_region_height * 0.1,
+            px2 + 15, py1 + eye_region_height * 0.8).any(axis=1)
+        
+        # Sonuçları eski liste yapısıyla birleştir
+        violations_by_person = {}
+        
+        for i in np.flatnonzero(helmet_found):
+            safe_persons.append({
+                'person': persons[i],
+                'helmet': helmets[best_helmet_index[i]],
+                'person_id': int(i)
+            })
+        
+        for i in np.flatnonzero(~helmet_found):
+            violation = {
+                'person_id': int(i),
+                'person': persons[i]
+            }
+            violations.append(violation)
+            violations_by_person[int(i)] = violation
+        
+        for i in np.flatnonzero(~vest_found):
+            existing_violation = violations_by_person.get(int(i))
+            if existing_violation:
+                existing_violation['violations'] = existing_violation.get('violations', ['no_helmet']) + ['no_vest']
+            else:
+                violation = {
+                    'person_id': int(i),
+                    'person': persons[i],
+                    'violations': ['no_vest']
+                }
+                violations.append(violation)
+                violations_by_person[int(i)] = violation
+        
+        for i in np.flatnonzero(~goggles_found):
+            existing_violation = violations_by_person.get(int(i))
+            if existing_violation:
+                existing_violation['violations'] = existing_violation.get('violations', []) + ['no_goggles']
+            else:
+                violation = {
+                    'person_id': int(i),
+                    'person': persons[i],
+                    'violations': ['no_goggles']
+                }
+                violations.append(violation)
+                violations_by_person[int(i)] = violation
+        
+        return violations, safe_persons
+    
+    def check_tracked_compliance(self, detections, tracker, zones=None, frame_shape=None):
+        """
+        Takip numaralı uyum kontrolü
+        
+        Kişiler takiplerle eşlenir; yalnızca durumu kesinleşmemiş takipler için
+        check_safety_compliance çalıştırılır. Sonuç, her takibin oylanmış
+        durumundan üretilir ve person_id olarak takip numarası kullanılır.
+        zones verilirse oylanan türler bölge KKD kuralına göre süzülür.
+        """
+        persons = detections['persons']
+        if not persons:
+            tracker.update(np.empty((0, 4)))
+            return [], []
+        
+        track_ids = tracker.update(self._person_boxes(detections))
+        
+        # Yalnızca belirsiz takipleri yeniden değerlendir
+        evaluate = [i for i, track_id in enumerate(track_ids) if not tracker.is_settled(track_id)]
+        if evaluate:
+            subset = {category: detections[category] for category in ('helmets', 'vests', 'goggles')}
+            subset['persons'] = [persons[i] for i in evaluate]
+            sub_violations, sub_safe = self.check_safety_compliance(subset)
+            if zones:
+                sub_violations = self._apply_zone_requirements(sub_violations, sub_safe, zones,
+                                                               frame_shape)
+            
+            violation_types = self._violation_types_by_person(sub_violations, sub_safe)
+            helmets = {safe['person_id']: safe['helmet'] for safe in sub_safe}
+            
+            for local_id, i in enumerate(evaluate):
+                tracker.record(track_ids[i], violation_types.get(local_id, set()),
+                               helmets.get(local_id))
+        
+        violations = []
+        safe_persons = []
+        for i, track_id in enumerate(track_ids):
+            state = tracker.state(track_id)
+            if 'no_helmet' not in state:
+                safe_persons.append({
+                    'person': persons[i],
+                    'helmet': tracker.tracks[track_id]['helmet'],
+                    'person_id': track_id,
+                    'track_id': track_id
+                })
+            if state:
+                violations.append({
+                    'person_id': track_id,
+                    'person': persons[i],
+                    'violations': state,
+                    'track_id': track_id
+                })
+        
+        return violations, safe_persons
+    
+    def draw_detections(self, frame, detections, violations, safe_persons):
+        """Tespitleri çiz"""
+        try:
+            # Baretleri çiz (yeşil)
+            for helmet in detections['helmets']:
+                x1, y1, x2, y2 = helmet['bbox']
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+                cv2.putText(frame, f"Baret {helmet['confidence']:.2f}", 
+                           (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+            
+            # Güvenli kişileri çiz (mavi)
+            for safe in safe_persons:
+                person = safe['person']
+                x1, y1, x2, y2 = person['bbox']
                 cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 0), 2)
                 cv2.putText(frame, "✓ GÜVENLİ", 
                            (x1, y1-30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
@@ -642,9 +2869,15 @@ class HelmetDetectionSystem:
     def add_info_panel(self, frame, violations_count, safe_count, total_persons):
         """Bilgi paneli ekle"""
         try:
-            overlay = frame.copy()
-            cv2.rectangle(overlay, (10, 10), (400, 140), (0, 0, 0), -1)
-            cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
+            # Yalnızca panel bölgesini karart (tüm frame'i kopyalamadan)
+            roi = frame[10:141, 10:401]
+            buffers = self._panel_buffers.get(roi.shape)
+            if buffers is None:
+                buffers = (np.zeros(roi.shape, dtype=frame.dtype), np.empty(roi.shape, dtype=frame.dtype))
+                self._panel_buffers[roi.shape] = buffers
+            black, blended = buffers
+            cv2.addWeighted(black, 0.7, roi, 0.3, 0, dst=blended)
+            roi[...] = blended
             
             compliance_rate = (safe_count / max(total_persons, 1)) * 100
             
@@ -670,186 +2903,1301 @@ class HelmetDetectionSystem:
             print(f" Panel hatası: {e}")
             return frame
     
-    def log_violation(self, violation_type, location, confidence, worker_id=None):
-        """İhlali kaydet"""
+    def _get_db_connection(self):
+        """Uzun ömürlü SQLite bağlantısı (ilk kullanımda açılır)"""
+        if self._db_conn is None:
+            self._db_conn = sqlite3.connect(self.database_path, check_same_thread=False)
+        return self._db_conn
+    
+    def close_database(self):
+        """Uzun ömürlü veritabanı bağlantısını kapat"""
+        with self._db_lock:
+            if self._db_conn is not None:
+                self._db_conn.close()
+                self._db_conn = None
+    
+    def log_violation(self, violation_type, location, confidence, worker_id=None, notes=None,
+                      image_path=None, clip_path=None):
+        """İhlali kaydet - eklenen satırın id'sini döner"""
         try:
-            conn = sqlite3.connect(self.database_path)
-            cursor = conn.cursor()
-            
             timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
-            cursor.execute('''
-                INSERT INTO safety_violations 
-                (timestamp, violation_type, location, confidence, worker_id)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (timestamp, violation_type, location, confidence, worker_id))
-            
-            conn.commit()
-            conn.close()
+            with self._db_lock:
+                conn = self._get_db_connection()
+                cursor = conn.execute('''
+                    INSERT INTO safety_violations 
+                    (timestamp, violation_type, location, confidence, image_path, worker_id, notes,
+                     clip_path)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (timestamp, violation_type, location, confidence, image_path, worker_id, notes,
+                      clip_path))
+                conn.commit()
             
             print(f" İHLAL: {timestamp} - {violation_type}")
+            return cursor.lastrowid
             
         except Exception as e:
             print(f" Kayıt hatası: {e}")
+            return None
+    
+    def resolve_violation(self, violation_id):
+        """İhlali çözüldü olarak işaretle (status / resolved_at)"""
+        if violation_id is None:
+            return
+        try:
+            resolved_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            
+            with self._db_lock:
+                conn = self._get_db_connection()
+                conn.execute('''
+                    UPDATE safety_violations
+                    SET status = 'resolved', resolved_at = ?
+                    WHERE id = ?
+                ''', (resolved_at, violation_id))
+                conn.commit()
+            
+        except Exception as e:
+            print(f" Kayıt güncelleme hatası: {e}")
+    
+    def _link_evidence_path(self, path, row_ids, column='image_path'):
+        """Yazılan kanıtın (görüntü ya da klip) yolunu ihlal kayıtlarına ekle"""
+        if column not in EVIDENCE_PATH_COLUMNS:
+            raise ValueError(f"Geçersiz kanıt sütunu: {column}")
+        if not row_ids:
+            return
+        try:
+            with self._db_lock:
+                conn = self._get_db_connection()
+                conn.executemany(f'UPDATE safety_violations SET {column} = ? WHERE id = ?',
+                                 [(path, row_id) for row_id in row_ids])
+                conn.commit()
+        except Exception as e:
+            print(f" Kanıt yolu güncelleme hatası: {e}")
+    
+    def _clear_evidence_path(self, path, column='image_path'):
+        """Silinen / yazılamayan kanıtın (görüntü ya da klip) yolunu ihlal kaydından kaldır"""
+        # Sütun adı sorguya doğrudan girdiği için yalnızca bilinen kanıt sütunları kabul edilir
+        if column not in EVIDENCE_PATH_COLUMNS:
+            raise ValueError(f"Geçersiz kanıt sütunu: {column}")
+        try:
+            with self._db_lock:
+                conn = self._get_db_connection()
+                conn.execute(f'UPDATE safety_violations SET {column} = NULL WHERE {column} = ?',
+                             (path,))
+                conn.commit()
+        except Exception as e:
+            print(f" Kanıt yolu güncelleme hatası: {e}")
+    
+    def _violation_types_by_person(self, violations, safe_persons):
+        """person_id -> ihlal türleri kümesi (bölge KKD kuralına göre süzülmüş)"""
+        safe_ids = {safe['person_id'] for safe in safe_persons}
+        types = {}
+        for violation in violations:
+            person_types = types.setdefault(violation['person_id'], set())
+            person_types.update(violation.get('violations', ['no_helmet']))
+            if violation['person_id'] not in safe_ids:
+                person_types.add('no_helmet')
+            if 'required_types' in violation:
+                person_types &= violation['required_types']
+        return types
+    
+    def _apply_zone_requirements(self, violations, safe_persons, zones, frame_shape):
+        """
+        İhlal türlerini kişinin bulunduğu bölgelerin required_ppe kuralına göre süz
+        
+        Gerekmeyen türler çıkarılır, türü kalmayan ihlal atılır. Süzülen
+        ihlallere required_types eklenir (bkz. _violation_types_by_person).
+        """
+        if not violations or not zones or all(zone.required_violations is None for zone in zones):
+            return violations
+        
+        boxes = np.asarray([violation['person']['bbox'] for violation in violations], dtype=np.float64)
+        centers = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2], axis=1)
+        inside = np.array([zone.contains(centers, frame_shape) for zone in zones])  # (bölge, kişi)
+        all_types = self._violation_types_by_person(violations, safe_persons)
+        
+        filtered = []
+        for j, violation in enumerate(violations):
+            zone_rules = [zone.required_violations for zone, is_inside in zip(zones, inside[:, j]) if is_inside]
+            if not zone_rules or any(rule is None for rule in zone_rules):
+                filtered.append(violation)  # Bölgede kural yok: tüm KKD gerekli
+                continue
+            
+            required = frozenset().union(*zone_rules)
+            types = all_types[violation['person_id']] & required
+            if types:
+                filtered.append(dict(violation, required_types=required,
+                                     violations=[t for t in PersonTracker.VIOLATION_ORDER if t in types]))
+        return filtered
+    
+    def _check_compliance(self, detections, tracker, zones, frame_shape):
+        """Baret uyumu kontrolü (takip açıksa kişi bazında oylanmış, bölge KKD kuralına göre)"""
+        if tracker is not None:
+            return self.check_tracked_compliance(detections, tracker, zones, frame_shape)
+        violations, safe_persons = self.check_safety_compliance(detections)
+        return self._apply_zone_requirements(violations, safe_persons, zones, frame_shape), safe_persons
+    
+    def _tracking_for_violations(self, log_violations, track_persons):
+        """
+        İhlal kaydı açıksa kişi takibini de aç
+        
+        Durum makinesi kişiyi person_id ile tanır; takip olmadan bu, frame
+        içindeki sıradır ve tespit sırası değişince ihlal başka kişiye yazılır.
+        """
+        if log_violations and not track_persons:
+            print(" İhlal kaydı kişi takibi gerektirir - track_persons açıldı")
+            return True
+        return track_persons
+    
+    def _process_violation_events(self, analysis, run, now, get_frame=None):
+        """
+        Frame ihlallerini durum makinesinden geçir, yalnızca başlangıç/bitişi kaydet
+        
+        get_frame: kanıt için frame'i döndüren fonksiyon; yalnızca kanıt
+        kaydı açıkken ve bir ihlal başlarken çağrılır
+        """
+        observations, bboxes = self._violation_observations(analysis)
+        self._record_violation_events(run.debouncer.update(observations, now), run, now,
+                                      bboxes, get_frame)
+    
+    def _violation_observations(self, analysis):
+        """Durum makinesi girdisi {(kişi, tür): güven} ve kişi -> kutu"""
+        confidences = {v['person_id']: v['person']['confidence'] for v in analysis['violations']}
+        bboxes = {v['person_id']: v['person']['bbox'] for v in analysis['violations']}
+        observations = {}
+        for person_id, types in self._violation_types_by_person(
+                analysis['violations'], analysis['safe_persons']).items():
+            for violation_type in types:
+                observations[(person_id, violation_type)] = confidences[person_id]
+        return observations, bboxes
+    
+    def _record_violation_events(self, events, run, now, bboxes, get_frame=None):
+        """Başlangıç/bitiş olaylarını kaydet, başlayan ihlaller için klip ve kanıt al"""
+        started = {}  # Kişi -> bu frame'de başlayan ihlallerin (tür, kayıt id) listesi
+        for event in events:
+            person_id, violation_type = event['key']
+            self._handle_violation_event(event, run)
+            if event['event'] == 'start' and event['entry']['row_id'] is not None:
+                started.setdefault(person_id, []).append((violation_type, event['entry']['row_id']))
+        
+        # Klip: aynı anda başlayan ihlaller tek klibi paylaşır; yol MP4 yazılınca bağlanır
+        if started and run.clip_recorder is not None:
+            rows = [row for person_rows in started.values() for row in person_rows]
+            run.clip_recorder.trigger(now, rows[0][0], [row_id for _, row_id in rows])
+        
+        # Kanıt: kayıtlar eklendikten sonra, kişi başına tek görüntü; yol dosya yazılınca bağlanır
+        if started and get_frame is not None and self.evidence_store is not None:
+            frame = get_frame()
+            if frame is not None:
+                for person_id, rows in started.items():
+                    self.evidence_store.submit(frame, bboxes.get(person_id), run.camera_name,
+                                               rows[0][0], [row_id for _, row_id in rows])
+    
+    def _handle_violation_event(self, event, run):
+        """Başlangıç olayında satır ekle, bitiş olayında satırı çözüldü yap"""
+        person_id, violation_type = event['key']
+        entry = event['entry']
+        
+        if event['event'] == 'start':
+            entry['row_id'] = self.log_violation(
+                VIOLATION_LABELS.get(violation_type, violation_type),
+                run.camera_name,
+                entry['confidence'],
+                notes=f"Kişi/Takip {person_id}"
+            )
+            run.stats['violation_events'] = run.stats.get('violation_events', 0) + 1
+        else:
+            self.resolve_violation(entry['row_id'])
+            run.stats['resolved_violations'] = run.stats.get('resolved_violations', 0) + 1
+    
+    def _new_run_stats(self):
+        """Çalışma istatistikleri sözlüğü"""
+        return {
+            'total_frames': 0,
+            'total_persons': 0,
+            'total_helmets': 0,
+            'persons_with_helmet': 0,
+            'persons_without_helmet': 0,
+            'total_vests': 0,
+            'total_goggles' : 0
+        }
+    
+    def _analyze_frame(self, frame, frame_count, run):
+        """Tek frame için tespit + uyum kontrolü + istatistik güncellemesi"""
+        stats = run.stats
+        motion_gate = run.motion_gate
+        zones = self.camera_zones.get(run.camera_name)
+        
+        if motion_gate is not None and not motion_gate.needs_inference(frame):
+            # Sahne değişmedi: önceki sonuçları kullan
+            analysis = dict(motion_gate.last_analysis, inferred=False)
+            stats['skipped_frames'] = motion_gate.skipped_frames
+        else:
+            # Nesne tespiti (bölge tanımlıysa yalnızca bölgelerde)
+            tiling = self.camera_tiling.get(run.camera_name)
+            if zones:
+                detections = self.detect_objects_in_zones(frame, zones)
+            else:
+                detections = self.detect_objects(frame, tiling, run.camera_name)
+                if tiling is not None:
+                    stats['tiled_frames'] = tiling.tiled_frames
+            if self.detection_cache is not None:
+                stats['cache_hits'] = self.detection_cache.hits
+                stats['cache_misses'] = self.detection_cache.misses
+            
+            violations, safe_persons = self._check_compliance(detections, run.tracker, zones, frame.shape)
+            
+            analysis = {
+                'detections': detections,
+                'violations': violations,
+                'safe_persons': safe_persons,
+                'zones': zones,
+                'inferred': True
+            }
+            if motion_gate is not None:
+                motion_gate.last_analysis = analysis
+            stats['inferred_frames'] = stats.get('inferred_frames', 0) + 1
+        
+        # İstatistikleri güncelle
+        self._update_frame_stats(stats, analysis, run.tracker)
+        
+        # İhlal başlangıç/bitişlerini kaydet
+        if run.debouncer is not None:
+            self._process_violation_events(analysis, run, run.timestamp(frame_count),
+                                           lambda: frame)
+        
+        # Anlık durumu yazdır
+        if frame_count - stats.get('last_status_frame', 0) >= 30:  # Her 30 frame'de bir güncelle
+            stats['last_status_frame'] = frame_count
+            self._print_frame_status(frame_count, stats, analysis)
+        
+        return analysis
+    
+    def _update_frame_stats(self, stats, analysis, tracker=None):
+        """
+        Frame analiz sonuçlarını çalışma istatistiklerine ekle
+        
+        tracker: PersonTracker ya da PersonTracker.counts() sözlüğü (havuz süreçlerinden)
+        """
+        detections = analysis['detections']
+        stats['total_helmets'] += len(detections['helmets'])
+        stats['total_vests'] += len(detections['vests'])
+        stats['total_goggles'] += len(detections.get('goggles', []))
+        
+        if tracker is not None:
+            # Takip açıkken kişi-frame değil, benzersiz kişi sayılır
+            counts = tracker if isinstance(tracker, dict) else tracker.counts()
+            stats['total_persons'] = counts['confirmed_people']
+            stats['persons_with_helmet'] = counts['people_with_helmet']
+            stats['persons_without_helmet'] = counts['people_with_violation']
+            stats['tracked_people'] = True
+        else:
+            stats['total_persons'] += len(detections['persons'])
+            stats['persons_with_helmet'] += len(analysis['safe_persons'])
+            stats['persons_without_helmet'] += len(analysis['violations'])
+    
+    def _print_frame_status(self, frame_count, stats, analysis):
+        """Anlık durum bloğunu yazdır"""
+        detections = analysis['detections']
+        print(f"\n Anlık Durum (Frame {frame_count}):")
+        print(f" Tespit Edilen Kişi: {len(detections['persons'])}")
+        print(f" Tespit Edilen Baret: {len(detections['helmets'])}")
+        print(f" Tespit Edilen Yelek: {len(detections['vests'])}")
+        print(f" Baretli Kişi: {len(analysis['safe_persons'])}")
+        print(f" Baretsiz Kişi: {len(analysis['violations'])}")
+        print(f" Tespit Edilen Gözlük: {len(detections.get('goggles', []))}")
+        if 'avg_inference_ms' in stats:
+            print(f" Çıkarım Adımı: {stats['inference_stride']} frame'de bir "
+                  f"(ort. çıkarım {stats['avg_inference_ms']:.1f} ms)")
+        if 'skipped_frames' in stats:
+            print(f" Çıkarım / Atlanan Frame: {stats.get('inferred_frames', 0)} / "
+                  f"{stats['skipped_frames']}")
+    
+    def _render_frame(self, frame, analysis, frame_count, total_frames, is_video_file):
+        """Tespitleri, bilgi panelini ve ilerlemeyi frame üzerine çiz"""
+        detections = analysis['detections']
+        violations = analysis['violations']
+        safe_persons = analysis['safe_persons']
+        
+        # Kontrol bölgelerini çiz
+        for zone in analysis.get('zones') or []:
+            cv2.polylines(frame, [zone.points], True, (255, 255, 0), 1)
+        
+        # Çizimleri yap
+        frame = self.draw_detections(frame, detections, violations, safe_persons)
+        
+        # Takip numaraları
+        for entry in violations + safe_persons:
+            if 'track_id' in entry:
+                x1, _, _, y2 = entry['person']['bbox']
+                cv2.putText(frame, f"ID {entry['track_id']}", (x1, y2 + 15),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        frame = self.add_info_panel(frame, len(violations), len(safe_persons), len(detections['persons']))
+        
+        # Video için ilerleme bilgisi
+        if is_video_file and total_frames > 0:
+            progress = (frame_count / total_frames) * 100
+            cv2.putText(frame, f"İlerleme: %{progress:.1f}", 
+                      (10, frame.shape[0] - 10), 
+                      cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        
+        return frame
+    
+    def _print_run_stats(self, stats):
+        """İşlem sonunda toplam istatistikleri yazdır"""
+        print("\n TOPLAM İSTATİSTİKLER:")
+        print("=" * 40)
+        print(f"Toplam Frame: {stats['total_frames']}")
+        if stats.get('tracked_people'):
+            print(" (Kişi sayıları takip numarasına göre benzersiz kişilerdir)")
+        print(f" Toplam Tespit Edilen Kişi: {stats['total_persons']}")
+        print(f" Toplam Tespit Edilen Baret: {stats['total_helmets']}")
+        print(f" Toplam Tespit Edilen Yelek: {stats['total_vests']}")
+        print(f" Toplam Baretli Kişi Tespiti: {stats['persons_with_helmet']}")
+        print(f" Toplam Baretsiz Kişi Tespiti: {stats['persons_without_helmet']}")
+        print(f" Toplam Tespit Edilen Gözlük: {stats['total_goggles']}")
+        
+        if 'violation_events' in stats or 'resolved_violations' in stats:
+            print(f" Kaydedilen İhlal Olayı: {stats.get('violation_events', 0)} "
+                  f"(çözülen: {stats.get('resolved_violations', 0)})")
+        if 'evidence_saved' in stats:
+            print(f" İhlal Kanıtı: {stats['evidence_saved']} kayıt, "
+                  f"{stats['evidence_bytes'] / 2**20:.1f} / {stats['evidence_quota'] / 2**20:.0f} MB "
+                  f"(silinen: {stats['evidence_evicted']}, atlanan: {stats['evidence_dropped']})")
+        if 'clips_written' in stats:
+            print(f" İhlal Klibi: {stats['clips_written']} klip, halka belleği "
+                  f"{stats['clip_ring_bytes'] / 2**20:.1f} MB (atlanan: {stats['clip_dropped']})")
+        if 'skipped_frames' in stats:
+            print(f" Çıkarım Yapılan Frame: {stats.get('inferred_frames', 0)}")
+            print(f" Hareketsiz Sahne (Atlanan) Frame: {stats['skipped_frames']}")
+        if stats.get('batch_inference_total') and stats.get('inferred_frames'):
+            print(f" Ort. Toplu Çıkarım Süresi: "
+                  f"{stats['batch_inference_total'] / stats['inferred_frames'] * 1000:.1f} ms")
+        if 'avg_inference_ms' in stats:
+            print(f" Son Çıkarım Adımı: {stats['inference_stride']} "
+                  f"(ort. çıkarım {stats['avg_inference_ms']:.1f} ms)")
+        if 'cache_hits' in stats:
+            total = stats['cache_hits'] + stats['cache_misses']
+            print(f" Tespit Önbelleği İsabet / Iska: {stats['cache_hits']} / {stats['cache_misses']} "
+                  f"(%{stats['cache_hits'] / max(total, 1) * 100:.1f})")
+        if 'tiled_frames' in stats:
+            print(f" Karo Modunda İşlenen Frame: {stats['tiled_frames']}")
+        if 'sampled_frames' in stats:
+            print(f" Çözülen (örneklenen) Frame: {stats['sampled_frames']}")
+        if 'frame_buffers' in stats:
+            print(f" Frame Tamponu: {stats['frame_buffers']} adet, yeniden kullanım "
+                  f"{stats['frame_buffer_reused']}, ayırma {stats['frame_buffer_allocated']}, "
+                  f"taşma {stats['frame_buffer_overruns']}")
+        if 'stride_skipped_frames' in stats:
+            print(f" Çıkarımsız (son tespitlerle çizilen) Frame: {stats['stride_skipped_frames']}")
+        if 'dropped_frames' in stats:
+            print(f" Atlanan (eski) Frame: {stats['dropped_frames']}")
+        if stats.get('latency_samples'):
+            avg_latency = stats['latency_total'] / stats['latency_samples']
+            print(f" Uçtan Uca Gecikme: ort {avg_latency * 1000:.1f} ms, "
+                  f"maks {stats['latency_max'] * 1000:.1f} ms")
+        
+        if stats['total_persons'] > 0:
+            helmet_rate = (stats['persons_with_helmet'] / stats['total_persons']) * 100
+            print(f" Baret Kullanım Oranı: %{helmet_rate:.2f}")
+    
+    def _open_capture(self, camera_source):
+        """Kaynağı aç - (cap, is_video_file, fps, total_frames, frame_delay) döner"""
+        # Video mu kamera mı kontrol et
+        is_video_file = isinstance(camera_source, str) and os.path.exists(camera_source)
+        
+        print(f"Kaynak: {'Video Dosyası' if is_video_file else 'Kamera'}")
+        
+        cap = cv2.VideoCapture(camera_source)
+        
+        if not cap.isOpened():
+            print(f" Kaynak açılamadı: {camera_source}")
+            return None, is_video_file, 0, -1, 1
+        
+        # Video dosyası için ek ayarlar
+        if is_video_file:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            frame_delay = int(1000 / fps) if fps > 0 else 33  # milisaniye
+            print(f" Video FPS: {fps}, Frame gecikme: {frame_delay}ms")
+            print(f" Toplam frame: {total_frames}")
+        else:
+            # Kamera ayarları
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+            cap.set(cv2.CAP_PROP_FPS, 30)
+            fps = 30
+            frame_delay = 1
+            total_frames = -1
+        
+        return cap, is_video_file, fps, total_frames, frame_delay
+    
+    def _sampled_frames(self, cap, step=1, start=0, end=None, frame_buffers=None):
+        """
+        Video dosyasından yalnızca örneklenen frame'leri çöz
+        
+        cap start konumunda olmalı. Örnekler arası frame'ler grab() ile
+        geçilir (renk dönüşümü ve kopya yok) ya da - ölçülen maliyeti
+        daha düşükse - doğrudan konuma atlanır (seek). Anahtar kare aralığı
+        kısa videolarda (ör. MJPEG) atlama, uzun olanlarda grab() seçilir.
+        Yalnızca örnekler retrieve() edilir; konumlar round(k * step).
+        frame_buffers verilirse örnekler önceden ayrılmış tamponlara çözülür.
+        Dönüş: (1 tabanlı frame no, frame)
+        """
+        position = start
+        sample = math.ceil(start / step)
+        grab_time = None   # Frame başına grab() süresi (hareketli ortalama)
+        seek_time = None   # Atlama + grab() süresi
+        sampled = 0
+        
+        while True:
+            target = int(round(sample * step))
+            sample += 1
+            if target < position:
+                continue
+            if end is not None and target >= end:
+                return
+            
+            skip = target - position
+            prefer_seek = seek_time is not None and seek_time < skip * grab_time
+            if skip <= 1 or grab_time is None:
+                use_seek = False
+            elif seek_time is None or sampled % 20 == 0:
+                use_seek = not prefer_seek  # Diğer yöntemi ara sıra yeniden ölç
+            else:
+                use_seek = prefer_seek
+            
+            started = time.perf_counter()
+            if use_seek:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+                if not cap.grab():
+                    return
+                elapsed = time.perf_counter() - started
+                seek_time = elapsed if seek_time is None else 0.8 * seek_time + 0.2 * elapsed
+            else:
+                for _ in range(skip + 1):
+                    if not cap.grab():
+                        return
+                # İlk grab() açılış maliyetini içerir, ölçüme katılmaz
+                if sampled:
+                    elapsed = (time.perf_counter() - started) / (skip + 1)
+                    grab_time = elapsed if grab_time is None else 0.8 * grab_time + 0.2 * elapsed
+            
+            sampled += 1
+            position = target + 1
+            if frame_buffers is not None:
+                ret, frame = frame_buffers.read(cap.retrieve)
+            else:
+                ret, frame = cap.retrieve()
+            if not ret:
+                return
+            yield target + 1, frame
+    
+    def _evidence_dir_for_run(self, evidence_dir, log_violations):
+        """Kanıtlar ihlal kayıtlarına bağlanır; ihlal kaydı kapalıysa kanıt klasörü kullanılmaz"""
+        if evidence_dir and not log_violations:
+            print(" Kanıt kaydı ihlal kaydı gerektirir (log_violations=True) - evidence_dir yok sayıldı")
+            return None
+        return evidence_dir
+    
+    def _collect_evidence_stats(self, stats):
+        """Bekleyen kanıtların yazılmasını bekle, sayaçları istatistiklere ekle"""
+        store = self.evidence_store
+        if store is None:
+            return
+        store.wait()
+        stats['evidence_saved'] = store.saved
+        stats['evidence_bytes'] = store.total_bytes
+        stats['evidence_quota'] = store.max_bytes
+        stats['evidence_evicted'] = store.evicted
+        stats['evidence_dropped'] = store.dropped + store.failed
+    
+    def _timed_analyze(self, frame, frame_count, run):
+        """Frame'i analiz et, süreyi ölç ve zamanlayıcıya bildir"""
+        stats = run.stats
+        scheduler = run.scheduler
+        started = time.perf_counter()
+        analysis = self._analyze_frame(frame, frame_count, run)
+        
+        # Atlanan (hareketsiz) frame'ler çıkarım süresi ortalamasını bozmasın
+        if analysis['inferred']:
+            scheduler.record(time.perf_counter() - started)
+        
+        stats['inference_stride'] = scheduler.stride
+        if scheduler.avg_inference_time is not None:
+            stats['avg_inference_ms'] = scheduler.avg_inference_time * 1000
+        return analysis
+    
+    def stop(self):
+        """Çalışan process_camera_feed döngüsünü durdur (thread güvenli)"""
+        self._stop_event.set()
+    
+    def pause(self):
+        """İşlemeyi duraklat"""
+        if not self._pause_event.is_set():
+            self._pause_event.set()
+            print("Duraklatıldı")
+    
+    def resume(self):
+        """Duraklatılan işlemeye devam et"""
+        if self._pause_event.is_set():
+            self._pause_event.clear()
+            print(" Devam")
+    
+    def is_paused(self):
+        return self._pause_event.is_set()
+    
+    def start_stream_server(self, port=8080, host="127.0.0.1"):
+        """Canlı MJPEG yayın sunucusunu başlat (süreç başına bir tane, varsayılan yalnızca yerel)"""
+        if self.stream_server is None:
+            self.stream_server = MJPEGStreamServer(host=host, port=port).start()
+        return self.stream_server
+    
+    def request_snapshot(self):
+        """Çalışan kameranın bir sonraki çizilmiş frame'ini kaydet"""
+        if self._snapshot_sink is not None:
+            self._snapshot_sink.request()
+    
+    def install_signal_handlers(self):
+        """
+        SIGINT/SIGTERM -> durdur, SIGUSR1 -> duraklat/devam
+        
+        Yalnızca ana thread'de kurulabilir; önceki işleyicileri döner.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+        
+        def handle_stop(signum, frame):
+            print(" Durdurma sinyali alındı...")
+            self.stop()
+        
+        def handle_pause(signum, frame):
+            if self.is_paused():
+                self.resume()
+            else:
+                self.pause()
+        
+        previous_handlers = {}
+        for signal_name, handler in (('SIGINT', handle_stop), ('SIGTERM', handle_stop),
+                                     ('SIGUSR1', handle_pause)):
+            signum = getattr(signal, signal_name, None)
+            if signum is not None:
+                previous_handlers[signum] = signal.signal(signum, handler)
+        return previous_handlers
+    
+    def _write_sinks(self, sinks, frame, frame_count, analysis, run):
+        """
+        Frame'i çıktılara ver
+        
+        Çizim yalnızca bu frame'i gerçekten kullanacak bir çıktı varsa yapılır
+        (pencere, yayın izleyicisi, kayıt veya bekleyen ekran görüntüsü).
+        """
+        if not sinks:
+            return
+        if analysis is not None and any(sink.needs_annotation for sink in sinks):
+            try:
+                frame = self._render_frame(frame, analysis, frame_count,
+                                           run.total_frames, run.is_video_file)
+            except Exception as e:
+                print(f" Çizim hatası: {e}")
+        for sink in sinks:
+            sink.write(frame, frame_count, analysis)
     
-    def process_camera_feed(self, camera_source=0, camera_name="Ana Kamera"):
-        """Kamera besleme işlemi - Video için geliştirilmiş"""
+    def _idle_sinks(self, sinks, delay_ms=30):
+        """Duraklatma/bekleme sırasında pencereyi canlı tut ya da uyu"""
+        pollers = [sink for sink in sinks if hasattr(sink, 'poll')]
+        if pollers:
+            for sink in pollers:
+                sink.poll(delay_ms)
+        else:
+            time.sleep(delay_ms / 1000.0)
+    
+    def process_camera_feed(self, camera_source=0, camera_name="Ana Kamera", options=None,
+                            **overrides):
+        """
+        Kamera besleme işlemi - Video için geliştirilmiş
         
-        # İstatistik değişkenleri
-        stats = {
-            'total_frames': 0,
-            'total_persons': 0,
-            'total_helmets': 0,
-            'persons_with_helmet': 0,
-            'persons_without_helmet': 0,
-            'total_vests': 0,
-            'total_goggles' : 0
-        }
+        options: FeedOptions; alanlar anahtar kelimeyle de verilebilir
+        (ör. process_camera_feed(0, headless=True, log_violations=True))
+        """
+        options = replace(options or FeedOptions(), **overrides)
         
-        # Video mu kamera mı kontrol et
-        is_video_file = isinstance(camera_source, str) and os.path.exists(camera_source)
+        # İstatistik değişkenleri
+        stats = self._new_run_stats()
         
-        print(f"Kaynak: {'Video Dosyası' if is_video_file else 'Kamera'}")
+        if options.detection_cache_size:
+            self.enable_detection_cache(options.detection_cache_size, options.cache_tolerance)
+        elif self.detection_cache is not None:
+            # Önceki çalıştırmanın kayıtları bu videoya/kameraya taşınmasın
+            self.detection_cache.clear()
         
-        cap = cv2.VideoCapture(camera_source)
+        if options.zone_config:
+            self.load_zone_config(options.zone_config)
         
-        if not cap.isOpened():
-            print(f" Kaynak açılamadı: {camera_source}")
+        cap, is_video_file, fps, total_frames, frame_delay = self._open_capture(camera_source)
+        if cap is None:
             return
         
-        # Video dosyası için ek ayarlar
-        if is_video_file:
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            frame_delay = int(1000 / fps) if fps > 0 else 33  # milisaniye
-            print(f" Video FPS: {fps}, Frame gecikme: {frame_delay}ms")
-            print(f" Toplam frame: {total_frames}")
-        else:
-            # Kamera ayarları
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-            cap.set(cv2.CAP_PROP_FPS, 30)
-            frame_delay = 1
-            total_frames = -1
+        # Kanıt kaydedici yalnızca ihlal kaydıyla birlikte kurulur, çalışma sonunda kapatılır
+        evidence_dir = self._evidence_dir_for_run(options.evidence_dir, options.log_violations)
+        if evidence_dir:
+            self.enable_evidence_capture(evidence_dir, options.evidence_quota_mb)
         
-        print(f" {camera_name} başlatıldı...")
-        print("Kontroller: 'q' = Çıkış, 's' = Ekran görüntüsü, 'p' = Duraklat")
+        # Video dosyası örnekleme adımı
+        sample_step = None
+        if options.analysis_fps and is_video_file and 0 < options.analysis_fps < fps:
+            sample_step = fps / options.analysis_fps
+            frame_delay = max(1, int(frame_delay * sample_step))
+            stats['sampled_frames'] = 0
+            print(f" Örnekleme: saniyede {options.analysis_fps} frame "
+                  f"({sample_step:.1f} frame'de bir)")
         
-        frame_count = 0
-        paused = False
+        scheduler = AdaptiveFrameScheduler(source_fps=fps / (sample_step or 1),
+                                           target_fps=options.target_fps,
+                                           latency_budget=options.latency_budget)
+        motion_gate = None
+        if options.motion_gating:
+            motion_gate = MotionGate(max_stale_frames=options.max_stale_frames)
+        if motion_gate is not None:
+            stats['skipped_frames'] = 0
+        track_persons = self._tracking_for_violations(options.log_violations, options.track_persons)
+        tracker = PersonTracker() if track_persons else None
         
-        while True:
-            if not paused:
-                ret, frame = cap.read()
+        debouncer = None
+        if options.log_violations:
+            debouncer = ViolationDebouncer(min_duration=options.min_violation_duration,
+                                           cooldown=options.violation_cooldown)
+        
+        # Kuyruklar + işlenen/çizilen/yayınlanan frame'ler için yeterli tampon
+        frame_buffer_count = options.frame_buffer_count
+        if frame_buffer_count is None:
+            frame_buffer_count = 8 if options.pipelined else 4
+        frame_buffers = FrameBufferRing(frame_buffer_count) if frame_buffer_count else None
+        
+        clip_recorder = None
+        if options.clip_dir and debouncer is not None:
+            clip_recorder = ClipRecorder(
+                camera_name, options.clip_dir, options.clip_pre_seconds, options.clip_post_seconds,
+                options.clip_fps,
+                on_saved=lambda path, row_ids: self._link_evidence_path(path, row_ids, 'clip_path'))
+        
+        run = CameraRunState(camera_name, stats, scheduler, motion_gate, tracker,
+                             is_video_file, fps, total_frames, debouncer, sample_step,
+                             frame_buffers, clip_recorder)
+        
+        self._snapshot_sink = SnapshotSink(camera_name)
+        sinks = list(options.output_sinks or []) + [self._snapshot_sink]
+        if options.stream_port:
+            server = self.start_stream_server(options.stream_port, options.stream_host)
+            sinks.append(server.sink(camera_name, frame_buffers))
+        if not options.headless:
+            sinks.insert(0, DisplaySink(self, camera_name, is_video_file,
+                                        1 if options.pipelined else frame_delay))
+        
+        self._stop_event.clear()
+        self._pause_event.clear()
+        previous_handlers = self.install_signal_handlers() if options.headless else {}
+        
+        print(f" {camera_name} başlatıldı...")
+        if options.headless:
+            print("Başsız mod: durdurmak için Ctrl+C / SIGTERM, duraklatmak için SIGUSR1")
+        else:
+            print("Kontroller: 'q' = Çıkış, 's' = Ekran görüntüsü, 'p' = Duraklat")
+        
+        try:
+            if options.pipelined:
+                self._run_pipeline(cap, run, sinks)
+            else:
+                frame_count = 0
+                sampler = self._sampled_frames(cap, sample_step, frame_buffers=frame_buffers) \
+                    if sample_step else None
                 
-                if not ret:
-                    if is_video_file:
-                        print(" Video sonu - Çıkılıyor...")
-                        break
+                while not self._stop_event.is_set():
+                    if self._pause_event.is_set():
+                        # Canlı yayında tampon eskimesin diye frame'leri boşalt
+                        if not is_video_file:
+                            cap.grab()
+                        self._idle_sinks(sinks)
+                        continue
+                    
+                    if sampler is not None:
+                        frame_count, frame = next(sampler, (frame_count, None))
+                        ret = frame is not None
+                    elif frame_buffers is not None:
+                        ret, frame = frame_buffers.read(cap.read)
+                        frame_count += 1
+                    else:
+                        ret, frame = cap.read()
+                        frame_count += 1
+                    
+                    if not ret:
+                        if is_video_file:
+                            print(" Video sonu - Çıkılıyor...")
+                            break
+                        else:
+                            print(" Kameradan görüntü alınamıyor!")
+                            break
+                    
+                    stats['total_frames'] = frame_count
+                    if sampler is not None:
+                        stats['sampled_frames'] += 1
+                    if clip_recorder is not None:
+                        clip_recorder.add(frame, run.timestamp(frame_count))
+                    
+                    # Adım, ölçülen çıkarım süresine göre uyarlanır
+                    analysis = None
+                    if scheduler.should_process():
+                        try:
+                            analysis = self._timed_analyze(frame, frame_count, run)
+                        except Exception as e:
+                            print(f" İşlem hatası: {e}")
+                    
+                    # Görüntüyü çıktılara ver (başsız modda çıktı yoksa çizim de yok)
+                    self._write_sinks(sinks, frame, frame_count, analysis, run)
+                    if frame_buffers is not None:
+                        frame_buffers.release(frame)
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+        
+        # Açık kalan ihlalleri kapat
+        if debouncer is not None:
+            for event in debouncer.flush(run.timestamp(stats['total_frames'])):
+                self._handle_violation_event(event, run)
+            self._collect_evidence_stats(stats)
+            if evidence_dir:
+                self.enable_evidence_capture(None)
+            if clip_recorder is not None:
+                clip_recorder.close()
+                stats['clips_written'] = clip_recorder.clips_written
+                stats['clip_ring_bytes'] = clip_recorder.ring_bytes
+                stats['clip_dropped'] = clip_recorder.dropped + clip_recorder.failed
+            self.close_database()
+        
+        if frame_buffers is not None:
+            stats['frame_buffers'] = frame_buffers.size
+            stats['frame_buffer_reused'] = frame_buffers.reused
+            stats['frame_buffer_allocated'] = frame_buffers.allocated
+            stats['frame_buffer_overruns'] = frame_buffers.overruns
+        
+        # İşlem sonunda istatistikleri göster
+        self._print_run_stats(stats)
+        
+        cap.release()
+        for sink in sinks:
+            sink.close()
+        print(" İşlem tamamlandı!")
+    
+    def _run_pipeline(self, cap, run, sinks, capture_queue_size=1, render_queue_size=2):
+        """
+        Yakalama -> tespit -> çıktı hattı
+        
+        - Yakalama thread'i: kaynaktan sürekli okur, kuyruk doluysa en eskiyi atar
+        - Tespit thread'i: her zaman en taze frame'i işler; adım gereği
+          çıkarım yapılmayan frame'ler son tespitlerle çıktıya geçer
+        - Çıktı (ana thread): çizim, pencere/diğer çıktılar
+        Kuyruklar sınırlı olduğu için yük altında gecikme birikmez.
+        """
+        stats = run.stats
+        camera_name = run.camera_name
+        is_video_file = run.is_video_file
+        fps = run.fps
+        scheduler = run.scheduler
+        stop_event = self._stop_event
+        pause_event = self._pause_event
+        
+        frame_buffers = run.frame_buffers
+        release_frame = (lambda item: frame_buffers.release(item[1])) if frame_buffers else None
+        capture_queue = LatestFrameQueue(maxsize=capture_queue_size, on_drop=release_frame)
+        render_queue = LatestFrameQueue(maxsize=render_queue_size, on_drop=release_frame)
+        capture_done = threading.Event()
+        inference_done = threading.Event()
+        
+        stats['latency_total'] = 0.0
+        stats['latency_samples'] = 0
+        stats['latency_max'] = 0.0
+        stats['stride_skipped_frames'] = 0
+        
+        def capture_loop():
+            sample_step = run.sample_step
+            sampler = self._sampled_frames(cap, sample_step, frame_buffers=frame_buffers) \
+                if sample_step else None
+            pacer = RealtimePacer((sample_step or 1) / fps if is_video_file and fps > 0 else 0)
+            frame_count = 0
+            try:
+                while not stop_event.is_set():
+                    if pause_event.is_set():
+                        if not is_video_file:
+                            cap.grab()
+                        else:
+                            time.sleep(0.05)
+                        pacer.reset()
+                        continue
+                    
+                    if sampler is not None:
+                        frame_count, frame = next(sampler, (frame_count, None))
+                        ret = frame is not None
+                    elif frame_buffers is not None:
+                        ret, frame = frame_buffers.read(cap.read)
+                        frame_count += 1
                     else:
-                        print(" Kameradan görüntü alınamıyor!")
+                        ret, frame = cap.read()
+                        frame_count += 1
+                    if not ret:
+                        if is_video_file:
+                            print(" Video sonu - Çıkılıyor...")
+                        else:
+                            print(" Kameradan görüntü alınamıyor!")
                         break
-                
-                frame_count += 1
-                stats['total_frames'] += 1
-                
-                # Her frame'i işle (performans için azaltılabilir)
-                if frame_count % 2 == 0:  # Her 2 frame'de bir işle
+                    
+                    stats['total_frames'] = frame_count
+                    if sampler is not None:
+                        stats['sampled_frames'] += 1
+                    if run.clip_recorder is not None:
+                        run.clip_recorder.add(frame, run.timestamp(frame_count))
+                    capture_queue.put((frame_count, frame, time.perf_counter()))
+                    
+                    # Video dosyasını gerçek zamanlı hızda oku
+                    pacer.wait()
+            finally:
+                capture_done.set()
+        
+        def inference_loop():
+            last_processed = 0
+            last_analysis = None
+            try:
+                while not stop_event.is_set():
+                    item = capture_queue.get(timeout=0.1)
+                    if item is None:
+                        if capture_done.is_set():
+                            break
+                        continue
+                    
+                    frame_count, frame, captured_at = item
+                    
+                    # Kuyrukta atlanan frame'ler de adıma sayılır; adım gereği
+                    # işlenmeyen frame son tespitlerle gösterilir
+                    skipped = frame_count - last_processed
+                    if skipped < scheduler.stride:
+                        stats['stride_skipped_frames'] += 1
+                        render_queue.put((frame_count, frame, captured_at, last_analysis))
+                        continue
+                    last_processed = frame_count
+                    
                     try:
-                        # Nesne tespiti
-                        detections = self.detect_objects(frame)
-                        
-                        # İstatistikleri güncelle
-                        current_persons = len(detections['persons'])
-                        current_helmets = len(detections['helmets'])
-                        current_vests = len(detections['vests'])
-                        current_goggles = len(detections.get('goggles', []))
-
-                        
-                        stats['total_persons'] += current_persons
-                        stats['total_helmets'] += current_helmets
-                        stats['total_vests'] += current_vests
-                        stats['total_goggles'] += current_goggles
- 
-                        
-                        # Baret uyumu kontrolü
-                        violations, safe_persons = self.check_safety_compliance(detections)
-                        
-                        # Güvenli ve ihlal sayılarını güncelle
-                        stats['persons_with_helmet'] += len(safe_persons)
-                        stats['persons_without_helmet'] += len(violations)
-                        
-                        # İstatistikler
-                        total_persons = len(detections['persons'])
-                        safe_count = len(safe_persons)
-                        violations_count = len(violations)
-                        
-                        # Anlık durumu yazdır
-                        if frame_count % 30 == 0:  # Her 30 frame'de bir güncelle
-                            print(f"\n Anlık Durum (Frame {frame_count}):")
-                            print(f" Tespit Edilen Kişi: {current_persons}")
-                            print(f" Tespit Edilen Baret: {current_helmets}")
-                            print(f" Tespit Edilen Yelek: {current_vests}")
-                            print(f" Baretli Kişi: {len(safe_persons)}")
-                            print(f" Baretsiz Kişi: {len(violations)}")
-                            print(f" Tespit Edilen Gözlük: {current_goggles}")
-
-                        
-                        # Çizimleri yap
-                        frame = self.draw_detections(frame, detections, violations, safe_persons)
-                        frame = self.add_info_panel(frame, violations_count, safe_count, total_persons)
-                        
-                        # Video için ilerleme bilgisi
-                        if is_video_file and total_frames > 0:
-                            progress = (frame_count / total_frames) * 100
-                            cv2.putText(frame, f"İlerleme: %{progress:.1f}", 
-                                      (10, frame.shape[0] - 10), 
-                                      cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                        
+                        last_analysis = self._timed_analyze(frame, frame_count, run)
                     except Exception as e:
                         print(f" İşlem hatası: {e}")
-            
-            # Görüntüyü göster
-            cv2.imshow(f" İş Güvenliği - {camera_name}", frame)
-            
-            # Klavye kontrolü
-            key = cv2.waitKey(frame_delay) & 0xFF
-            if key == ord('q'):
-                print(" Çıkılıyor...")
+                        if release_frame:
+                            release_frame(item)
+                        continue
+                    render_queue.put((frame_count, frame, captured_at, last_analysis))
+            finally:
+                inference_done.set()
+        
+        threads = [
+            threading.Thread(target=capture_loop, name=f"{camera_name}-capture", daemon=True),
+            threading.Thread(target=inference_loop, name=f"{camera_name}-inference", daemon=True)
+        ]
+        for thread in threads:
+            thread.start()
+        
+        # Çıktı aşaması: OpenCV penceresi ana thread'de kalmalı
+        while not stop_event.is_set():
+            item = render_queue.get(timeout=0.03)
+            if item is not None:
+                frame_count, frame, captured_at, analysis = item
+                self._write_sinks(sinks, frame, frame_count, analysis, run)
+                if release_frame:
+                    release_frame(item)
+                
+                latency = time.perf_counter() - captured_at
+                stats['latency_total'] += latency
+                stats['latency_samples'] += 1
+                stats['latency_max'] = max(stats['latency_max'], latency)
+            elif inference_done.is_set():
                 break
-            elif key == ord('s'):
-                # Ekran görüntüsü kaydet
-                os.makedirs("screenshots", exist_ok=True)
-                timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-                screenshot_path = f"screenshots/{camera_name}_{timestamp}.jpg"
-                cv2.imwrite(screenshot_path, frame)
-                print(f" Kaydedildi: {screenshot_path}")
-            elif key == ord('p'):
-                # Duraklat/Devam et (sadece video için)
-                if is_video_file:
-                    paused = not paused
-                    print("Duraklatıldı" if paused else " Devam")
+            else:
+                for sink in sinks:
+                    if hasattr(sink, 'poll'):
+                        sink.poll(1)
         
-        # İşlem sonunda istatistikleri göster
-        print("\n TOPLAM İSTATİSTİKLER:")
-        print("=" * 40)
-        print(f"Toplam Frame: {stats['total_frames']}")
-        print(f" Toplam Tespit Edilen Kişi: {stats['total_persons']}")
-        print(f" Toplam Tespit Edilen Baret: {stats['total_helmets']}")
-        print(f" Toplam Tespit Edilen Yelek: {stats['total_vests']}")
-        print(f" Toplam Baretli Kişi Tespiti: {stats['persons_with_helmet']}")
-        print(f" Toplam Baretsiz Kişi Tespiti: {stats['persons_without_helmet']}")
-        print(f" Toplam Tespit Edilen Gözlük: {stats['total_goggles']}")
-
+        stop_event.set()
+        for thread in threads:
+            thread.join(timeout=2)
         
-        if stats['total_persons'] > 0:
-            helmet_rate = (stats['persons_with_helmet'] / stats['total_persons']) * 100
-            print(f" Baret Kullanım Oranı: %{helmet_rate:.2f}")
+        # Yalnızca kuyruk taşmaları; adım gereği çıkarımsız frame'ler ayrı sayılır
+        stats['dropped_frames'] = capture_queue.dropped + render_queue.dropped
+
+    def analyze_video_offline(self, video_path, output_path=None, batch_size=8, num_decoders=None,
+                              progress_interval=2.0, analysis_fps=None):
+        """
+        Kayıtlı videoyu bekleme ve çizim olmadan en yüksek hızda analiz et
         
+        Video num_decoders parçaya bölünür; her parçayı ayrı bir thread
+        önceden çözer, tespit toplu (batch) yapılır. Her frame için tespitler
+        ve ihlaller kompakt JSON satırı olarak output_path'e yazılır:
+          ilk satır: {"video", "fps", "frames", "classes"}
+          sonraki:   {"f": frame no, "t": saniye, "d": [[x1,y1,x2,y2,güven,sınıf],...],
+                      "v": [[kişi no, [ihlal türleri]],...], "s": uyumlu kişi sayısı}
+        analysis_fps: saniyede yalnızca bu kadar frame çözülür (bkz. _sampled_frames)
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            print(f" Video açılamadı: {video_path}")
+            return None
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         cap.release()
-        cv2.destroyAllWindows()
-        print(" İşlem tamamlandı!")
-
+        
+        if output_path is None:
+            os.makedirs("results", exist_ok=True)
+            video_name = os.path.splitext(os.path.basename(video_path))[0]
+            output_path = f"results/{video_name}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        
+        # Frame sayısı bilinmiyorsa parçalara bölünemez, tek çözücü kullanılır
+        if total_frames <= 0:
+            num_decoders = 1
+        num_decoders = max(1, min(num_decoders or min(4, os.cpu_count() or 1),
+                                  max(1, total_frames // (batch_size * 4))))
+        segment_length = math.ceil(total_frames / num_decoders) if total_frames > 0 else None
+        sample_step = fps / analysis_fps if analysis_fps and 0 < analysis_fps < fps else 1
+        expected_frames = math.ceil(total_frames / sample_step) if total_frames > 0 else 0
+        
+        frame_queue = queue.Queue(maxsize=batch_size * 4)
+        stop_event = self._stop_event
+        stop_event.clear()
+        
+        def decode_segment(segment_id):
+            segment_cap = cv2.VideoCapture(video_path)
+            start = segment_id * segment_length if segment_length else 0
+            end = min(start + segment_length, total_frames) if segment_length else None
+            if start:
+                segment_cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            try:
+                for frame_index, frame in self._sampled_frames(segment_cap, sample_step, start, end):
+                    if stop_event.is_set():
+                        break
+                    frame_queue.put((segment_id, frame_index, frame))
+            finally:
+                segment_cap.release()
+                frame_queue.put((segment_id, None, None))
+        
+        decoders = [threading.Thread(target=decode_segment, args=(segment_id,),
+                                     name=f"decoder-{segment_id}", daemon=True)
+                    for segment_id in range(num_decoders)]
+        for decoder in decoders:
+            decoder.start()
+        
+        part_paths = [f"{output_path}.part{segment_id}" for segment_id in range(num_decoders)]
+        part_files = [open(path, 'w', encoding='utf-8') for path in part_paths]
+        stats = self._new_run_stats()
+        processed = 0
+        finished_decoders = 0
+        started_at = time.perf_counter()
+        last_progress = started_at
+        
+        print(f" Hızlı analiz: {video_path} ({total_frames} frame, {num_decoders} çözücü, "
+              f"batch {batch_size})")
+        if sample_step > 1:
+            print(f" Örnekleme: saniyede {analysis_fps} frame ({expected_frames} frame çözülecek)")
+        
+        try:
+            while finished_decoders < num_decoders and not stop_event.is_set():
+                # İlk frame'i bekle, batch'i kuyrukta hazır olanlarla doldur
+                batch = [frame_queue.get()]
+                while len(batch) < batch_size:
+                    try:
+                        batch.append(frame_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                
+                items = []
+                for item in batch:
+                    if item[1] is None:
+                        finished_decoders += 1
+                    else:
+                        items.append(item)
+                if not items:
+                    continue
+                
+                detections_list = self.detect_objects_batch([frame for _, _, frame in items],
+                                                            max_batch_size=batch_size)
+                
+                for (segment_id, frame_index, _), detections in zip(items, detections_list):
+                    violations, safe_persons = self.check_safety_compliance(detections)
+                    self._update_frame_stats(stats, {'detections': detections,
+                                                     'violations': violations,
+                                                     'safe_persons': safe_persons})
+                    
+                    boxes = np.column_stack([detections.xyxy, detections.confidences]).astype(np.float64).round(2)
+                    person_types = self._violation_types_by_person(violations, safe_persons)
+                    record = {
+                        'f': frame_index,
+                        't': round(frame_index / fps, 3),
+                        'd': [row + [class_id] for row, class_id in
+                              zip(boxes.tolist(), detections.class_ids.tolist())],
+                        'v': [[int(person_id), sorted(types)] for person_id, types in person_types.items()],
+                        's': len(safe_persons)
+                    }
+                    part_files[segment_id].write(json.dumps(record, separators=(',', ':')) + '\n')
+                
+                processed += len(items)
+                stats['total_frames'] = processed
+                if sample_step > 1:
+                    stats['sampled_frames'] = processed
+                
+                now = time.perf_counter()
+                if now - last_progress >= progress_interval:
+                    last_progress = now
+                    rate = processed / (now - started_at)
+                    if expected_frames > 0:
+                        remaining = (expected_frames - processed) / max(rate, 1e-6)
+                        print(f" İlerleme: %{processed / expected_frames * 100:.1f} ({processed}/{expected_frames}) - "
+                              f"{rate:.1f} frame/s, kalan ~{remaining:.0f} s")
+                    else:
+                        print(f" İlerleme: {processed} frame - {rate:.1f} frame/s")
+        except KeyboardInterrupt:
+            print(" Analiz durduruldu!")
+        finally:
+            stop_event.set()
+            # Kuyrukta bekleyen çözücüleri serbest bırak
+            while any(decoder.is_alive() for decoder in decoders):
+                try:
+                    frame_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            for part_file in part_files:
+                part_file.close()
+        
+        # Parçaları frame sırasıyla tek dosyada birleştir
+        with open(output_path, 'w', encoding='utf-8') as output:
+            header = {'video': video_path, 'fps': fps, 'frames': processed,
+                      'classes': self.class_names_lower}
+            output.write(json.dumps(header, ensure_ascii=False, separators=(',', ':')) + '\n')
+            for path in part_paths:
+                with open(path, 'r', encoding='utf-8') as part_file:
+                    shutil.copyfileobj(part_file, output)
+                os.remove(path)
+        
+        elapsed = time.perf_counter() - started_at
+        self._print_run_stats(stats)
+        print(f" Analiz süresi: {elapsed:.1f} s ({processed / max(elapsed, 1e-6):.1f} frame/s, "
+              f"video süresinin {processed * sample_step / fps / max(elapsed, 1e-6):.1f} katı hız)")
+        print(f" Sonuçlar kaydedildi: {output_path}")
+        return output_path
+    
+    def run_camera_pool(self, cameras, num_workers=None, track_persons=False, log_violations=True,
+                        min_violation_duration=2.0, violation_cooldown=10.0, realtime=True,
+                        ring_slots=4, max_batch_size=8, status_interval=5.0, evidence_dir=None,
+                        evidence_quota_mb=500, zone_config=None):
+        """
+        Kameraları çok süreçli havuzda işle
+        
+        cameras: {kamera_adı: kaynak}; frame'ler paylaşılan bellek halkalarıyla
+        num_workers çıkarım sürecine gider, kayıt ve istatistik bu süreçte tutulur.
+        Bölge / KKD kuralları ve karo ayarları süreçlere aktarılır.
+        """
+        evidence_dir = self._evidence_dir_for_run(evidence_dir, log_violations)
+        if evidence_dir:
+            self.enable_evidence_capture(evidence_dir, evidence_quota_mb)
+        if zone_config:
+            self.load_zone_config(zone_config)
+        track_persons = self._tracking_for_violations(log_violations, track_persons)
+        
+        context = multiprocessing.get_context('spawn')
+        cpu_count = os.cpu_count() or 1
+        num_workers = max(1, min(num_workers or cpu_count, len(cameras)))
+        
+        stop_event = context.Event()
+        control_queue = context.Queue()
+        result_queue = context.Queue()
+        
+        # 1) Yakalama süreçleri
+        capture_processes = [
+            context.Process(target=_camera_capture_process, name=f"{name}-capture", daemon=True,
+                            args=(name, source, ring_slots, control_queue, stop_event, realtime))
+            for name, source in cameras.items()
+        ]
+        for process in capture_processes:
+            process.start()
+        
+        rings = {}
+        runs = {}
+        worker_processes = []
+        previous_handlers = {}
+        open_entries = {}  # (kamera, (kişi, tür)) -> aktif ihlalin kayıt bilgisi
+        worker_frames = collections.Counter()
+        started_at = time.monotonic()
+        processed = 0
+        
+        try:
+            pending = set(cameras)
+            deadline = time.monotonic() + 15
+            while pending and time.monotonic() < deadline:
+                try:
+                    message = control_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                pending.discard(message[1])
+                if message[0] == 'error':
+                    print(f" {message[1]}: {message[2]}")
+                    continue
+                _, name, descriptor, fps, is_video_file = message
+                rings[name] = SharedFrameRing.attach(**descriptor)
+                stats = self._new_run_stats()
+                stats.update({'inferred_frames': 0, 'latency_total': 0.0, 'latency_samples': 0,
+                              'latency_max': 0.0, 'batch_inference_total': 0.0})
+                runs[name] = CameraRunState(name, stats, None, is_video_file=is_video_file, fps=fps)
+            
+            if not rings:
+                print(" Hiçbir kamera açılamadı!")
+                if evidence_dir:
+                    self.enable_evidence_capture(None)
+                return {}
+            
+            # 2) Çıkarım süreçleri - kameralar sırayla dağıtılır
+            assignments = [{} for _ in range(min(num_workers, len(rings)))]
+            for index, (name, ring) in enumerate(rings.items()):
+                assignments[index % len(assignments)][name] = {
+                    'ring': ring.descriptor(),
+                    'fps': runs[name].fps,
+                    'is_video_file': runs[name].is_video_file,
+                    'zones': self.camera_zones.get(name),
+                    'tiling': self.camera_tiling.get(name)
+                }
+            
+            detector_args = {'model_path': self.model_path, 'database_path': self.database_path,
+                             'backend': self.backend, 'int8': self.int8,
+                             'data_yaml_path': self.data_yaml_path}
+            debouncer_args = None
+            if log_violations:
+                debouncer_args = {'min_duration': min_violation_duration,
+                                  'cooldown': violation_cooldown}
+            capture_evidence = log_violations and self.evidence_store is not None
+            num_threads = max(1, cpu_count // len(assignments))
+            worker_processes = [
+                context.Process(target=_camera_worker_process, name=f"camera-worker-{worker_id}",
+                                daemon=True,
+                                args=(worker_id, assigned, detector_args, self.confidence_threshold,
+                                      result_queue, stop_event, num_threads, track_persons,
+                                      max_batch_size, debouncer_args, capture_evidence))
+                for worker_id, assigned in enumerate(assignments)
+            ]
+            for process in worker_processes:
+                process.start()
+            
+            print(f" Kamera havuzu: {len(rings)} kamera, {len(worker_processes)} çıkarım süreci")
+            print("Durdurmak için Ctrl+C / SIGTERM")
+            
+            # 3) Toplayıcı: kayıt ve istatistikler yalnızca burada
+            self._stop_event.clear()
+            previous_handlers = self.install_signal_handlers()
+            started_at = time.monotonic()
+            last_status = started_at
+            
+            while True:
+                if self._stop_event.is_set():
+                    stop_event.set()
+                try:
+                    result = result_queue.get(timeout=0.2)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in worker_processes):
+                        break
+                    continue
+                
+                name = result['camera']
+                run = runs[name]
+                stats = run.stats
+                analysis = result['analysis']
+                
+                stats['total_frames'] = result['frame_index']
+                stats['inferred_frames'] += 1
+                latency = time.time() - result['captured_at']
+                stats['latency_total'] += latency
+                stats['latency_samples'] += 1
+                stats['latency_max'] = max(stats['latency_max'], latency)
+                stats['batch_inference_total'] += result['inference_time']
+                
+                self._update_frame_stats(stats, analysis, result['tracker'])
+                if result['tiled_frames'] is not None:
+                    stats['tiled_frames'] = result['tiled_frames']
+                
+                if result['events']:
+                    # Süreçteki durum makinesinin olayları; bitişler başlangıçtaki kayda bağlanır
+                    events = []
+                    for event in result['events']:
+                        key = (name, event['key'])
+                        if event['event'] == 'start':
+                            entry = open_entries[key] = {'confidence': event['confidence'],
+                                                         'row_id': None}
+                        else:
+                            entry = open_entries.pop(key, None)
+                            if entry is None:
+                                continue
+                        events.append({'event': event['event'], 'key': event['key'], 'entry': entry})
+                    bboxes = {event['key'][0]: event['bbox'] for event in result['events']}
+                    self._record_violation_events(events, run, result['timestamp'], bboxes,
+                                                  lambda: result['evidence_frame'])
+                
+                worker_frames[result['worker']] += 1
+                processed += 1
+                
+                now = time.monotonic()
+                if now - last_status >= status_interval:
+                    last_status = now
+                    per_camera = ", ".join(f"{name}: {run.stats['inferred_frames']}"
+                                           for name, run in runs.items())
+                    print(f" Havuz verimi: {processed / (now - started_at):.1f} frame/s ({per_camera})")
+        finally:
+            stop_event.set()
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+            for process in worker_processes + capture_processes:
+                process.join(timeout=5)
+            
+            # Bekleme süresinden sonra açılan kameraların halkaları da silinmeli
+            while True:
+                try:
+                    message = control_queue.get(timeout=0.2)
+                except queue.Empty:
+                    break
+                if message[0] == 'ready' and message[1] not in rings:
+                    try:
+                        rings[message[1]] = SharedFrameRing.attach(**message[2])
+                    except FileNotFoundError:
+                        pass
+            for ring in rings.values():
+                ring.close()
+                ring.unlink()
+        
+        elapsed = time.monotonic() - started_at
+        
+        # Açık kalan ihlalleri kapat
+        for (name, key), entry in open_entries.items():
+            self._handle_violation_event({'event': 'end', 'key': key, 'entry': entry}, runs[name])
+        evidence_stats = {}
+        self._collect_evidence_stats(evidence_stats)
+        if evidence_dir:
+            self.enable_evidence_capture(None)
+        self.close_database()
+        
+        for name, run in runs.items():
+            stats = run.stats
+            stats['dropped_frames'] = stats['total_frames'] - stats['inferred_frames']
+            print(f"\n === {name} ===")
+            self._print_run_stats(stats)
+        
+        print(f"\n Havuz Toplamı: {processed} frame, {elapsed:.1f} s, "
+              f"{processed / max(elapsed, 1e-6):.1f} frame/s")
+        for worker_id, count in sorted(worker_frames.items()):
+            print(f"   Süreç {worker_id}: {count} frame")
+        if evidence_stats:
+            print(f" İhlal Kanıtı: {evidence_stats['evidence_saved']} kayıt, "
+                  f"{evidence_stats['evidence_bytes'] / 2**20:.1f} MB")
+        
+        return {name: run.stats for name, run in runs.items()}
+    
     def get_violation_report(self, days=7):
         """İhlal raporu al"""
         try:
@@ -893,6 +4241,363 @@ class HelmetDetectionSystem:
             print(f" Rapor hatası: {e}")
             return []
 
+# Çok süreçli kamera havuzu (bkz. HelmetDetectionSystem.run_camera_pool)
+def _camera_capture_process(camera_name, camera_source, ring_slots, control_queue,
+                            stop_event, realtime):
+    """Yakalama süreci: kaynağı okuyup paylaşılan bellek halkasına yazar"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Durdurma ana süreçten gelir
+    cv2.setNumThreads(1)
+    
+    cap = cv2.VideoCapture(camera_source)
+    ret, frame = cap.read() if cap.isOpened() else (False, None)
+    if not ret:
+        control_queue.put(('error', camera_name, f"Kaynak açılamadı: {camera_source}"))
+        cap.release()
+        return
+    
+    is_video_file = isinstance(camera_source, str) and os.path.exists(camera_source)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    ring = SharedFrameRing.create(frame.shape, ring_slots)
+    control_queue.put(('ready', camera_name, ring.descriptor(), fps, is_video_file))
+    
+    pacer = RealtimePacer(1.0 / fps if is_video_file and realtime else 0)
+    try:
+        while ret and not stop_event.is_set():
+            ring.write(frame, time.time())
+            
+            # Video dosyasını gerçek zamanlı hızda oku
+            pacer.wait()
+            ret, frame = cap.read()
+    finally:
+        ring.mark_closed()
+        ring.close()
+        cap.release()
+
+def _camera_worker_process(worker_id, cameras, detector_args, confidence_threshold,
+                           result_queue, stop_event, num_threads, track_persons, max_batch_size,
+                           debouncer_args=None, capture_evidence=False):
+    """
+    Çıkarım süreci: atanan kameraların en son frame'lerini toplu işler
+    
+    İhlal durum makinesi de burada çalışır; toplayıcıya yalnızca başlangıç /
+    bitiş olayları, kanıt için de ihlalin başladığı frame'in kopyası gider.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    cv2.setNumThreads(1)
+    try:
+        # Süreçler çekirdekleri paylaşır, her biri kendi payı kadar thread kullanır
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+    
+    detector = HelmetDetectionSystem(**detector_args)
+    detector.confidence_threshold = confidence_threshold
+    
+    rings = {}
+    runs = {}
+    for name, camera in cameras.items():
+        rings[name] = SharedFrameRing.attach(**camera['ring'])
+        runs[name] = CameraRunState(
+            name, {}, None, tracker=PersonTracker() if track_persons else None,
+            is_video_file=camera['is_video_file'], fps=camera['fps'],
+            debouncer=ViolationDebouncer(**debouncer_args) if debouncer_args is not None else None)
+        if camera['zones']:
+            detector.camera_zones[name] = camera['zones']
+        if camera['tiling'] is not None:
+            detector.camera_tiling[name] = camera['tiling']
+    buffers = {name: np.empty(ring.shape, dtype=np.uint8) for name, ring in rings.items()}
+    last_seq = {name: 0 for name in rings}
+    
+    try:
+        while rings and not stop_event.is_set():
+            batch = {}
+            for name, ring in list(rings.items()):
+                item = ring.read_latest(last_seq[name], buffers[name])
+                if item is not None:
+                    batch[name] = item
+                elif ring.closed and ring.last_seq == last_seq[name]:
+                    # Kaynak bitti ve son frame işlendi
+                    ring.close()
+                    del rings[name]
+            
+            if not batch:
+                time.sleep(0.002)
+                continue
+            
+            started = time.perf_counter()
+            tiling_counts = {}
+            # Bölgesiz kameralar tek batch'te; bölgeli kameralar kendi kesitleriyle
+            detections = detector.detect_objects_batch(
+                {name: item[2] for name, item in batch.items() if name not in detector.camera_zones},
+                max_batch_size)
+            for name, (_, _, frame) in batch.items():
+                zones = detector.camera_zones.get(name)
+                tiling = detector.camera_tiling.get(name)
+                if zones:
+                    detections[name] = detector.detect_objects_in_zones(frame, zones)
+                elif tiling is not None:
+                    if tiling.should_tile(detections[name], frame.shape):
+                        detections[name] = detector._detect_tiles(frame, detections[name], tiling)
+                    tiling_counts[name] = tiling.tiled_frames
+            inference_time = time.perf_counter() - started
+            
+            for name, (seq, captured_at, frame) in batch.items():
+                last_seq[name] = seq
+                run = runs[name]
+                zones = detector.camera_zones.get(name)
+                violations, safe_persons = detector._check_compliance(
+                    detections[name], run.tracker, zones, frame.shape)
+                analysis = {
+                    'detections': detections[name],
+                    'violations': violations,
+                    'safe_persons': safe_persons,
+                    'zones': None,
+                    'inferred': True
+                }
+                
+                timestamp = run.timestamp(seq)
+                events = []
+                evidence_frame = None
+                if run.debouncer is not None:
+                    observations, bboxes = detector._violation_observations(analysis)
+                    for event in run.debouncer.update(observations, timestamp):
+                        events.append({'event': event['event'], 'key': event['key'],
+                                       'confidence': event['entry']['confidence'],
+                                       'bbox': bboxes.get(event['key'][0])})
+                    if capture_evidence and any(event['event'] == 'start' for event in events):
+                        # Tampon sonraki okumada üzerine yazılır
+                        evidence_frame = frame.copy()
+                
+                result_queue.put({
+                    'camera': name,
+                    'frame_index': seq,
+                    'timestamp': timestamp,
+                    'captured_at': captured_at,
+                    'worker': worker_id,
+                    'inference_time': inference_time,
+                    'tracker': run.tracker.counts() if run.tracker is not None else None,
+                    'tiled_frames': tiling_counts.get(name),
+                    'analysis': analysis,
+                    'events': events,
+                    'evidence_frame': evidence_frame
+                })
+    finally:
+        for ring in rings.values():
+            ring.close()
+
+# Çıkarım arka uçları
+def export_model(model_path, backend='onnx', int8=False, img_size=640, data_yaml_path=None):
+    """
+    .pt modelini seçilen CPU arka ucuna dönüştür
+    
+    Dönüştürülmüş dosya .pt'den yeniyse tekrar dışa aktarılmaz. Modeller
+    dinamik batch boyutuyla dışa aktarılır (detect_objects_batch için).
+    onnx + int8: ONNX Runtime dinamik nicemleme (kalibrasyon verisi gerekmez)
+    openvino + int8: NNCF nicemleme, kalibrasyon için data_yaml_path gereklidir
+    Dönüş: yüklenebilir model yolu (hata durumunda None)
+    """
+    if backend not in INFERENCE_BACKENDS:
+        print(f" Bilinmeyen arka uç: {backend} (seçenekler: {', '.join(INFERENCE_BACKENDS)})")
+        return None
+    if backend == 'pytorch':
+        return model_path
+    
+    base = os.path.splitext(model_path)[0]
+    if backend == 'onnx':
+        target = base + ('_int8.onnx' if int8 else '.onnx')
+    else:
+        target = base + ('_int8' if int8 else '') + '_openvino_model'
+    
+    if os.path.exists(target) and (not os.path.exists(model_path) or
+                                   os.path.getmtime(target) >= os.path.getmtime(model_path)):
+        return target
+    
+    if backend == 'openvino' and int8 and not data_yaml_path:
+        # Ultralytics veri verilmezse coco8 ile kalibre eder; KKD sınıfları için uygun değil
+        print(" OpenVINO INT8 için kalibrasyon verisi gerekli: data_yaml_path ile kendi "
+              "veri setinizin data.yaml dosyasını verin")
+        return None
+    
+    try:
+        print(f" Model dışa aktarılıyor: {model_path} -> {backend}{' (INT8)' if int8 else ''}")
+        model = YOLO(model_path)
+        
+        if backend == 'onnx':
+            exported = model.export(format='onnx', imgsz=img_size, simplify=True, dynamic=True)
+            if int8:
+                from onnxruntime.quantization import quantize_dynamic, QuantType
+                quantize_dynamic(exported, target, weight_type=QuantType.QUInt8)
+                exported = target
+        else:
+            export_args = {'format': 'openvino', 'imgsz': img_size, 'int8': int8, 'dynamic': True}
+            if int8:
+                export_args['data'] = data_yaml_path
+            exported = model.export(**export_args)
+        
+        print(f" Dışa aktarıldı: {exported}")
+        return str(exported)
+        
+    except Exception as e:
+        print(f" Dışa aktarma hatası: {e}")
+        return None
+
+def load_detection_model(model_path, backend='pytorch', int8=False, data_yaml_path=None):
+    """
+    Modeli seçilen arka uçla yükle
+    
+    Tüm arka uçlar Ultralytics üzerinden çalıştığı için sonuç nesneleri
+    (boxes, names) aynıdır; tespit kodunda değişiklik gerekmez.
+    """
+    if YOLO is None:
+        raise ImportError("ultralytics kurulu değil: pip install ultralytics")
+    path = export_model(model_path, backend, int8, data_yaml_path=data_yaml_path)
+    if path is None:
+        raise RuntimeError(f"{backend} modeli hazırlanamadı")
+    if backend == 'pytorch':
+        return YOLO(path)
+    return YOLO(path, task='detect')
+
+def _match_detections(reference, candidate, iou_threshold=0.5):
+    """Aynı sınıftaki kutuları IoU ile eşle - (eşleşen sayısı, güven farkları)"""
+    matched = 0
+    confidence_diffs = []
+    for class_id in np.unique(reference[:, 5]) if len(reference) else []:
+        ref = reference[reference[:, 5] == class_id]
+        cand = candidate[candidate[:, 5] == class_id]
+        if len(cand) == 0:
+            continue
+        iou = PersonTracker._iou_matrix(ref[:, :4], cand[:, :4])
+        used = set()
+        for i in np.argsort(-ref[:, 4]):
+            for j in np.argsort(-iou[i]):
+                if iou[i, j] < iou_threshold:
+                    break
+                if j not in used:
+                    used.add(j)
+                    matched += 1
+                    confidence_diffs.append(abs(ref[i, 4] - cand[j, 4]))
+                    break
+    return matched, confidence_diffs
+
+def benchmark_backends(model_path, video_path, configs=None, num_frames=100,
+                       confidence=0.3, data_yaml_path=None, batch_size=4):
+    """
+    Arka uçları aynı frame'ler üzerinde karşılaştır
+    
+    Gecikme (ortalama / p95) ve PyTorch sonuçlarına göre doğruluk
+    (eşleşme oranı, fazladan tespit, ortalama güven farkı) raporlanır.
+    batch_size frame'lik toplu çağrılar da ölçülür (detect_objects_batch yolu);
+    toplu girdiyi desteklemeyen model tabloda hata olarak görünür.
+    configs: [(arka_uç, int8), ...] - varsayılan tüm seçenekler
+    """
+    if configs is None:
+        configs = [('pytorch', False), ('onnx', False), ('onnx', True),
+                   ('openvino', False), ('openvino', True)]
+        if not data_yaml_path:
+            # Kalibrasyon verisi olmadan INT8 doğruluğu anlamsız olur
+            print(" data_yaml_path verilmedi - OpenVINO INT8 karşılaştırması atlanıyor")
+            configs.remove(('openvino', True))
+    
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while cap.isOpened() and len(frames) < num_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    
+    if not frames:
+        print(f" Video okunamadı: {video_path}")
+        return []
+    
+    print(f" Arka uç karşılaştırması: {len(frames)} frame")
+    reference = None
+    report = []
+    
+    for backend, int8 in configs:
+        name = backend + (' INT8' if int8 else '')
+        try:
+            # Kayıt modeli aynı frame boyutuyla ısıtır; ilk çağrılar ölçüme katılmaz
+            model = MODEL_REGISTRY.get(model_path, backend, int8, data_yaml_path,
+                                       warmup_runs=3, warmup_shape=frames[0].shape[:2])['model']
+            
+            latencies = []
+            outputs = []
+            for frame in frames:
+                started = time.perf_counter()
+                results = model(frame, conf=confidence, verbose=False)
+                latencies.append(time.perf_counter() - started)
+                boxes = results[0].boxes
+                outputs.append(boxes.data.cpu().numpy()[:, [0, 1, 2, 3, -2, -1]]
+                               if boxes is not None and len(boxes) else np.zeros((0, 6)))
+        except Exception as e:
+            print(f" {name} çalıştırılamadı: {e}")
+            report.append({'backend': name, 'error': str(e)})
+            continue
+        
+        # Toplu çağrı: ilk çağrı ısınma, sonrakiler frame başına süre olarak ölçülür
+        batch_latencies = []
+        batch_error = None
+        chunks = [frames[start:start + batch_size]
+                  for start in range(0, len(frames) - batch_size + 1, batch_size)]
+        try:
+            for index, chunk in enumerate(chunks):
+                started = time.perf_counter()
+                batch_results = model(chunk, conf=confidence, verbose=False)
+                if index:
+                    batch_latencies.append((time.perf_counter() - started) / len(chunk))
+                if len(batch_results) != len(chunk):
+                    raise RuntimeError(f"{len(chunk)} frame için {len(batch_results)} sonuç")
+        except Exception as e:
+            print(f" {name} toplu çağrı hatası: {e}")
+            batch_error = str(e)
+        
+        if reference is None:
+            reference = outputs
+        
+        ref_total = sum(len(r) for r in reference)
+        pred_total = sum(len(o) for o in outputs)
+        matched = 0
+        confidence_diffs = []
+        for ref, out in zip(reference, outputs):
+            frame_matched, frame_diffs = _match_detections(ref, out)
+            matched += frame_matched
+            confidence_diffs.extend(frame_diffs)
+        
+        latencies = np.array(latencies) * 1000
+        report.append({
+            'backend': name,
+            'mean_ms': float(latencies.mean()),
+            'p95_ms': float(np.percentile(latencies, 95)),
+            'fps': float(1000 / latencies.mean()),
+            'batch_ms': float(np.mean(batch_latencies) * 1000) if batch_latencies else None,
+            'batch_error': batch_error,
+            'recall': matched / ref_total if ref_total else 1.0,
+            'precision': matched / pred_total if pred_total else 1.0,
+            'confidence_diff': float(np.mean(confidence_diffs)) if confidence_diffs else 0.0
+        })
+    
+    print(f"\n {'Arka uç':<14}{'Ort. ms':>9}{'p95 ms':>9}{'FPS':>8}{'Toplu ms':>10}"
+          f"{'Eşleşme':>10}{'Kesinlik':>10}{'Güven Δ':>9}")
+    print("-" * 79)
+    for row in report:
+        if 'error' in row:
+            print(f" {row['backend']:<14} hata: {row['error']}")
+            continue
+        if row['batch_error']:
+            batch = "hata"
+        else:
+            batch = f"{row['batch_ms']:.1f}" if row['batch_ms'] is not None else "-"
+        print(f" {row['backend']:<14}{row['mean_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['fps']:>8.1f}"
+              f"{batch:>10}{row['recall']:>10.1%}{row['precision']:>10.1%}"
+              f"{row['confidence_diff']:>9.3f}")
+    print(f" (Toplu ms: {batch_size} frame'lik çağrıda frame başına süre; "
+          f"doğruluk ilk çalışan arka uca göredir)")
+    
+    return report
+
 # Hızlı başlatma fonksiyonları
 def quick_start_with_roboflow_dataset():
     """Roboflow veri seti ile hızlı başlatma"""
@@ -992,8 +4697,12 @@ def generate_safety_report():
     print("\n=== AYLIK RAPOR ===")
     detector.get_violation_report(days=30)
 
-def demo_with_video_file(video_path):
-    """Video dosyası ile özel modelle demo - Geliştirilmiş hata kontrolü"""
+def demo_with_video_file(video_path, offline=False):
+    """
+    Video dosyası ile özel modelle demo - Geliştirilmiş hata kontrolü
+    
+    offline=True: görüntüsüz, beklemesiz hızlı analiz (sonuçlar results/ altına)
+    """
     print(f" Video ile demo: {video_path}")
     
     # Model yolu kontrolü
@@ -1055,42 +4764,49 @@ def demo_with_video_file(video_path):
     
     # Tespit sistemini başlat - Özel model ile
     detector = HelmetDetectionSystem(model_path=model_path)
-    detector.process_camera_feed(camera_source=video_path, camera_name="Video Demo")
+    if offline:
+        detector.analyze_video_offline(video_path)
+    else:
+        detector.process_camera_feed(camera_source=video_path, camera_name="Video Demo")
 
-def run_test_model(model_path):
-   
-    # Model yükle
-    model = YOLO(model_path)
+def run_test_model(model_path, status_interval=5.0, record=True):
+    """
+    Kamerada test modu
+    
+    record=True: çizilmiş frame'ler arka plan thread'inde, ölçülen hızla
+    kaydedilir (bkz. BackgroundVideoWriter); kapalıyken çizim hiç yapılmaz
+    """
+    
+    # Ayrı model örneği: predict(show=True, stream=True) tahmin nesnesinin ayarlarını
+    # kalıcı değiştirir, paylaşılan kayıt modeli kullanılırsa sonraki kullanıcılara taşınır
+    model = load_detection_model(model_path)
     
     # Video kayıt ayarları
-    os.makedirs("test_videos", exist_ok=True)
-    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-    output_video_path = f"test_videos/test_session_{timestamp}.mp4"
-
-    # Video kaydedici kurulumu
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
     video_writer = None
-    frame_width, frame_height = 1280, 720
+    if record:
+        os.makedirs("test_videos", exist_ok=True)
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_video_path = f"test_videos/test_session_{timestamp}.mp4"
+        # Çizim (plot) ve kodlama tahmin döngüsü yerine kayıt thread'inde
+        video_writer = BackgroundVideoWriter(output_video_path, render=lambda result: result.plot())
 
-    def log_test_detection(detection_type, confidence, location="Test"):
-        try:
-            conn = sqlite3.connect("safety_logs.db")
-            cursor = conn.cursor()
-            
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            cursor.execute('''
-                INSERT INTO safety_violations 
-                (timestamp, violation_type, location, confidence, worker_id)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (timestamp, detection_type, location, confidence, "test_session"))
-            
-            conn.commit()
-            conn.close()
-            print(f" Test kaydı: {detection_type} - Güven: {confidence:.2f}")
-            
-        except Exception as e:
-            print(f"Test kayıt hatası: {e}")
+    # Test kayıtları tek bağlantıyla, toplu işlemlerle yazılır
+    writer = BatchedViolationWriter("safety_logs.db")
+
+    # Sınıf id -> test kaydı türü (her kutu için isim taraması yerine bir kez)
+    class_names = {class_id: name.lower() for class_id, name in model.names.items()}
+    test_labels = {}
+    for class_id, class_name in class_names.items():
+        if 'helmet' in class_name or 'hardhat' in class_name:
+            test_labels[class_id] = "Test - Baret Tespit"
+        elif 'vest' in class_name or 'safety' in class_name:
+            test_labels[class_id] = "Test - Yelek Tespit"
+        elif 'person' in class_name:
+            test_labels[class_id] = "Test - Kişi Tespit"
+        elif 'no-helmet' in class_name:
+            test_labels[class_id] = "Test - Baret Kullanmama"
+        elif 'no-vest' in class_name:
+            test_labels[class_id] = "Test - Yelek Kullanmama"
 
     # Tahmin yap
     results = model.predict(
@@ -1102,47 +4818,54 @@ def run_test_model(model_path):
         save=False
     )
 
-    print(" Test modunda çalışıyor - Tespitler ve video kaydediliyor...")
-    print(f"Video kaydediliyor: {output_video_path}")
+    if video_writer is not None:
+        print(" Test modunda çalışıyor - Tespitler ve video kaydediliyor...")
+        print(f"Video kaydediliyor: {output_video_path}")
+    else:
+        print(" Test modunda çalışıyor - Tespitler kaydediliyor...")
     print("'q' tuşuna basarak çıkabilirsiniz...")
 
-    for result in results:
-        if video_writer is None and result.orig_img is not None:
-            frame_height, frame_width = result.orig_img.shape[:2]
-            video_writer = cv2.VideoWriter(output_video_path, fourcc, 20.0, (frame_width, frame_height))
-            print(f" Video kaydedici başlatıldı: {frame_width}x{frame_height}")
-
-        if video_writer is not None and result.orig_img is not None:
-            annotated_frame = result.plot()
-            video_writer.write(annotated_frame)
-
-        if result.boxes is not None:
-            for box in result.boxes:
-                class_id = int(box.cls)
-                class_name = model.names[class_id].lower()
-                confidence = float(box.conf)
-
-                if 'helmet' in class_name or 'hardhat' in class_name:
-                    log_test_detection("Test - Baret Tespit", confidence)
-                elif 'vest' in class_name or 'safety' in class_name:
-                    log_test_detection("Test - Yelek Tespit", confidence)
-                elif 'person' in class_name:
-                    log_test_detection("Test - Kişi Tespit", confidence)
-                elif 'no-helmet' in class_name:
-                    log_test_detection("Test - Baret Kullanmama", confidence)
-                elif 'no-vest' in class_name:
-                    log_test_detection("Test - Yelek Kullanmama", confidence)
-
-                print(f" Tespit: {class_name} - Güven: {confidence:.2f}")
-
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+    # Kutu başına yazdırmak yerine sınıf sayaçları
+    class_counts = collections.Counter()
+    last_status = time.monotonic()
+
+    try:
+        for result in results:
+            if video_writer is not None and result.orig_img is not None:
+                video_writer.write(result)
+
+            if result.boxes is not None and len(result.boxes):
+                # Tüm kutular tek seferde: [x1, y1, x2, y2, (track_id), conf, cls]
+                data = result.boxes.data.cpu().numpy()
+                for class_id, confidence in zip(data[:, -1].astype(int).tolist(), data[:, -2].tolist()):
+                    class_counts[class_names.get(class_id, str(class_id))] += 1
+                    label = test_labels.get(class_id)
+                    if label is not None:
+                        writer.add(label, "Test", confidence, "test_session")
+
+            now = time.monotonic()
+            if now - last_status >= status_interval:
+                last_status = now
+                summary = ", ".join(f"{name}: {count}" for name, count in class_counts.most_common())
+                print(f" Tespitler: {summary or '-'} | Yazılan kayıt: {writer.written}")
+
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    finally:
+        writer.close()
+        if video_writer is not None:
+            video_writer.close()
 
     if video_writer is not None:
-        video_writer.release()
-        print(f" Video kaydedildi: {output_video_path}")
-    else:
-        print(" Video kaydedilemedi!")
+        if video_writer.frames_written:
+            print(f" Video kaydedildi: {output_video_path} ({video_writer.frames_written} frame, "
+                  f"{video_writer.fps:.1f} FPS, atlanan: {video_writer.dropped})")
+        else:
+            print(" Video kaydedilemedi!")
+
+    print(f" Test kayıtları: {writer.written} satır, {writer.batches} toplu yazma")
+    for label, count in writer.counts.most_common():
+        print(f"   {label}: {count}")
 
     cv2.destroyAllWindows()
 
@@ -1243,11 +4966,12 @@ def main():
     print("5. Video dosyası ile demo")
     print("6. Test modu (kayıtlı model ile)")
     print("7. Video sorun giderme aracı")  # YENİ
-    print("8. Çıkış")
+    print("8. Arka uç karşılaştırması (PyTorch / ONNX / OpenVINO)")
+    print("9. Çıkış")
     
     while True:
         try:
-            choice = input("\nSeçiminizi yapın (1-8): ").strip()
+            choice = input("\nSeçiminizi yapın (1-9): ").strip()
             
             if choice == "1":
                 print("\n Roboflow API key'ini koda girmeyi unutmayın!")
@@ -1268,14 +4992,17 @@ def main():
                 
             elif choice == "5":
                 video_path = input("Video dosya yolunu girin: ").strip()
-                demo_with_video_file(video_path)
+                offline = input("Hızlı analiz (görüntüsüz, sonuç dosyasına)? (e/h): ").strip().lower() == "e"
+                demo_with_video_file(video_path, offline=offline)
                 break
                 
             elif choice == "6":
                 model_path = "models/helmet_detection/best_helmet_model.pt"
                 if os.path.exists(model_path):
+                    record = input("Video kaydedilsin mi? (e/h): ").strip().lower() != "h"
                     print(" Test modu başlatılıyor...")
-                    run_test_model(model_path)
+                    run_test_model(model_path, record=record)
+                    break
                 else:
                     print(" Model dosyası bulunamadı!")
                     
@@ -1283,11 +5010,21 @@ def main():
                 troubleshoot_video_issues()
                     
             elif choice == "8":
+                model_path = "models/helmet_detection/best_helmet_model.pt"
+                if os.path.exists(model_path):
+                    video_path = input("Karşılaştırma videosu yolunu girin: ").strip()
+                    data_yaml_path = input("INT8 kalibrasyonu için data.yaml yolu (boş geçilirse "
+                                           "OpenVINO INT8 atlanır): ").strip() or None
+                    benchmark_backends(model_path, video_path, data_yaml_path=data_yaml_path)
+                else:
+                    print(" Model dosyası bulunamadı!")
+                    
+            elif choice == "9":
                 print(" Güle güle!")
                 break
                 
             else:
-                print(" Geçersiz seçim! 1-8 arası bir sayı girin.")
+                print(" Geçersiz seçim! 1-9 arası bir sayı girin.")
                 
         except KeyboardInterrupt:
             print("\n\n Program sonlandırıldı!")
@@ -1340,26 +5077,51 @@ KULLANIM KILAVUZU:
 6. KLAVYE KONTROLLERI:
    - 'q': Çıkış
    - 's': Ekran görüntüsü kaydet
+   - 'p': Duraklat / devam (video)
+
+7. ÇALIŞMA MODLARI VE AYARLAR:
+   - process_camera_feed seçenekleri FeedOptions ile verilir (alanlar tek tek
+     anahtar kelimeyle de verilebilir):
+     detector.process_camera_feed("video.mp4", "Giriş", FeedOptions(headless=True))
+   - Ekransız sunucularda: headless=True
+     Durdurma: Ctrl+C / SIGTERM veya detector.stop()
+     Duraklatma: SIGUSR1 veya detector.pause() / detector.resume()
+   - Kayıtlı videoyu hızlı analiz: detector.analyze_video_offline("video.mp4")
+     (menüde 5. seçenek -> hızlı analiz 'e')
+   - Bölgeler, bölge KKD kuralları ve yüksek çözünürlüklü kameralar için karo
+     modu: zone_config='zones.yaml' (örnek için load_zone_config)
+   - İhlal kaydı: log_violations=True (kişi takibi otomatik açılır);
+     kanıt görüntüsü evidence_dir, ihlal klibi clip_dir ile
+   - Tarayıcıdan izleme: stream_port=8080 (varsayılan yalnızca bu makine)
 
-7. VERİTABANI:
+8. VERİTABANI:
    - SQLite veritabanında ihlaller otomatik kaydedilir
    - safety_logs.db dosyasında saklanır
    - Rapor fonksiyonları ile görüntülenebilir
 
-8. PERFORMANS İPUÇLARI:
+9. PERFORMANS İPUÇLARI:
    - GPU varsa CUDA kullanılır (otomatik)
    - Batch size'ı RAM'inize göre ayarlayın
    - confidence_threshold değerini optimize edin
    - Frame işleme oranını azaltarak performans artırın
+   - CPU'da: HelmetDetectionSystem(model_path, backend='openvino', int8=True,
+                                    data_yaml_path='veri_seti/data.yaml')
+     (INT8 kalibrasyonu kendi veri setinizle yapılır; ONNX INT8 veri gerektirmez)
+     En hızlı arka uç için menüdeki 8. seçenek (benchmark_backends)
+   - Aynı süreçteki tüm kameralar modeli paylaşır ve model açılışta ısıtılır
+     (MODEL_REGISTRY.report() yükleme / ısınma sürelerini gösterir)
+   - Çok sayıda kamera için çekirdek başına süreç:
+     detector.run_camera_pool({'Giriş': 0, 'Depo': 'rtsp://ip:port/stream'})
+     (bölge / KKD kuralları ve karo ayarları süreçlere aktarılır: zone_config='zones.yaml')
 
-9. GÜVENLİK ÖZELLİKLERİ:
-   - Gerçek zamanlı ihlal tespiti
-   - Otomatik kayıt sistemi
-   - Görsel uyarılar
-   - İstatistik takibi
-   - Raporlama sistemi
+10. GÜVENLİK ÖZELLİKLERİ:
+    - Gerçek zamanlı ihlal tespiti
+    - Otomatik kayıt sistemi
+    - Görsel uyarılar
+    - İstatistik takibi
+    - Raporlama sistemi
 
-10. SORUN GİDERME:
+11. SORUN GİDERME:
     - OpenCV kamera açmıyorsa: Kamera izinlerini kontrol edin
     - Model yüklenemiyorsa: YOLO paketini güncelleyin
     - Düşük FPS: Görüntü boyutunu küçültün
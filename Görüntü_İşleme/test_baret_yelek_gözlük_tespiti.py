@@ -0,0 +1,734 @@
+# -*- coding: utf-8 -*-
+"""
+baret_yelek_gözlük_tespiti birim testleri
+
+Model gerektirmez: dedektör sahte bir modelle kurulur.
+Çalıştırma: python -m pytest -q
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import types
+import urllib.request
+
+import numpy as np
+import pytest
+
+import baret_yelek_gözlük_tespiti as bt
+
+
+# Sahte modelin sınıfları: kategori tablosu bu isimlerden çözülür
+FAKE_NAMES = {0: 'helmet', 1: 'person', 2: 'vest', 3: 'goggles', 4: 'head'}
+HELMET, PERSON, VEST, GOGGLES, NO_HELMET = range(5)
+
+
+def _create_database(path):
+    """Uygulamanın şemasıyla boş veritabanı oluştur"""
+    bt.HelmetDetectionSystem.setup_database(types.SimpleNamespace(database_path=str(path)))
+
+
+def _read_rows(path):
+    conn = sqlite3.connect(str(path))
+    try:
+        return conn.execute('''
+            SELECT violation_type, location, typeof(location), confidence, typeof(confidence),
+                   worker_id
+            FROM safety_violations ORDER BY id
+        ''').fetchall()
+    finally:
+        conn.close()
+
+
+class _FakeTensor:
+    def __init__(self, array):
+        self._array = np.asarray(array, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self._array
+
+
+class _FakeBoxes:
+    def __init__(self, rows):
+        self.data = _FakeTensor(np.asarray(rows, dtype=np.float32).reshape(-1, 6))
+        self._count = len(rows)
+
+    def __len__(self):
+        return self._count
+
+
+class _FakeResult:
+    def __init__(self, rows):
+        self.boxes = _FakeBoxes(rows)
+        self.orig_img = np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def plot(self):
+        return self.orig_img.copy()
+
+
+class _FakeModel:
+    """
+    Her çağrıda verilen satırları ([x1, y1, x2, y2, conf, cls]) döner
+
+    rows çağrılabilirse çağrı numarasıyla çağrılır (frame'e göre değişen tespitler).
+    """
+
+    names = FAKE_NAMES
+
+    def __init__(self, frames=None, rows=()):
+        self._frames = frames
+        self.rows = list(rows)
+        self.calls = 0
+
+    def __call__(self, source, **kwargs):
+        frames = source if isinstance(source, list) else [source]
+        self.calls += 1
+        rows = self.rows(self.calls) if callable(self.rows) else self.rows
+        return [_FakeResult(rows) for _ in frames]
+
+    def predict(self, **kwargs):
+        for rows in self._frames:
+            yield _FakeResult(rows)
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    model = _FakeModel()
+    monkeypatch.setattr(bt, "load_detection_model", lambda *args, **kwargs: model)
+    yield model
+    bt.MODEL_REGISTRY.clear()
+
+
+@pytest.fixture
+def detector(fake_model, tmp_path):
+    return bt.HelmetDetectionSystem(database_path=str(tmp_path / "safety_logs.db"))
+
+
+def _detections(detector, rows):
+    """[x1, y1, x2, y2, conf, cls] satırlarından DetectionSet"""
+    rows = np.asarray(rows, dtype=np.float32).reshape(-1, 6)
+    class_ids = rows[:, 5].astype(np.int64)
+    return bt.DetectionSet(rows[:, :4], rows[:, 4], class_ids,
+                           detector.class_category_index[class_ids], detector.class_names_lower)
+
+
+# Baş, gövde ve göz bölgesinde KKD olan kişi (kişi kutusu 100x180)
+PERSON_BOX = [100, 100, 200, 280, 0.9, PERSON]
+HELMET_BOX = [130, 100, 170, 130, 0.8, HELMET]
+VEST_BOX = [120, 180, 180, 240, 0.8, VEST]
+GOGGLES_BOX = [135, 120, 165, 130, 0.7, GOGGLES]
+
+
+def test_category_table_from_model_names(detector):
+    assert detector.class_category_table == ['helmets', 'persons', 'vests', 'goggles', 'no_helmets']
+
+
+def test_compliance_person_with_full_ppe_is_safe(detector):
+    detections = _detections(detector, [PERSON_BOX, HELMET_BOX, VEST_BOX, GOGGLES_BOX])
+
+    violations, safe_persons = detector.check_safety_compliance(detections)
+
+    assert violations == []
+    assert len(safe_persons) == 1
+    assert safe_persons[0]['person_id'] == 0
+    assert safe_persons[0]['helmet']['bbox'] == [130, 100, 170, 130]
+
+
+def test_compliance_reports_each_missing_ppe(detector):
+    other_person = [400, 100, 500, 280, 0.9, PERSON]
+    detections = _detections(detector, [PERSON_BOX, HELMET_BOX, other_person])
+
+    violations, safe_persons = detector.check_safety_compliance(detections)
+
+    assert [safe['person_id'] for safe in safe_persons] == [0]
+    by_person = {violation['person_id']: violation for violation in violations}
+    assert by_person[0]['violations'] == ['no_vest', 'no_goggles']
+    assert by_person[1]['violations'] == ['no_helmet', 'no_vest', 'no_goggles']
+
+
+def test_compliance_ignores_helmet_below_head(detector):
+    low_helmet = [130, 200, 170, 230, 0.8, HELMET]
+    detections = _detections(detector, [PERSON_BOX, low_helmet, VEST_BOX, GOGGLES_BOX])
+
+    violations, safe_persons = detector.check_safety_compliance(detections)
+
+    assert safe_persons == []
+    assert [violation['person_id'] for violation in violations] == [0]
+    assert 'violations' not in violations[0]  # Yalnızca baret eksik
+
+
+def test_compliance_same_result_for_dict_input(detector):
+    rows = [PERSON_BOX, HELMET_BOX, [400, 100, 500, 280, 0.9, PERSON], VEST_BOX]
+    detections = _detections(detector, rows)
+
+    expected = detector.check_safety_compliance(detections)
+    actual = detector.check_safety_compliance(detections.to_dict())
+
+    assert actual == expected
+
+
+def test_detection_set_views_and_counts(detector):
+    detections = _detections(detector, [PERSON_BOX, HELMET_BOX, [0, 0, 5, 5, 0.4, NO_HELMET]])
+
+    assert len(detections) == 3
+    assert detections.count('persons') == 1
+    assert detections.count('no_helmets') == 1
+    assert detections['persons'][0]['bbox'] == [100, 100, 200, 280]
+    assert detections['persons'][0]['class_name'] == 'person'
+    assert detections['goggles'] == []
+    np.testing.assert_allclose(detections.centers('helmets'), [[150, 115]])
+    with pytest.raises(KeyError):
+        detections['hats']
+
+
+def test_detection_set_select_offset_concatenate(detector):
+    detections = _detections(detector, [PERSON_BOX, HELMET_BOX])
+
+    shifted = detections.select(np.array([1])).offset(10, 20)
+    merged = bt.DetectionSet.concatenate([detections, shifted, bt.DetectionSet.empty()])
+
+    np.testing.assert_allclose(shifted.xyxy, [[140, 120, 180, 150]])
+    assert len(merged) == 3
+    assert merged.count('helmets') == 2
+
+
+def test_non_max_suppression_per_class(detector):
+    detections = _detections(detector, [
+        [0, 0, 100, 100, 0.9, PERSON],
+        [5, 5, 100, 100, 0.8, PERSON],     # Kopya: atılır
+        [5, 5, 100, 100, 0.7, HELMET],     # Farklı sınıf: kalır
+        [300, 300, 400, 400, 0.6, PERSON]  # Örtüşmüyor: kalır
+    ])
+
+    kept = detections.non_max_suppression(0.5)
+
+    np.testing.assert_allclose(kept.confidences, [0.9, 0.7, 0.6])
+
+
+def test_non_max_suppression_ios_and_priority(detector):
+    # Parça kutu (karo kenarında kesilmiş kişi) IoU'da kalır, IoS'de atılır
+    detections = _detections(detector, [
+        [0, 0, 100, 200, 0.6, PERSON],
+        [0, 0, 100, 80, 0.9, PERSON]
+    ])
+
+    assert len(detections.non_max_suppression(0.5)) == 2
+    kept = detections.non_max_suppression(0.5, metric='ios', priority=np.array([False, True]))
+    np.testing.assert_allclose(kept.xyxy, [[0, 0, 100, 200]])
+
+
+def test_tile_layout_covers_frame_with_overlap():
+    layout = bt.TileLayout.from_config({'tile_size': 640, 'overlap': 0.2})
+    tiles = layout.tiles((1080, 1920, 3))
+
+    assert len(tiles) == 8  # 4 sütun x 2 satır, son karolar kenara hizalı
+    assert all(x2 - x1 == 640 and y2 - y1 == 640 for x1, y1, x2, y2 in tiles)
+    covered = np.zeros((1080, 1920), dtype=bool)
+    for x1, y1, x2, y2 in tiles:
+        covered[y1:y2, x1:x2] = True
+    assert covered.all()
+    assert sorted({x1 for x1, _, _, _ in tiles}) == [0, 512, 1024, 1280]
+    assert layout.tiles((1080, 1920, 3)) is tiles
+    assert layout.tiles((480, 640, 3)) == [(0, 0, 640, 480)]
+
+
+def test_tile_layout_triggers_on_far_person_and_holds(detector):
+    layout = bt.TileLayout(tile_size=640, far_person_ratio=0.12, hold_frames=2)
+    far = _detections(detector, [[900, 500, 940, 600, 0.9, PERSON]])     # 100 < 0.12 * 1080
+    near = _detections(detector, [[900, 300, 1100, 800, 0.9, PERSON]])
+
+    assert not layout.should_tile(near, (1080, 1920))
+    assert layout.should_tile(far, (1080, 1920))
+    assert [layout.should_tile(near, (1080, 1920)) for _ in range(3)] == [True, True, False]
+    assert layout.tiled_frames == 3
+    # Tek karoya sığan frame hiç karolanmaz
+    assert not layout.should_tile(far, (480, 640))
+
+
+def test_detection_cache_exact_match_per_camera():
+    cache = bt.DetectionCache(max_size=2)
+    frame = np.full((72, 128, 3), 100, dtype=np.uint8)
+
+    cached, key = cache.get(frame, "Giriş")
+    assert cached is None
+    cache.put(key, "tespitler")
+    assert cache.get(frame.copy(), "Giriş") == ("tespitler", None)
+    # Aynı görüntü başka kamerada ve az değişmiş frame önbellekten dönmez
+    assert cache.get(frame, "Depo")[0] is None
+    assert cache.get(frame + 2, "Giriş")[0] is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_detection_cache_tolerance_lru_and_clear():
+    cache = bt.DetectionCache(max_size=2, tolerance=2)
+    frames = [np.full((72, 128, 3), value, dtype=np.uint8) for value in (0, 50, 100)]
+    for index, frame in enumerate(frames):
+        cache.put(cache.get(frame)[1], index)
+
+    assert cache.get(frames[0])[0] is None  # En eski kayıt atıldı
+    assert cache.get(frames[2] + 2)[0] == 2  # Tolerans içinde
+
+    cache.clear()
+    assert not cache.entries and (cache.hits, cache.misses) == (0, 0)
+
+
+def test_detect_objects_uses_cache_per_camera(detector, fake_model):
+    fake_model.rows = [PERSON_BOX]
+    detector.enable_detection_cache(max_size=4)
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    fake_model.calls = 0  # Kayıttaki ısınma çağrıları sayılmasın
+
+    first = detector.detect_objects(frame, camera_name="Giriş")
+    assert detector.detect_objects(frame, camera_name="Giriş") is first
+    detector.detect_objects(frame, camera_name="Depo")
+    assert fake_model.calls == 2
+
+
+class _FixedBatchModel(_FakeModel):
+    """Sabit batch=1 ile dışa aktarılmış model gibi toplu girdide hata verir"""
+
+    def __call__(self, source, **kwargs):
+        if isinstance(source, list) and len(source) > 1:
+            raise RuntimeError("Got invalid dimensions for input: images index: 0 Got: 4 Expected: 1")
+        return super().__call__(source, **kwargs)
+
+
+def test_detect_objects_batch_falls_back_to_single_frames(detector):
+    detector.model = _FixedBatchModel(rows=[PERSON_BOX])
+    frames = [np.zeros((240, 320, 3), dtype=np.uint8) for _ in range(4)]
+
+    results = detector.detect_objects_batch(frames, max_batch_size=4)
+    assert [len(result['persons']) for result in results] == [1, 1, 1, 1]
+    assert detector._single_frame_model
+
+    # Sonraki çağrılar toplu denemeyi atlar
+    detector.model.calls = 0
+    detector.detect_objects_batch(frames, max_batch_size=4)
+    assert detector.model.calls == 4
+
+
+def test_latest_frame_queue_drops_oldest():
+    dropped = []
+    frames = bt.LatestFrameQueue(maxsize=2, on_drop=dropped.append)
+
+    for item in range(4):
+        frames.put(item)
+
+    assert frames.dropped == 2
+    assert dropped == [0, 1]
+    assert [frames.get(timeout=0), frames.get(timeout=0)] == [2, 3]
+    assert frames.get(timeout=0.01) is None
+
+
+def test_latest_frame_queue_get_wakes_on_put():
+    frames = bt.LatestFrameQueue()
+    timer = threading.Timer(0.05, frames.put, args=("frame",))
+    timer.start()
+    try:
+        assert frames.get(timeout=5) == "frame"
+    finally:
+        timer.join()
+
+
+class _FakeCapture:
+    """cap.read(image=...) gibi davranan okuyucu"""
+
+    def __init__(self, shape=(4, 6, 3)):
+        self.shape = shape
+        self.count = 0
+
+    def read(self, image=None):
+        self.count += 1
+        if image is None:
+            image = np.empty(self.shape, dtype=np.uint8)
+        image[:] = self.count
+        return True, image
+
+
+def test_frame_buffer_ring_reuses_released_buffers():
+    ring = bt.FrameBufferRing(2)
+    capture = _FakeCapture()
+
+    frames = []
+    for _ in range(4):
+        ret, frame = ring.read(capture.read)
+        assert ret
+        frames.append(frame)
+        ring.release(frame)
+
+    assert ring.allocated == 2
+    assert ring.reused == 2
+    assert frames[2] is frames[0] and frames[3] is frames[1]
+    assert ring.in_use == 0
+
+
+def test_frame_buffer_ring_does_not_overwrite_retained_frame():
+    ring = bt.FrameBufferRing(2)
+    capture = _FakeCapture()
+
+    _, held = ring.read(capture.read)
+    ring.retain(held)
+    ring.release(held)  # Okuma turu bitti, retain() ile hâlâ tutuluyor
+    _, second = ring.read(capture.read)
+    ring.release(second)
+    _, third = ring.read(capture.read)
+
+    assert third is second
+    assert int(held[0, 0, 0]) == 1  # Tutulan frame'in üzerine yazılmadı
+
+    _, fourth = ring.read(capture.read)  # İki tampon da ödünçte: taşma
+    assert ring.overruns == 1
+    assert fourth is not held and fourth is not third
+
+
+@pytest.fixture
+def shared_ring():
+    ring = bt.SharedFrameRing.create((4, 6, 3), slots=2)
+    yield ring
+    ring.close()
+    ring.unlink()
+
+
+def test_shared_frame_ring_latest_and_seq(shared_ring):
+    reader = bt.SharedFrameRing.attach(**shared_ring.descriptor())
+    try:
+        assert reader.read_latest(0) is None
+        for value in (1, 2, 3):
+            shared_ring.write(np.full((4, 6, 3), value, dtype=np.uint8), float(value))
+
+        seq, timestamp, frame = reader.read_latest(0)
+        assert (seq, timestamp, int(frame[0, 0, 0])) == (3, 3.0, 3)
+        assert reader.read_latest(seq) is None
+        assert int(reader.read_seq(2)[0, 0, 0]) == 2
+        assert reader.read_seq(1) is None  # Slotun üzerine yazıldı
+
+        shared_ring.mark_closed()
+        assert reader.closed and reader.last_seq == 3
+    finally:
+        reader.close()
+
+
+def test_shared_frame_ring_rejects_frame_written_during_copy(shared_ring):
+    shared_ring.write(np.zeros((4, 6, 3), dtype=np.uint8), 0.0)
+    slot = 1 % shared_ring.slots
+
+    # Kopya sırasında yazıcı slotu işaretlerse okuyucu yarım frame'i kullanmaz
+    original_copyto = np.copyto
+
+    def copy_then_overwrite(dst, src):
+        original_copyto(dst, src)
+        shared_ring._header[2 + slot] = -1
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(bt.np, "copyto", copy_then_overwrite)
+        assert shared_ring.read_latest(0) is None
+        assert shared_ring.read_seq(1) is None
+
+
+def test_camera_worker_sends_counts_events_and_evidence_copy(shared_ring, fake_model, tmp_path):
+    fake_model.rows = [PERSON_BOX]  # Baretsiz, yeleksiz kişi
+    for value in (1, 2, 3):
+        shared_ring.write(np.full((4, 6, 3), value, dtype=np.uint8), float(value))
+    shared_ring.mark_closed()
+
+    results = queue.Queue()
+    camera = {'ring': shared_ring.descriptor(), 'fps': 10, 'is_video_file': True,
+              'zones': None, 'tiling': None}
+    bt._camera_worker_process(0, {'Giriş': camera}, {'database_path': str(tmp_path / "w.db")},
+                              0.3, results, threading.Event(), 1, True, 8,
+                              {'min_duration': 0, 'cooldown': 10}, True)
+
+    result = results.get_nowait()
+    assert result['frame_index'] == 3 and result['timestamp'] == pytest.approx(0.3)
+    assert all(isinstance(count, int) for count in result['tracker'].values())
+    assert {event['event'] for event in result['events']} == {'start'}
+    assert int(result['evidence_frame'][0, 0, 0]) == 3
+
+
+def test_batched_writer_column_types(tmp_path):
+    database_path = tmp_path / "safety_logs.db"
+    _create_database(database_path)
+
+    writer = bt.BatchedViolationWriter(str(database_path))
+    writer.add("Test - Baret Tespit", "Test", 0.75, "test_session")
+    writer.close()
+
+    assert writer.written == 1
+    assert _read_rows(database_path) == [
+        ("Test - Baret Tespit", "Test", "text", 0.75, "real", "test_session")
+    ]
+
+
+def test_run_test_model_logs_location_and_confidence(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _create_database(tmp_path / "safety_logs.db")
+
+    # [x1, y1, x2, y2, conf, cls]
+    frames = [
+        [[0, 0, 10, 10, 0.9, 0], [5, 5, 20, 30, 0.6, 1]],
+        [[1, 1, 11, 11, 0.8, 2], [2, 2, 12, 12, 0.7, 3]],
+    ]
+    model = _FakeModel(frames)
+    monkeypatch.setattr(bt, "load_detection_model", lambda *args, **kwargs: model)
+    monkeypatch.setattr(bt.cv2, "waitKey", lambda delay: -1)
+    monkeypatch.setattr(bt.cv2, "destroyAllWindows", lambda: None)
+
+    bt.run_test_model("fake.pt", record=False)
+
+    rows = _read_rows(tmp_path / "safety_logs.db")
+    assert [row[0] for row in rows] == [
+        "Test - Baret Tespit", "Test - Kişi Tespit", "Test - Yelek Tespit"
+    ]
+    for _, location, location_type, _, confidence_type, worker_id in rows:
+        assert (location, location_type, confidence_type, worker_id) == \
+            ("Test", "text", "real", "test_session")
+    assert [row[3] for row in rows] == pytest.approx([0.9, 0.6, 0.8])
+    # Test modu paylaşılan kayıt modelini kullanmaz (predict ayarları taşınmasın)
+    assert not bt.MODEL_REGISTRY._entries
+
+
+def test_person_tracker_keeps_ids_when_order_changes():
+    tracker = bt.PersonTracker()
+    left = np.array([0, 0, 50, 100])
+    right = np.array([200, 0, 250, 100])
+
+    first = tracker.update([left, right])
+    second = tracker.update([right + 5, left + 5])  # Sıra değişti, kişiler biraz yürüdü
+
+    assert first == [1, 2]
+    assert second == [2, 1]
+    assert tracker.update([[400, 0, 450, 100]]) == [3]
+
+
+def test_person_tracker_survives_short_miss_and_expires():
+    tracker = bt.PersonTracker(max_missed=2)
+    box = [0, 0, 50, 100]
+
+    track_id, = tracker.update([box])
+    tracker.update([])
+    tracker.update([])
+    assert tracker.update([box]) == [track_id]
+
+    for _ in range(3):
+        tracker.update([])
+    assert track_id not in tracker.tracks
+    assert tracker.update([box]) != [track_id]
+
+
+def test_person_tracker_counts_confirmed_people_once():
+    tracker = bt.PersonTracker(min_hits=3)
+
+    for _ in range(5):
+        tracker.update([[0, 0, 50, 100]])
+    tracker.update([[300, 0, 350, 100]])  # Tek frame'lik kişi sayılmaz
+
+    assert tracker.confirmed_people == 1
+
+
+def test_person_tracker_majority_vote_and_settling():
+    tracker = bt.PersonTracker(min_hits=1, vote_window=3, recheck_interval=5)
+    track_id, = tracker.update([[0, 0, 50, 100]])
+
+    tracker.record(track_id, {'no_helmet', 'no_vest'})
+    tracker.record(track_id, {'no_helmet', 'no_vest'})
+    tracker.record(track_id, {'no_vest'})  # Tek frame'de yanlışlıkla baret görüldü
+
+    assert tracker.state(track_id) == ['no_helmet', 'no_vest']
+    assert not tracker.is_settled(track_id)  # Oylar farklı
+
+    for _ in range(3):
+        tracker.record(track_id, {'no_helmet', 'no_vest'})
+    assert tracker.is_settled(track_id)
+    assert track_id in tracker.people_with_violation
+    assert track_id not in tracker.people_with_helmet
+
+    # recheck_interval dolunca kesinleşmiş takip yeniden değerlendirilir
+    for _ in range(5):
+        tracker.update([[0, 0, 50, 100]])
+    assert not tracker.is_settled(track_id)
+
+
+def test_tracked_compliance_uses_track_ids(detector):
+    tracker = bt.PersonTracker(min_hits=1)
+    other_person = [400, 100, 500, 280, 0.9, PERSON]
+
+    first = detector.check_tracked_compliance(
+        _detections(detector, [PERSON_BOX, HELMET_BOX, VEST_BOX, GOGGLES_BOX, other_person]),
+        tracker)
+    second = detector.check_tracked_compliance(
+        _detections(detector, [other_person, PERSON_BOX, HELMET_BOX, VEST_BOX, GOGGLES_BOX]),
+        tracker)
+
+    for violations, safe_persons in (first, second):
+        assert [safe['track_id'] for safe in safe_persons] == [1]
+        assert [(v['track_id'], v['violations']) for v in violations] == \
+            [(2, ['no_helmet', 'no_vest', 'no_goggles'])]
+
+
+def _write_video(path, frame_count=20, fps=10, size=(320, 240)):
+    writer = bt.cv2.VideoWriter(str(path), bt.cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+    for index in range(frame_count):
+        writer.write(np.full((size[1], size[0], 3), index, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+def test_violation_logging_follows_people_when_detection_order_changes(detector, fake_model,
+                                                                        tmp_path):
+    # Biri tam KKD'li, diğerinde hiçbiri yok; tespit sırası her frame değişiyor
+    equipped = [PERSON_BOX, HELMET_BOX, VEST_BOX, GOGGLES_BOX]
+    unequipped = [[250, 100, 300, 280, 0.9, PERSON]]
+    fake_model.rows = lambda call: equipped + unequipped if call % 2 else unequipped + equipped
+    video_path = _write_video(tmp_path / "order.avi")
+
+    detector.process_camera_feed(video_path, "Kamera", headless=True, log_violations=True,
+                                 min_violation_duration=0.5)
+
+    conn = sqlite3.connect(detector.database_path)
+    try:
+        rows = conn.execute(
+            'SELECT violation_type, notes FROM safety_violations ORDER BY id').fetchall()
+    finally:
+        conn.close()
+    # Takip olmadan kişi sırası anahtar olur ve aynı ihlaller iki kişiye yazılırdı
+    assert sorted(violation_type for violation_type, _ in rows) == \
+        sorted(bt.VIOLATION_LABELS[t] for t in ('no_helmet', 'no_vest', 'no_goggles'))
+    assert len({notes for _, notes in rows}) == 1
+
+
+def test_evidence_store_only_with_violation_logging_and_closed_after_run(detector, fake_model,
+                                                                        tmp_path):
+    fake_model.rows = [[250, 100, 300, 280, 0.9, PERSON]]
+    video_path = _write_video(tmp_path / "evidence.avi")
+    evidence_dir = tmp_path / "evidence"
+
+    detector.process_camera_feed(video_path, "Kamera", headless=True, evidence_dir=str(evidence_dir))
+    assert detector.evidence_store is None and not evidence_dir.exists()
+
+    detector.process_camera_feed(video_path, "Kamera", headless=True, log_violations=True,
+                                 min_violation_duration=0.5, evidence_dir=str(evidence_dir))
+    assert detector.evidence_store is None
+    assert any(evidence_dir.rglob("*.jpg"))
+
+
+def test_process_camera_feed_options_and_overrides(detector, fake_model, tmp_path):
+    video_path = _write_video(tmp_path / "options.avi", frame_count=5)
+    options = bt.FeedOptions(headless=True)
+
+    detector.process_camera_feed(video_path, "Kamera", options, frame_buffer_count=0)
+    assert options.frame_buffer_count is None  # Verilen seçenekler değişmez
+    with pytest.raises(TypeError):
+        detector.process_camera_feed(video_path, "Kamera", options, unknown_option=True)
+
+
+def test_offline_analysis_writes_every_frame_in_order(detector, fake_model, tmp_path):
+    fake_model.rows = [PERSON_BOX, HELMET_BOX]
+    video_path = _write_video(tmp_path / "offline.avi", frame_count=40)
+
+    output_path = detector.analyze_video_offline(video_path, str(tmp_path / "out.jsonl"),
+                                                 batch_size=4, num_decoders=2)
+    with open(output_path, encoding="utf-8") as f:
+        header, *records = [json.loads(line) for line in f]
+
+    assert header['frames'] == 40
+    assert [record['f'] for record in records] == list(range(1, 41))
+    assert all(len(record['d']) == 2 and record['s'] == 1 for record in records)
+    assert records[0]['v'] == [[0, ['no_goggles', 'no_vest']]]
+
+    sampled = detector.analyze_video_offline(video_path, str(tmp_path / "sampled.jsonl"),
+                                             batch_size=4, analysis_fps=5)
+    with open(sampled, encoding="utf-8") as f:
+        assert len(f.readlines()) - 1 == 20
+
+
+def _events(events):
+    return [(event['event'], event['key']) for event in events]
+
+
+def test_debouncer_starts_after_min_duration_and_ends_after_resolve():
+    debouncer = bt.ViolationDebouncer(min_duration=2.0, resolve_after=1.0, cooldown=10.0)
+    key = (1, 'no_helmet')
+
+    assert debouncer.update({key: 0.6}, 0.0) == []
+    assert debouncer.update({key: 0.8}, 1.0) == []
+    started = debouncer.update({key: 0.7}, 2.0)
+    assert _events(started) == [('start', key)]
+    assert started[0]['entry']['confidence'] == pytest.approx(0.8)
+
+    assert debouncer.update({}, 2.5) == []
+    assert _events(debouncer.update({}, 3.0)) == [('end', key)]
+
+
+def test_debouncer_ignores_short_blips_and_respects_cooldown():
+    debouncer = bt.ViolationDebouncer(min_duration=2.0, resolve_after=1.0, cooldown=10.0)
+    key = (1, 'no_vest')
+
+    debouncer.update({key: 0.5}, 0.0)
+    debouncer.update({}, 1.0)  # Süre dolmadan kayboldu: kayıt yok
+    assert key not in debouncer.entries
+
+    debouncer.update({key: 0.5}, 2.0)
+    debouncer.update({key: 0.5}, 4.0)  # start
+    debouncer.update({}, 5.0)  # end
+    for now in (6.0, 9.0, 12.0):
+        assert debouncer.update({key: 0.5}, now) == []  # Soğuma süresi
+    debouncer.update({key: 0.5}, 16.0)
+    assert _events(debouncer.update({key: 0.5}, 18.0)) == [('start', key)]
+
+
+def test_debouncer_flush_closes_active_violations():
+    debouncer = bt.ViolationDebouncer(min_duration=0.0)
+    debouncer.update({(1, 'no_helmet'): 0.5, (2, 'no_vest'): 0.5}, 0.0)
+
+    assert sorted(_events(debouncer.flush(1.0))) == [
+        ('end', (1, 'no_helmet')), ('end', (2, 'no_vest'))]
+    assert debouncer.flush(2.0) == []
+
+
+def _record_clip(directory, row_ids):
+    saved = []
+    recorder = bt.ClipRecorder("Giriş", str(directory), pre_seconds=0.3, post_seconds=0.2,
+                               on_saved=lambda path, ids: saved.append((path, ids)))
+    for index in range(5):
+        recorder.add(np.full((48, 64, 3), index * 40, dtype=np.uint8), index * 0.1)
+    time.sleep(0.2)  # Kodlama thread'i halkayı doldursun
+    path = recorder.trigger(0.4, "no_helmet", row_ids[:1])
+    recorder.trigger(0.4, "no_vest", row_ids[1:])  # Açık klibi uzatır
+    recorder.close()
+    return recorder, path, saved
+
+
+def test_clip_recorder_links_rows_after_clip_is_written(tmp_path):
+    recorder, path, saved = _record_clip(tmp_path, [7, 8])
+    assert saved == [(path, [7, 8])]
+    assert os.path.getsize(path) > 0 and recorder.clips_written == 1
+
+
+def test_clip_recorder_does_not_link_failed_clip(tmp_path):
+    # Kamera klasörü yerine dosya: MP4 yazılamaz
+    (tmp_path / "Giriş").write_text("")
+    recorder, _, saved = _record_clip(tmp_path, [7])
+    assert saved == [] and recorder.failed == 1
+
+
+def test_stream_server_is_local_by_default_and_escapes_camera_names():
+    server = bt.MJPEGStreamServer(port=0)
+    server.channel('<b>Kapı</b>/1')
+    server.start()
+    try:
+        host, port = server._httpd.server_address[:2]
+        assert host == '127.0.0.1'
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=5) as response:
+            body = response.read().decode('utf-8')
+    finally:
+        server.stop()
+
+    assert '<b>Kapı</b>' not in body
+    assert '&lt;b&gt;Kapı&lt;/b&gt;/1' in body
+    assert 'src="/camera/%3Cb%3EKap%C4%B1%3C%2Fb%3E%2F1"' in body